@@ -3,17 +3,24 @@ Analysis endpoint
 Processes uploaded files through OCR and question extraction.
 """
 
-import os
-from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 from collections import Counter
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import asyncio
 import logging
 
-from core.ocr import run_ocr, run_best_ocr
-from core.question_extractor import extract_questions
+from core.ocr import run_ocr, run_best_ocr_spool_async, summarize_pages, select_pages, PAGE_SEPARATOR, OCRQueueFullError
+from core.ocr_providers import OCRJobControl
+from core.question_extractor import extract_questions, blocks_from_pages
+from core.header_footer import strip_headers_footers
+from core.page_classifier import filter_question_pages
+from core.upload_index import upload_index
+from core.ocr_prewarm import ocr_prewarmer
+from core.storage import storage_manager
+from core.analysis_cache import analysis_cache, analysis_key, ANALYSIS_CACHE_ENABLED
+from core.text_spool import PageSpool
 from core.ai_client import ai_client
 from utils.database import db
 
@@ -24,65 +31,140 @@ analysis_logger = logging.getLogger("ExamPulse.Analysis")
 
 router = APIRouter()
 
-# Upload directory (configurable via .env, defaults to ./uploads)
-UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
-
 
 class AnalyzeRequest(BaseModel):
     """Request model for analysis"""
     file_id: str
+    pages: Optional[str] = None  # Page ranges to analyze, e.g. "1-3,7" (1-based); None = whole document
+    preview: Optional[int] = None  # Quick look: only the first N (selected) pages, nothing stored
 
 
 @router.post("/")
-async def analyze_paper(request: AnalyzeRequest) -> Dict:
+async def analyze_paper(request: AnalyzeRequest, http_request: Request) -> Dict:
     """
     Analyze uploaded paper:
     1. Run Hybrid OCR (Tesseract → Mock fallback)
     2. Extract questions
     3. Use AI for classification (topic, type, marks, question number)
     4. Compute topic frequencies
-    5. Store questions in database
+    5. Store questions in database (skipped in preview mode)
+    
+    Only the pages selected by `pages` / `preview` are rendered and OCR'd.
+    A paper whose contents were analysed before (e.g. a deduplicated upload)
+    is served from the analysis cache without OCR or AI calls.
     
     Returns:
         Analysis results with questions and topic frequencies
     """
     # Find file by file_id
-    file_path = None
-    for file in UPLOAD_DIR.iterdir():
-        if file.is_file() and request.file_id in file.name:
-            file_path = file
-            break
+    file_path = upload_index.resolve(request.file_id)
     
-    if not file_path or not file_path.exists():
+    if not file_path:
         raise HTTPException(
             status_code=404,
             detail=f"File with ID {request.file_id} not found"
         )
     
+    # Clamp the selection to the pages the document really has
+    page_count = await asyncio.to_thread(upload_index.page_count, request.file_id)
+    try:
+        selected_pages = select_pages(request.pages, request.preview, page_count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    preview = request.preview is not None
+    
+    # OCR output of large documents stays in spools on disk, not in memory
+    ocr_pages = None
+    stripped_pages = None
+    
     try:
         # Step 1: Run OCR
         # Convert to absolute path to avoid path issues
         absolute_path = str(file_path.resolve())
-        file_size = os.path.getsize(absolute_path)
+        # Size from the index: the raw file may have been evicted (its OCR is cached)
+        file_size = upload_index.get(request.file_id)["size"]
         
         analysis_logger.info(f"[ANALYZE] Starting analysis for file_id: {request.file_id}")
         analysis_logger.info(f"[ANALYZE] File: {file_path.name}, Size: {file_size:,} bytes")
         
+        if selected_pages is not None:
+            analysis_logger.info(f"[ANALYZE] {'Preview of' if preview else 'Analyzing'} {len(selected_pages)} selected page(s)")
+        
+        # Same contents analysed before: replay the stored result
+        record = upload_index.get(request.file_id)
+        cache_key = None
+        if ANALYSIS_CACHE_ENABLED and record:
+            cache_key = analysis_key(record["sha256"], selected_pages, ai_client.model_name)
+            cached = analysis_cache.get(cache_key)
+            if cached:
+                analysis_logger.info(f"[ANALYZE] ✓ Analysis cache hit: reusing {cached['total_questions']} classified question(s)")
+                if not preview:
+                    for classified_q in cached["questions"]:
+                        db.insert_question(classified_q)
+                return {**cached, "file_id": request.file_id, "preview": preview, "cached": True}
+        
         analysis_logger.info(f"[ANALYZE] Step 1: Running OCR...")
-        ocr_text = run_best_ocr(absolute_path)
+        control = OCRJobControl()
+        with storage_manager.pin(absolute_path):
+            # Reuse a background OCR of this upload if one is under way
+            await ocr_prewarmer.claim(absolute_path)
+            ocr_pages = await run_best_ocr_spool_async(
+                absolute_path,
+                control=control,
+                is_disconnected=http_request.is_disconnected,
+                pages=selected_pages
+            )
+        
+        if control.cancelled:
+            analysis_logger.info(f"[ANALYZE] OCR cancelled for file_id: {request.file_id} ({control.cancel_reason})")
+            raise HTTPException(status_code=499, detail="Analysis cancelled")
+        
+        timed_out_pages = [page_num + 1 for page_num in control.timed_out_pages]
+        if timed_out_pages:
+            analysis_logger.warning(f"[ANALYZE] OCR ran out of time on page(s): {timed_out_pages}")
+        
+        # Strip running headers/footers once for the whole document
+        stripped_pages = PageSpool()
+        _, header_footer = strip_headers_footers(ocr_pages, out=stripped_pages)
+        if header_footer["lines"]:
+            analysis_logger.info(f"[ANALYZE] Removed {header_footer['lines']} repeated header/footer line(s)")
         
-        if not ocr_text:
+        ocr_chars = stripped_pages.char_count
+        
+        if not ocr_chars and not file_path.exists():
+            analysis_logger.error(f"[ANALYZE] File {request.file_id} was evicted and its OCR result is no longer cached")
+            raise HTTPException(
+                status_code=410,
+                detail="The uploaded file was removed to free up storage. Please upload it again."
+            )
+        
+        if not ocr_chars:
             analysis_logger.error(f"[ANALYZE] OCR failed for file_id: {request.file_id}")
+            detail = "OCR failed to extract text from file"
+            if timed_out_pages:
+                detail += f" (ran out of time on page(s) {', '.join(map(str, timed_out_pages))})"
             raise HTTPException(
                 status_code=500,
-                detail="OCR failed to extract text from file"
+                detail=detail
             )
         
-        analysis_logger.info(f"[ANALYZE] OCR successful: {len(ocr_text):,} characters extracted")
+        analysis_logger.info(f"[ANALYZE] OCR successful: {ocr_chars:,} characters extracted")
         
-        # Step 2: Extract questions
+        # Step 2: Extract questions from question pages only (no answer keys,
+        # formula sheets or blank pages)
         analysis_logger.info(f"[ANALYZE] Step 2: Extracting questions...")
-        raw_questions = extract_questions(ocr_text)
+        question_pages, page_filter = filter_question_pages(stripped_pages)
+        if page_filter["skipped_pages"]:
+            analysis_logger.info(
+                f"[ANALYZE] Skipped {len(page_filter['skipped_pages'])} non-question page(s) {page_filter['skipped']}, "
+                f"~{page_filter['ai_calls_saved']} AI call(s) saved"
+            )
+        remove_watermarks = not header_footer["applied"]
+        raw_questions = extract_questions(
+            PAGE_SEPARATOR.join(page.text for page in question_pages),
+            blocks=blocks_from_pages(question_pages, remove_watermarks),
+            remove_watermarks=remove_watermarks
+        )
         
         if not raw_questions:
             raise HTTPException(
@@ -93,6 +175,7 @@ async def analyze_paper(request: AnalyzeRequest) -> Dict:
         # Step 3: Classify questions using AI
         analysis_logger.info(f"[ANALYZE] Step 3: Classifying {len(raw_questions)} questions with AI...")
         classified_questions = []
+        ai_failures = 0
         
         for raw_q in raw_questions:
             # Prepare prompt for AI classification
@@ -131,6 +214,7 @@ Question text:
             # Check for other errors
             if "error" in ai_response:
                 analysis_logger.warning(f"[ANALYZE] AI classification failed for Q{raw_q.get('question_number')}: {ai_response.get('error_message', 'Unknown error')}")
+                ai_failures += 1
                 # Use defaults if AI fails
                 marks_value = raw_q.get('marks')
                 if marks_value is None:
@@ -171,8 +255,9 @@ Question text:
             
             classified_questions.append(classified_q)
             
-            # Store in database
-            db.insert_question(classified_q)
+            # Store in database (previews are not persisted)
+            if not preview:
+                db.insert_question(classified_q)
         
         # Step 4: Compute topic frequencies
         topics = [q['topic'] for q in classified_questions if q['topic'] != "Unknown"]
@@ -194,19 +279,41 @@ Question text:
         analysis_logger.info(f"[ANALYZE] ✓ Analysis complete: {total_questions} questions, {len(topic_frequencies)} topics")
         analysis_logger.info(f"[ANALYZE] Top topics: {', '.join([t['topic'] for t in topic_frequencies[:3]])}")
         
-        return {
+        result = {
             "message": "Analysis completed successfully",
             "file_id": request.file_id,
             "total_questions": total_questions,
             "questions": classified_questions,
-            "topic_frequencies": topic_frequencies
+            "topic_frequencies": topic_frequencies,
+            "ocr_pages": summarize_pages(ocr_pages),
+            "timed_out_pages": timed_out_pages,
+            "selected_pages": [page_num + 1 for page_num in selected_pages] if selected_pages is not None else None,
+            "preview": preview,
+            "page_filter": page_filter,
+            "cached": False
         }
         
+        # Only complete results are reused; a retry may classify what failed this time
+        if cache_key and not ai_failures and not timed_out_pages:
+            analysis_cache.put(cache_key, result)
+        
+        return result
+    
     except HTTPException:
         raise
+    except OCRQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="OCR service is busy, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Analysis failed: {str(e)}"
         )
+    finally:
+        for spool in (ocr_pages, stripped_pages):
+            if spool is not None:
+                spool.close()
 
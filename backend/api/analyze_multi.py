@@ -3,17 +3,22 @@ Multi-file analysis endpoint
 Processes multiple uploaded files through OCR and question extraction with improved multi-file context.
 """
 
-import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 from collections import Counter
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import asyncio
 import logging
 
-from core.ocr import run_best_ocr
-from core.question_extractor import extract_questions_with_context
+from core.ocr import run_best_ocr_pages_async, select_pages, PAGE_SEPARATOR, OCRQueueFullError
+from core.question_extractor import extract_questions_with_context, blocks_from_pages
+from core.header_footer import strip_headers_footers
+from core.page_classifier import filter_question_pages
+from core.upload_index import upload_index
+from core.ocr_prewarm import ocr_prewarmer
+from core.storage import storage_manager
 from core.ai_client import ai_client
 from utils.database import db
 from utils.logger import analysis_logger
@@ -25,13 +30,12 @@ logger = logging.getLogger("ExamPulse.AnalyzeMulti")
 
 router = APIRouter()
 
-# Upload directory (configurable via .env, defaults to ./uploads)
-UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
-
 
 class MultiAnalyzeRequest(BaseModel):
     """Request model for multi-file analysis"""
     file_ids: List[str]
+    pages: Optional[str] = None  # Page ranges analyzed in every file, e.g. "1-3,7" (1-based); None = all pages
+    preview: Optional[int] = None  # Quick look: only the first N (selected) pages of each file, nothing stored
 
 
 def find_file_by_id(file_id: str) -> Path:
@@ -47,13 +51,9 @@ def find_file_by_id(file_id: str) -> Path:
     Raises:
         HTTPException: If file not found
     """
-    file_path = None
-    for file in UPLOAD_DIR.iterdir():
-        if file_id in file.name:
-            file_path = file
-            break
+    file_path = upload_index.resolve(file_id)
     
-    if not file_path or not file_path.exists():
+    if not file_path:
         raise HTTPException(
             status_code=404,
             detail=f"File with ID {file_id} not found"
@@ -175,9 +175,11 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
     2. Extract questions from combined text with context awareness
     3. Detect duplicate questions across files
     4. Classify using AI
-    5. Store in database
+    5. Store in database (skipped in preview mode)
     6. Compute combined topic frequencies
     
+    Only the pages selected by `pages` / `preview` are rendered and OCR'd.
+    
     Returns:
         Combined analysis results with all questions and topic frequencies
     """
@@ -187,6 +189,13 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
             detail="No file IDs provided"
         )
     
+    # Validate the selection up front; it is clamped to each file's page count below
+    try:
+        select_pages(request.pages, request.preview)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    preview = request.preview is not None
+    
     analysis_logger.info(f"[MULTI-ANALYZE] Starting multi-file analysis for {len(request.file_ids)} file(s)")
     logger.info(f"Starting multi-file analysis for {len(request.file_ids)} file(s)")
     
@@ -194,8 +203,17 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
     analysis_logger.info(f"[MULTI-ANALYZE] Step 1: Combining OCR from {len(request.file_ids)} file(s)...")
     
     all_ocr_texts = []
+    all_pages = []
+    # Whether every file was long enough to strip its headers/footers by frequency
+    all_headers_stripped = True
+    # Pages skipped before extraction (answer keys, formula sheets, blanks), per file
+    page_filters = {}
     processed_file_ids = []
     failed_file_ids = []
+    # Pages actually analyzed, across files (None = whole documents)
+    all_selected_pages = None
+    # Files that have none of the selected pages
+    missing_pages_file_ids = []
     
     # Run OCR on each file and collect texts
     for file_id in request.file_ids:
@@ -203,31 +221,69 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
             # Find file by file_id
             file_path = find_file_by_id(file_id)
             absolute_path = str(file_path.resolve())
-            file_size = os.path.getsize(absolute_path)
+            file_size = upload_index.get(file_id)["size"]
             
             analysis_logger.info(f"[MULTI-ANALYZE] Running OCR on file_id: {file_id}")
             analysis_logger.info(f"[MULTI-ANALYZE] File: {file_path.name}, Size: {file_size:,} bytes")
             
+            page_count = await asyncio.to_thread(upload_index.page_count, file_id)
+            try:
+                selected_pages = select_pages(request.pages, request.preview, page_count)
+            except ValueError as e:
+                analysis_logger.warning(f"[MULTI-ANALYZE] Skipping file_id {file_id}: {e}")
+                missing_pages_file_ids.append(file_id)
+                failed_file_ids.append(file_id)
+                continue
+            if selected_pages is not None:
+                all_selected_pages = sorted(set(all_selected_pages or []) | set(selected_pages))
+            
             # Run OCR
-            ocr_text = run_best_ocr(absolute_path)
+            with storage_manager.pin(absolute_path):
+                await ocr_prewarmer.claim(absolute_path)
+                ocr_pages = await run_best_ocr_pages_async(absolute_path, pages=selected_pages)
+            ocr_pages, header_footer = strip_headers_footers(ocr_pages)
+            all_headers_stripped = all_headers_stripped and header_footer["applied"]
+            ocr_text = PAGE_SEPARATOR.join(page.text for page in ocr_pages)
             
             if not ocr_text:
                 analysis_logger.warning(f"[MULTI-ANALYZE] OCR failed for file_id: {file_id}")
                 failed_file_ids.append(file_id)
                 continue
             
+            # Only question pages go on to extraction and AI classification
+            question_pages, page_filters[file_id] = filter_question_pages(ocr_pages)
+            if page_filters[file_id]["skipped_pages"]:
+                analysis_logger.info(
+                    f"[MULTI-ANALYZE] Skipped {len(page_filters[file_id]['skipped_pages'])} non-question page(s) "
+                    f"in {file_path.name} {page_filters[file_id]['skipped']}"
+                )
+            ocr_text = PAGE_SEPARATOR.join(page.text for page in question_pages)
+            
             all_ocr_texts.append(ocr_text)
+            all_pages.extend(question_pages)
             processed_file_ids.append(file_id)
             analysis_logger.info(f"[MULTI-ANALYZE] ✓ OCR extracted {len(ocr_text):,} characters from {file_path.name}")
             
         except HTTPException:
             raise
+        except OCRQueueFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="OCR service is busy, please try again shortly",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         except Exception as e:
             logger.error(f"Error processing file_id {file_id}: {str(e)}", exc_info=True)
             analysis_logger.error(f"[MULTI-ANALYZE] ✗ Error processing file_id: {file_id} - {str(e)}")
             failed_file_ids.append(file_id)
             continue
     
+    if missing_pages_file_ids and len(missing_pages_file_ids) == len(request.file_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="None of the selected pages exist in any of the files"
+        )
+    
     # Check if we got any OCR text
     if not all_ocr_texts:
         analysis_logger.error(f"[MULTI-ANALYZE] No OCR text extracted from any files")
@@ -246,7 +302,13 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
     
     # Step 3: Extract questions with multi-file context
     analysis_logger.info(f"[MULTI-ANALYZE] Step 3: Extracting questions with multi-file context...")
-    raw_questions = extract_questions_with_context(combined_ocr, global_context=all_ocr_texts)
+    remove_watermarks = not all_headers_stripped
+    raw_questions = extract_questions_with_context(
+        combined_ocr,
+        global_context=all_ocr_texts,
+        blocks=blocks_from_pages(all_pages, remove_watermarks),
+        remove_watermarks=remove_watermarks
+    )
     
     questions_before_dedup = len(raw_questions)
     analysis_logger.info(f"[MULTI-ANALYZE] Extracted {questions_before_dedup} questions before deduplication")
@@ -278,15 +340,17 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
     
     all_questions = []
     
-    # Add first question
+    # Add first question (previews are not persisted)
     all_questions.append(test_classification)
-    db.insert_question(test_classification)
+    if not preview:
+        db.insert_question(test_classification)
     
     # Process remaining questions
     for raw_q in raw_questions[1:]:
         classified_q = classify_question(raw_q)
         all_questions.append(classified_q)
-        db.insert_question(classified_q)
+        if not preview:
+            db.insert_question(classified_q)
     
     questions_after_dedup = len(all_questions)
     analysis_logger.info(f"[MULTI-ANALYZE] Questions after deduplication: {questions_after_dedup}")
@@ -312,6 +376,11 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
     analysis_logger.info(f"[MULTI-ANALYZE] Top topics: {', '.join([t['topic'] for t in topic_frequencies[:3]])}")
     analysis_logger.info(f"[MULTI-ANALYZE] Summary: {questions_before_dedup} questions extracted, {questions_after_dedup} after deduplication")
     
+    pages_skipped = sum(len(stats["skipped_pages"]) for stats in page_filters.values())
+    ai_calls_saved = sum(stats["ai_calls_saved"] for stats in page_filters.values())
+    if pages_skipped:
+        analysis_logger.info(f"[MULTI-ANALYZE] Page filter: {pages_skipped} page(s) skipped, ~{ai_calls_saved} AI call(s) saved")
+    
     return {
         "message": "Multi-file analysis complete",
         "file_ids": request.file_ids,
@@ -321,5 +390,10 @@ async def analyze_multiple(request: MultiAnalyzeRequest) -> Dict:
         "questions": all_questions,
         "topic_frequencies": topic_frequencies,
         "combined_ocr_length": total_ocr_length,
-        "questions_before_dedup": questions_before_dedup
+        "questions_before_dedup": questions_before_dedup,
+        "selected_pages": [page_num + 1 for page_num in all_selected_pages] if all_selected_pages is not None else None,
+        "preview": preview,
+        "page_filter": page_filters,
+        "pages_skipped": pages_skipped,
+        "ai_calls_saved": ai_calls_saved
     }
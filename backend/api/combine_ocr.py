@@ -4,7 +4,6 @@ Runs OCR on multiple files and returns combined raw text.
 Used for advanced multi-file analysis.
 """
 
-import os
 from pathlib import Path
 from typing import Dict, List
 from fastapi import APIRouter, HTTPException
@@ -12,7 +11,11 @@ from pydantic import BaseModel
 from dotenv import load_dotenv
 import logging
 
-from core.ocr import run_best_ocr
+from core.ocr import run_best_ocr_pages_async, summarize_pages, PAGE_SEPARATOR, OCRQueueFullError
+from core.text_spool import TextSpool
+from core.upload_index import upload_index
+from core.ocr_prewarm import ocr_prewarmer
+from core.storage import storage_manager
 from utils.logger import analysis_logger
 
 load_dotenv()
@@ -22,9 +25,6 @@ logger = logging.getLogger("ExamPulse.CombineOCR")
 
 router = APIRouter()
 
-# Upload directory (configurable via .env, defaults to ./uploads)
-UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
-
 
 class CombineOCRRequest(BaseModel):
     """Request model for combining OCR from multiple files"""
@@ -44,13 +44,9 @@ def find_file_by_id(file_id: str) -> Path:
     Raises:
         HTTPException: If file not found
     """
-    file_path = None
-    for file in UPLOAD_DIR.iterdir():
-        if file_id in file.name:
-            file_path = file
-            break
+    file_path = upload_index.resolve(file_id)
     
-    if not file_path or not file_path.exists():
+    if not file_path:
         raise HTTPException(
             status_code=404,
             detail=f"File with ID {file_id} not found"
@@ -65,7 +61,7 @@ async def combine_ocr(request: CombineOCRRequest) -> Dict:
     Combine OCR text from multiple files.
     
     Steps:
-    1. Run OCR on each file using run_best_ocr()
+    1. Run OCR on each file using run_best_ocr_pages_async()
     2. Combine all OCR text into a single string
     3. Return combined text with metadata
     
@@ -83,62 +79,74 @@ async def combine_ocr(request: CombineOCRRequest) -> Dict:
     
     analysis_logger.info(f"[COMBINE-OCR] Starting OCR combination for {len(request.file_ids)} file(s)")
     
-    combined_text_parts = []
+    # Per-file text spills to disk past OCR_TEXT_SPOOL_MB instead of piling up in memory
+    combined_text_parts = TextSpool()
     processed_files = []
     failed_files = []
     ocr_providers_used = set()
     
-    # Process each file
-    for file_id in request.file_ids:
-        try:
-            # Find file
-            file_path = find_file_by_id(file_id)
-            file_size = os.path.getsize(file_path)
-            
-            analysis_logger.info(f"[COMBINE-OCR] Processing file_id: {file_id}")
-            analysis_logger.info(f"[COMBINE-OCR] File: {file_path.name}, Size: {file_size:,} bytes")
-            
-            # Run OCR
-            ocr_text = run_best_ocr(str(file_path.resolve()))
-            
-            if not ocr_text:
-                analysis_logger.warning(f"[COMBINE-OCR] OCR failed for file_id: {file_id}")
+    try:
+        # Process each file
+        for file_id in request.file_ids:
+            try:
+                # Find file
+                file_path = find_file_by_id(file_id)
+                file_size = upload_index.get(file_id)["size"]
+                
+                analysis_logger.info(f"[COMBINE-OCR] Processing file_id: {file_id}")
+                analysis_logger.info(f"[COMBINE-OCR] File: {file_path.name}, Size: {file_size:,} bytes")
+                
+                # Run OCR
+                absolute_path = str(file_path.resolve())
+                with storage_manager.pin(absolute_path):
+                    await ocr_prewarmer.claim(absolute_path)
+                    ocr_pages = await run_best_ocr_pages_async(absolute_path)
+                ocr_text = PAGE_SEPARATOR.join(page.text for page in ocr_pages)
+                
+                if not ocr_text:
+                    analysis_logger.warning(f"[COMBINE-OCR] OCR failed for file_id: {file_id}")
+                    failed_files.append(file_id)
+                    continue
+                
+                # Track which provider was used (from logs, we can infer)
+                # For now, we'll note that OCR succeeded
+                combined_text_parts.append(f"--- FILE: {file_path.name} ---\n{ocr_text}")
+                processed_files.append({
+                    "file_id": file_id,
+                    "filename": file_path.name,
+                    "ocr_length": len(ocr_text),
+                    "ocr_pages": summarize_pages(ocr_pages)
+                })
+                
+                analysis_logger.info(f"[COMBINE-OCR] ✓ Extracted {len(ocr_text):,} characters from {file_path.name}")
+                
+            except HTTPException:
+                raise
+            except OCRQueueFullError as e:
+                raise HTTPException(
+                    status_code=503,
+                    detail="OCR service is busy, please try again shortly",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            except Exception as e:
+                logger.error(f"Error processing file_id {file_id}: {str(e)}", exc_info=True)
+                analysis_logger.error(f"[COMBINE-OCR] ✗ Error processing file_id: {file_id} - {str(e)}")
                 failed_files.append(file_id)
                 continue
-            
-            # Track which provider was used (from logs, we can infer)
-            # For now, we'll note that OCR succeeded
-            combined_text_parts.append(ocr_text)
-            processed_files.append({
-                "file_id": file_id,
-                "filename": file_path.name,
-                "ocr_length": len(ocr_text)
-            })
-            
-            analysis_logger.info(f"[COMBINE-OCR] ✓ Extracted {len(ocr_text):,} characters from {file_path.name}")
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error processing file_id {file_id}: {str(e)}", exc_info=True)
-            analysis_logger.error(f"[COMBINE-OCR] ✗ Error processing file_id: {file_id} - {str(e)}")
-            failed_files.append(file_id)
-            continue
-    
-    # Check if we got any text
-    if not combined_text_parts:
-        analysis_logger.error(f"[COMBINE-OCR] No OCR text extracted from any files")
-        raise HTTPException(
-            status_code=400,
-            detail="No OCR text extracted from any files"
-        )
-    
-    # Combine all OCR text
-    # Add file separators for clarity
-    combined_text = "\n\n" + "="*80 + "\n\n".join(
-        f"--- FILE: {file_info['filename']} ---\n{text}"
-        for file_info, text in zip(processed_files, combined_text_parts)
-    )
+        
+        # Check if we got any text
+        if not combined_text_parts:
+            analysis_logger.error(f"[COMBINE-OCR] No OCR text extracted from any files")
+            raise HTTPException(
+                status_code=400,
+                detail="No OCR text extracted from any files"
+            )
+        
+        # Combine all OCR text
+        # Add file separators for clarity
+        combined_text = "\n\n" + "="*80 + combined_text_parts.text("\n\n")
+    finally:
+        combined_text_parts.close()
     
     total_length = len(combined_text)
     analysis_logger.info(f"[COMBINE-OCR] ✓ Combined OCR complete: {total_length:,} total characters from {len(processed_files)} file(s)")
@@ -4,11 +4,28 @@ Health check endpoint
 
 from fastapi import APIRouter
 
+from core.ocr import ocr_executor
+from core.ocr_cache import ocr_cache
+from core.ocr_prewarm import ocr_prewarmer
+from core.storage import storage_manager
+from core.analysis_cache import analysis_cache
+from core.ocr_providers import tesseract_pool
+from core.ocr_providers.page_cache import page_cache
+
 router = APIRouter()
 
 
 @router.get("/")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "ExamPulse API"}
-
+    return {
+        "status": "healthy",
+        "service": "ExamPulse API",
+        "ocr_cache": ocr_cache.stats(),
+        "ocr_page_cache": page_cache.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "ocr_pool": tesseract_pool.stats(),
+        "ocr_queue": ocr_executor.stats(),
+        "ocr_prewarm": ocr_prewarmer.stats(),
+        "upload_storage": storage_manager.stats()
+    }
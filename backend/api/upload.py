@@ -5,12 +5,20 @@ Handles PDF and image uploads for past exam papers.
 
 import os
 import uuid
+import asyncio
+import hashlib
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Dict
+from fastapi import APIRouter, UploadFile, HTTPException, Request
+from pydantic import BaseModel
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 import logging
 
+from core.upload_index import upload_index, count_pages, UPLOAD_STAGING_DIR
+from core.storage import storage_manager
+from core.upload_sessions import upload_sessions, UploadSessionError
+from core.ocr_prewarm import ocr_prewarmer
+
 load_dotenv()
 
 logger = logging.getLogger("ExamPulse.Upload")
@@ -22,46 +30,131 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Allowed file types
 ALLOWED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg'}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
+# Maximum upload size (configurable via .env, defaults to 10MB). Large
+# compilations go through resumable upload sessions (UPLOAD_SESSION_MAX_MB)
+# instead; process them with OCR_MEMORY_BUDGET=true.
+MAX_FILE_SIZE = int(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+# Room for multipart boundaries and part headers on top of the file itself
+# when a request's Content-Length is checked against MAX_FILE_SIZE
+MULTIPART_OVERHEAD = 64 * 1024
+# Bytes copied from the parsed upload to the uploads folder at a time
+# (configurable via .env, defaults to 1MB). Memory per upload stays at one
+# chunk whatever the file size.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
+# Batch uploads (configurable via .env)
+# UPLOAD_BATCH_WORKERS: files of one batch validated and stored at the same time
+# UPLOAD_BATCH_MAX_FILES: most files accepted in one batch request
+# UPLOAD_BATCH_MAX_MB: largest batch request body, checked against Content-Length
+#   before anything is read (defaults to UPLOAD_BATCH_MAX_FILES full-size files)
+UPLOAD_BATCH_WORKERS = int(os.getenv("UPLOAD_BATCH_WORKERS", "4"))
+UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "20"))
+UPLOAD_BATCH_MAX_BYTES = int(os.getenv("UPLOAD_BATCH_MAX_MB", "0")) * 1024 * 1024 or UPLOAD_BATCH_MAX_FILES * MAX_FILE_SIZE
+
+# Leading bytes of each allowed file type, checked against the extension.
+# PDF readers accept junk before the "%PDF-" header, so it may appear anywhere
+# in the first PDF_HEADER_WINDOW bytes.
+MAGIC_BYTES = {
+    '.pdf': b'%PDF-',
+    '.png': b'\x89PNG\r\n\x1a\n',
+    '.jpg': b'\xff\xd8\xff',
+    '.jpeg': b'\xff\xd8\xff',
+}
+PDF_HEADER_WINDOW = 1024
+
 
+def _matches_magic(file_ext: str, head: bytes) -> bool:
+    """True if the first bytes of a file match its extension."""
+    if file_ext == '.pdf':
+        return MAGIC_BYTES[file_ext] in head[:PDF_HEADER_WINDOW]
+    return head.startswith(MAGIC_BYTES[file_ext])
 
-@router.post("/")
-async def upload_file(file: UploadFile = File(...)) -> Dict:
+
+def check_content_length(request: Request, max_bytes: int) -> int:
     """
-    Upload a past exam paper (PDF or image).
+    Refuse an upload request by its Content-Length, before the body is read.
+    
+    Starlette's multipart parser spools the whole body to temporary files
+    before a route sees any of it, so this is the only point where an
+    oversized upload can be stopped early.
     
-    Validates file type and size, saves to uploads folder,
-    and returns file metadata with unique file ID.
+    Args:
+        request: Incoming multipart request
+        max_bytes: Largest body accepted
     
     Returns:
-        Upload confirmation with file metadata including file_id
+        The declared body size
+    
+    Raises:
+        HTTPException: 411 without a Content-Length, 413 if it is over max_bytes
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is None or not content_length.isdigit():
+        raise HTTPException(
+            status_code=411,
+            detail="Content-Length is required for uploads"
+        )
+    if int(content_length) > max_bytes:
+        logger.warning(f"Upload request of {int(content_length):,} bytes refused (limit {max_bytes:,})")
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request too large. Maximum size: {max_bytes / (1024*1024):.0f}MB"
+        )
+    return int(content_length)
+
+
+async def save_upload(file: UploadFile, file_ext: str, file_path: Path) -> Tuple[int, str]:
     """
+    Copy a parsed upload to disk in UPLOAD_CHUNK_SIZE chunks.
+    
+    The file has already been spooled by the multipart parser; requests
+    too large for it were refused up front by check_content_length(). The
+    size limit is checked again on the file itself while copying, the
+    SHA-256 hash is computed on the fly and the first chunk's magic bytes
+    must match the extension.
+    Data is written to a ".part" file that is renamed into place only once
+    the whole upload has been accepted, so a rejected or broken upload never
+    leaves a half-written file behind.
+    
+    Args:
+        file: Upload to save
+        file_ext: Lowercased extension (one of ALLOWED_EXTENSIONS)
+        file_path: Final location of the file
+    
+    Returns:
+        Tuple of (file size in bytes, SHA-256 hex digest)
+    
+    Raises:
+        HTTPException: 400 if the file is empty, too large or not really of its type
+    """
+    digest = hashlib.sha256()
+    file_size = 0
+    part_path = file_path.with_name(file_path.name + ".part")
+    
     try:
-        logger.info(f"Received upload request for file: {file.filename}")
-        
-        # Validate file extension
-        file_ext = Path(file.filename).suffix.lower() if file.filename else ""
-        
-        if file_ext not in ALLOWED_EXTENSIONS:
-            logger.warning(f"Invalid file type: {file_ext}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Allowed types: PDF, PNG, JPG, JPEG"
-            )
-        
-        # Read file content to check size
-        logger.info("Reading file content...")
-        content = await file.read()
-        file_size = len(content)
-        logger.info(f"File size: {file_size:,} bytes")
-        
-        # Validate file size
-        if file_size > MAX_FILE_SIZE:
-            logger.warning(f"File too large: {file_size:,} bytes")
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB"
-            )
+        with open(part_path, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                
+                if file_size == 0 and not _matches_magic(file_ext, chunk):
+                    logger.warning(f"Content of {file.filename} does not match its extension {file_ext}")
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File content is not a valid {file_ext[1:].upper()} file"
+                    )
+                
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    logger.warning(f"File too large: more than {MAX_FILE_SIZE:,} bytes, aborting upload")
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024):.0f}MB"
+                    )
+                
+                digest.update(chunk)
+                # Write off the event loop so concurrent uploads keep streaming
+                await asyncio.to_thread(f.write, chunk)
         
         if file_size == 0:
             logger.warning("Empty file received")
@@ -70,39 +163,188 @@ async def upload_file(file: UploadFile = File(...)) -> Dict:
                 detail="File is empty"
             )
         
-        # Generate unique file ID
-        file_id = str(uuid.uuid4())
-        
-        # Create filename with file_id to avoid conflicts
-        original_filename = file.filename or "uploaded_file"
-        safe_filename = f"{file_id}_{original_filename}"
-        file_path = UPLOAD_DIR / safe_filename
-        
-        logger.info(f"Saving file to: {file_path}")
-        
-        # Save file
-        try:
-            with open(file_path, "wb") as f:
-                f.write(content)
-            logger.info(f"File saved successfully: {file_path}")
-        except Exception as e:
-            logger.error(f"Failed to save file: {str(e)}", exc_info=True)
+        os.replace(part_path, file_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    
+    return file_size, digest.hexdigest()
+
+
+async def register_upload(
+    file_id: str,
+    original_filename: str,
+    file_path: Path,
+    file_ext: str,
+    file_size: int,
+    content_hash: str,
+    content_type: Optional[str]
+) -> Dict:
+    """
+    Store a fully received, validated upload and record it in the index.
+    
+    Shared by single, batch and resumable uploads. A file byte-identical to
+    an earlier upload is not stored again: the earlier file_id is returned.
+    
+    Args:
+        file_id: File ID generated for this upload
+        original_filename: Filename given by the client
+        file_path: Received file in UPLOAD_STAGING_DIR
+        file_ext: Lowercased extension
+        file_size: Size in bytes
+        content_hash: SHA-256 hex digest
+        content_type: MIME type given by the client
+    
+    Returns:
+        File metadata including file_id and SHA-256 content hash
+    """
+    page_count = await asyncio.to_thread(count_pages, str(file_path))
+    
+    # Byte-identical to an earlier upload: keep the stored copy and its
+    # file_id, so its cached OCR text and analysis are reused. No await
+    # between the lookup and add(), so two copies in one batch cannot both
+    # be stored.
+    duplicate = upload_index.find_by_hash(content_hash, include_evicted=True)
+    if duplicate and duplicate["evicted_at"] is not None:
+        # Its raw file was evicted: store this copy in its place
+        Path(duplicate["path"]).parent.mkdir(parents=True, exist_ok=True)
+        os.replace(file_path, duplicate["path"])
+        upload_index.restore(duplicate["file_id"])
+        logger.info(f"Duplicate of evicted {duplicate['file_id']} ({duplicate['filename']}), restored stored file")
+        record = duplicate
+    elif duplicate:
+        file_path.unlink(missing_ok=True)
+        logger.info(f"Duplicate of {duplicate['file_id']} ({duplicate['filename']}), reusing stored file")
+        record = duplicate
+    else:
+        file_path = storage_manager.place(file_path, content_hash)
+        record = upload_index.add(file_id, original_filename, file_path, content_hash, file_size, page_count)
+        # Start OCR now so analysis finds it in the OCR cache (no-op unless OCR_PREWARM_ENABLED)
+        ocr_prewarmer.submit(record["file_id"], record["path"])
+    
+    response_data = {
+        "message": "File uploaded successfully",
+        "file_id": record["file_id"],
+        "filename": original_filename,
+        "file_path": record["path"],
+        "file_size": file_size,
+        "sha256": content_hash,
+        "page_count": record["page_count"],
+        "content_type": content_type,
+        "file_type": file_ext[1:] if file_ext else "unknown",  # Remove the dot
+        "duplicate": bool(duplicate),
+        "ocr_prewarm": ocr_prewarmer.status(record["path"])
+    }
+    
+    return response_data
+
+
+async def store_upload(file: UploadFile) -> Dict:
+    """
+    Validate, copy and record one uploaded file.
+    
+    Copies the parsed file to the uploads folder in chunks, validating size
+    and file type (by magic bytes) as it goes. A file byte-identical to an
+    earlier upload is not stored again: the earlier file_id is returned, so
+    its cached OCR text and analysis are reused.
+    
+    Args:
+        file: Uploaded file
+    
+    Returns:
+        File metadata including file_id and SHA-256 content hash
+    
+    Raises:
+        HTTPException: 400 for an invalid file, 500 if it cannot be saved
+    """
+    logger.info(f"Received upload request for file: {file.filename}")
+    
+    # Validate file extension
+    file_ext = Path(file.filename).suffix.lower() if file.filename else ""
+    
+    if file_ext not in ALLOWED_EXTENSIONS:
+        logger.warning(f"Invalid file type: {file_ext}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: PDF, PNG, JPG, JPEG"
+        )
+    
+    # Refuse uploads once the storage quota is used up and nothing can be evicted
+    if not await asyncio.to_thread(storage_manager.has_room):
+        logger.warning("Upload storage quota exhausted")
+        raise HTTPException(
+            status_code=507,
+            detail="Upload storage is full, please try again later"
+        )
+    
+    # Generate unique file ID
+    file_id = str(uuid.uuid4())
+    
+    # Create filename with file_id to avoid conflicts; it is streamed into the
+    # staging directory and moved to its hash shard once the hash is known
+    original_filename = file.filename or "uploaded_file"
+    safe_filename = f"{file_id}_{original_filename}"
+    file_path = UPLOAD_STAGING_DIR / safe_filename
+    
+    logger.info(f"Streaming file to: {file_path}")
+    
+    # Save file (size, type and hash are checked while streaming)
+    try:
+        file_size, content_hash = await save_upload(file, file_ext, file_path)
+        logger.info(f"File saved successfully: {file_path} ({file_size:,} bytes, sha256 {content_hash[:12]})")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to save file: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save file: {str(e)}"
+        )
+    
+    return await register_upload(file_id, original_filename, file_path, file_ext, file_size, content_hash, file.content_type)
+
+
+# The upload routes parse their forms themselves, so the schemas are declared here
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"]
+            }
+        }
+    }
+}
+
+
+@router.post("/", openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_file(request: Request) -> Dict:
+    """
+    Upload a past exam paper (PDF or image) in the multipart field "file".
+    
+    The body is refused from its Content-Length before anything is read
+    (411 without one, 413 over MAX_UPLOAD_MB plus multipart overhead); the
+    multipart parser then spools it, and store_upload() validates file
+    type and size while copying it to the uploads folder. Returns file
+    metadata with a unique file ID.
+    
+    Returns:
+        Upload confirmation with file metadata including file_id
+    """
+    check_content_length(request, MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    form = await request.form(max_files=1, max_fields=1)
+    try:
+        file = form.get("file")
+        if file is None or isinstance(file, str):
             raise HTTPException(
-                status_code=500,
-                detail=f"Failed to save file: {str(e)}"
+                status_code=400,
+                detail="No file in the \"file\" field"
             )
         
-        response_data = {
-            "message": "File uploaded successfully",
-            "file_id": file_id,
-            "filename": original_filename,
-            "file_path": str(file_path),
-            "file_size": file_size,
-            "content_type": file.content_type,
-            "file_type": file_ext[1:] if file_ext else "unknown"  # Remove the dot
-        }
-        
-        logger.info(f"Upload successful: {file_id}")
+        response_data = await store_upload(file)
+        logger.info(f"Upload successful: {response_data['file_id']}")
         return response_data
         
     except HTTPException:
@@ -114,4 +356,234 @@ async def upload_file(file: UploadFile = File(...)) -> Dict:
             status_code=500,
             detail=f"Upload failed: {str(e)}"
         )
+    finally:
+        await form.close()
+
+
+BATCH_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                "required": ["files"]
+            }
+        }
+    }
+}
+
+
+@router.post("/batch", openapi_extra={"requestBody": BATCH_REQUEST_BODY})
+async def upload_batch(request: Request) -> Dict:
+    """
+    Upload several past exam papers in one multipart request (field "files").
+    
+    The multipart parser spools the whole request body to temporary files
+    before any file is processed, so the body size is checked against
+    UPLOAD_BATCH_MAX_MB from its Content-Length before anything is read:
+    411 without one, 413 when it is larger. Files bigger than that belong
+    in separate requests or resumable upload sessions.
+    
+    Spooled files are then validated and stored concurrently, at most
+    UPLOAD_BATCH_WORKERS at a time, and recorded exactly like single
+    uploads. A file that fails validation is reported in its own entry and
+    does not stop the others.
+    
+    Returns:
+        Per-file results in request order (status "uploaded" with the same
+        metadata as POST /upload/, or "failed" with status_code and detail)
+        and uploaded/failed counts
+    """
+    content_length = check_content_length(request, UPLOAD_BATCH_MAX_BYTES)
+    
+    # Starlette answers 400 itself once the form holds more than max_files files
+    form = await request.form(max_files=UPLOAD_BATCH_MAX_FILES, max_fields=UPLOAD_BATCH_MAX_FILES)
+    try:
+        files = [file for file in form.getlist("files") if not isinstance(file, str)]
+        if not files:
+            raise HTTPException(
+                status_code=400,
+                detail="No files in the \"files\" field"
+            )
+        
+        logger.info(f"Received batch upload of {len(files)} file(s), {content_length:,} bytes")
+        semaphore = asyncio.Semaphore(UPLOAD_BATCH_WORKERS)
+        
+        async def upload_one(file: UploadFile) -> Dict:
+            async with semaphore:
+                try:
+                    return {"status": "uploaded", **await store_upload(file)}
+                except HTTPException as e:
+                    return {"status": "failed", "filename": file.filename, "status_code": e.status_code, "detail": e.detail}
+                except Exception as e:
+                    logger.error(f"Unexpected error uploading {file.filename}: {str(e)}", exc_info=True)
+                    return {"status": "failed", "filename": file.filename, "status_code": 500, "detail": f"Upload failed: {str(e)}"}
+        
+        results = await asyncio.gather(*(upload_one(file) for file in files))
+    finally:
+        await form.close()
+    
+    uploaded = sum(1 for result in results if result["status"] == "uploaded")
+    
+    logger.info(f"Batch upload finished: {uploaded} uploaded, {len(results) - uploaded} failed")
+    return {
+        "message": f"{uploaded} of {len(results)} file(s) uploaded",
+        "uploaded": uploaded,
+        "failed": len(results) - uploaded,
+        "files": results
+    }
+
+
+class UploadSessionRequest(BaseModel):
+    """Request model for starting a resumable upload"""
+    filename: str
+    size: int  # Total size in bytes
+    sha256: str  # Hex digest of the whole file, verified on finalize
+    content_type: Optional[str] = None
+
+
+@router.post("/sessions")
+async def create_upload_session(request: UploadSessionRequest) -> Dict:
+    """
+    Start a resumable upload for files too large or connections too flaky
+    for a single POST /upload/.
+    
+    Send the file with PUT /upload/sessions/{session_id}?offset=N (chunk
+    bytes as the request body, in order), check progress with GET, then
+    POST /upload/sessions/{session_id}/finalize.
+    
+    Returns:
+        Session with session_id, offset (0) and suggested chunk_size
+    """
+    file_ext = Path(request.filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        logger.warning(f"Invalid file type: {file_ext}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: PDF, PNG, JPG, JPEG"
+        )
+    
+    # The session reserves its full size against the quota until it ends
+    if not await asyncio.to_thread(storage_manager.has_room, request.size):
+        logger.warning("Upload storage quota exhausted")
+        raise HTTPException(
+            status_code=507,
+            detail="Upload storage is full, please try again later"
+        )
+    
+    try:
+        return upload_sessions.create(request.filename, request.size, request.sha256, request.content_type)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+async def _check_session_room(session_id: str) -> None:
+    """
+    Re-check a session against the quota, leaving out its own reservation.
+    
+    Raises:
+        UploadSessionError: 404 if the session does not exist
+        HTTPException: 507 if the session no longer fits
+    """
+    session = upload_sessions.get(session_id)
+    if not await asyncio.to_thread(storage_manager.has_room, session["size"], session_id):
+        logger.warning(f"Upload storage quota exhausted during session {session_id}")
+        raise HTTPException(
+            status_code=507,
+            detail="Upload storage is full, please try again later"
+        )
+
+
+@router.get("/sessions/{session_id}")
+async def get_upload_session(session_id: str) -> Dict:
+    """
+    Get a resumable upload's progress.
+    
+    Returns:
+        Session including offset (bytes received), where the next chunk starts
+    """
+    try:
+        return upload_sessions.get(session_id)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.put("/sessions/{session_id}")
+async def put_upload_chunk(session_id: str, offset: int, request: Request) -> Dict:
+    """
+    Append a chunk to a resumable upload.
+    
+    The request body is streamed straight into the session's file. `offset`
+    must equal the bytes received so far (409 otherwise, with the expected
+    offset in the detail); after a dropped connection, GET the session and
+    continue from its offset. The quota is re-checked for every chunk (507
+    if the session no longer fits).
+    
+    Returns:
+        Session with the new offset
+    """
+    try:
+        await _check_session_room(session_id)
+        return await upload_sessions.append(session_id, offset, request.stream())
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.post("/sessions/{session_id}/finalize")
+async def finalize_upload_session(session_id: str) -> Dict:
+    """
+    Complete a resumable upload.
+    
+    Checks that the file still fits under the quota, that every byte
+    arrived, that the content matches the declared SHA-256 and that the file
+    really is of its type, then stores it like any other upload.
+    
+    Returns:
+        Same metadata as POST /upload/, including a file_id usable by every
+        analysis endpoint
+    """
+    try:
+        await _check_session_room(session_id)
+        session, staged_path = await asyncio.to_thread(upload_sessions.finalize, session_id)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    file_ext = Path(session["filename"]).suffix.lower()
+    with open(staged_path, "rb") as f:
+        head = f.read(PDF_HEADER_WINDOW)
+    if not _matches_magic(file_ext, head):
+        staged_path.unlink(missing_ok=True)
+        logger.warning(f"Content of {session['filename']} does not match its extension {file_ext}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"File content is not a valid {file_ext[1:].upper()} file"
+        )
+    
+    try:
+        response_data = await register_upload(
+            session["file_id"],
+            session["filename"],
+            staged_path,
+            file_ext,
+            session["size"],
+            session["sha256"],
+            session["content_type"]
+        )
+    except Exception as e:
+        staged_path.unlink(missing_ok=True)
+        logger.error(f"Failed to store finalized upload {session_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Upload failed: {str(e)}"
+        )
+    
+    logger.info(f"Resumable upload successful: {response_data['file_id']}")
+    return response_data
+
 
+@router.delete("/sessions/{session_id}")
+async def abort_upload_session(session_id: str) -> Dict:
+    """Abandon a resumable upload and delete the data received so far."""
+    upload_sessions.abort(session_id)
+    return {"message": "Upload session deleted", "session_id": session_id}
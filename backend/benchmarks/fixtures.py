@@ -0,0 +1,245 @@
+"""
+Benchmark Fixtures
+Deterministic synthetic exam-paper images for OCR benchmarks.
+
+Every fixture is generated from a fixed seed, so two runs on different
+machines OCR exactly the same pixels and their results can be compared.
+"""
+
+from typing import List, Tuple, Dict
+from pathlib import Path
+import io
+import random
+import logging
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    import fitz  # PyMuPDF
+    PDF_FIXTURES_AVAILABLE = True
+except ImportError:
+    PDF_FIXTURES_AVAILABLE = False
+
+logger = logging.getLogger("ExamPulse.Benchmarks.Fixtures")
+
+# A4 at 300 DPI
+PAGE_SIZE = (2480, 3508)
+
+# Scanned PDF pages are embedded at 150 DPI, typical of office scanners
+SCAN_SIZE = (1240, 1754)
+
+# Page kinds for PDF fixtures
+PAGE_TEXT = "text"
+PAGE_SCANNED = "scanned"
+
+# Documents built by build_document_fixtures(): name -> page kinds
+DOCUMENT_LAYOUTS: Dict[str, List[str]] = {
+    "text_layer.pdf": [PAGE_TEXT] * 4,
+    "scanned.pdf": [PAGE_SCANNED] * 4,
+    "mixed.pdf": [PAGE_TEXT, PAGE_SCANNED] * 2,
+    "multipage.pdf": [PAGE_SCANNED if index % 3 == 2 else PAGE_TEXT for index in range(24)],
+}
+
+SAMPLE_QUESTIONS = [
+    "1. Define the term osmosis and give one example from plant cells.",
+    "2. Calculate the resistance of a wire carrying 2 A at 12 V.",
+    "3. Explain why the boiling point of water decreases at high altitude.",
+    "4. State two differences between mitosis and meiosis.",
+    "5. A car accelerates uniformly from rest to 20 m/s in 5 s. Find its acceleration.",
+    "6. Describe the role of enzymes in digestion.",
+    "7. Balance the equation for the combustion of methane.",
+    "8. What is meant by the half-life of a radioactive isotope?",
+]
+
+
+def question_lines(seed: int, count: int = 6) -> List[str]:
+    """
+    Pick a deterministic set of question lines.
+    
+    Args:
+        seed: Random seed
+        count: Number of lines
+    
+    Returns:
+        List of question strings
+    """
+    rng = random.Random(seed)
+    return [rng.choice(SAMPLE_QUESTIONS) for _ in range(count)]
+
+
+def render_clean_page(lines: List[str], size: Tuple[int, int] = PAGE_SIZE) -> Image.Image:
+    """
+    Draw black text on a white page.
+    
+    Args:
+        lines: Text lines to draw
+        size: Page size in pixels
+    
+    Returns:
+        Grayscale ("L") image
+    """
+    image = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=size[0] // 45)
+    y = size[1] // 10
+    for line in lines:
+        draw.text((size[0] // 12, y), line, fill=0, font=font)
+        y += size[0] // 18
+    return image
+
+
+def degrade_to_photo(page: Image.Image, seed: int, long_edge: int = 4000) -> Image.Image:
+    """
+    Make a clean page look like a phone photo of it.
+    
+    Upscales past the target DPI, adds an uneven lighting gradient, sensor
+    noise and a dark desk border around the sheet.
+    
+    Args:
+        page: Clean grayscale page
+        seed: Random seed for the noise
+        long_edge: Long edge of the output photo in pixels
+    
+    Returns:
+        RGB image
+    """
+    rng = np.random.default_rng(seed)
+    scale = long_edge / max(page.size)
+    page = page.resize((round(page.width * scale), round(page.height * scale)), Image.BILINEAR)
+    
+    pixels = np.asarray(page, dtype=np.float32)
+    height, width = pixels.shape
+    
+    # Shadow falling across the page from one corner
+    gradient = np.linspace(0.55, 1.0, width, dtype=np.float32)[None, :] * np.linspace(0.75, 1.0, height, dtype=np.float32)[:, None]
+    pixels = pixels * gradient + rng.normal(0, 18, pixels.shape).astype(np.float32)
+    
+    # Desk showing around the sheet
+    border = long_edge // 40
+    pixels[:border, :] = 35
+    pixels[-border:, :] = 35
+    pixels[:, :border] = 35
+    pixels[:, -border:] = 35
+    
+    gray = np.clip(pixels, 0, 255).astype(np.uint8)
+    return Image.fromarray(gray, mode="L").convert("RGB")
+
+
+def build_photo_fixtures(directory: Path, count: int = 4) -> List[Tuple[Path, List[str]]]:
+    """
+    Write noisy phone-photo fixtures (JPEG) to a directory.
+    
+    Existing files are overwritten, so the set is always identical for a given count.
+    
+    Args:
+        directory: Output directory
+        count: Number of fixtures
+    
+    Returns:
+        List of (path, expected text lines)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fixtures = []
+    
+    for index in range(count):
+        lines = question_lines(seed=index)
+        photo = degrade_to_photo(render_clean_page(lines), seed=index)
+        path = directory / f"photo_{index:02d}.jpg"
+        photo.save(path, quality=85)
+        fixtures.append((path, lines))
+    
+    logger.info(f"Wrote {count} photo fixture(s) to {directory}")
+    return fixtures
+
+
+def degrade_to_scan(page: Image.Image, seed: int, size: Tuple[int, int] = SCAN_SIZE) -> Image.Image:
+    """
+    Make a clean page look like a flatbed scan of it: lower resolution and
+    light sensor noise, but no lighting gradient or border.
+    
+    Args:
+        page: Clean grayscale page
+        seed: Random seed for the noise
+        size: Output size in pixels
+    
+    Returns:
+        Grayscale ("L") image
+    """
+    rng = np.random.default_rng(seed)
+    pixels = np.asarray(page.resize(size, Image.BILINEAR), dtype=np.float32)
+    pixels = pixels + rng.normal(0, 8, pixels.shape).astype(np.float32)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), mode="L")
+
+
+def build_pdf(path: Path, kinds: List[str], seed: int = 0) -> Path:
+    """
+    Write a PDF whose pages are either real text or embedded scans.
+    
+    Text pages carry a text layer (PyMuPDF reads them without OCR); scanned
+    pages are a single image with no text, so they have to be OCR'd.
+    
+    Args:
+        path: Output file
+        kinds: PAGE_TEXT / PAGE_SCANNED for each page
+        seed: Base random seed; page i uses seed + i
+    
+    Returns:
+        The path written
+    
+    Raises:
+        RuntimeError: If PyMuPDF is not installed
+    """
+    if not PDF_FIXTURES_AVAILABLE:
+        raise RuntimeError("PyMuPDF is required to build PDF fixtures")
+    
+    doc = fitz.open()
+    try:
+        for index, kind in enumerate(kinds):
+            lines = question_lines(seed=seed + index)
+            page = doc.new_page(width=595, height=842)  # A4 in points
+            if kind == PAGE_SCANNED:
+                buffer = io.BytesIO()
+                degrade_to_scan(render_clean_page(lines), seed=seed + index).save(buffer, format="PNG")
+                page.insert_image(page.rect, stream=buffer.getvalue())
+            else:
+                y = 84
+                for line in lines:
+                    page.insert_text((50, y), line, fontsize=11)
+                    y += 33
+        # Fixed metadata and no compression randomness, so the bytes are stable
+        doc.set_metadata({"producer": "ExamPulse benchmarks", "creationDate": "", "modDate": ""})
+        doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    finally:
+        doc.close()
+    return path
+
+
+def build_document_fixtures(directory: Path, photo_count: int = 2) -> List[Tuple[Path, int]]:
+    """
+    Write the full OCR benchmark fixture set: text-layer, scanned, mixed and
+    multi-page PDFs plus noisy phone photos.
+    
+    Args:
+        directory: Output directory
+        photo_count: Number of photo fixtures
+    
+    Returns:
+        List of (path, page count)
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fixtures = []
+    
+    if PDF_FIXTURES_AVAILABLE:
+        for seed, (name, kinds) in enumerate(DOCUMENT_LAYOUTS.items()):
+            fixtures.append((build_pdf(directory / name, kinds, seed=seed * 100), len(kinds)))
+    else:
+        logger.warning("PyMuPDF not installed, skipping PDF fixtures")
+    
+    for path, _lines in build_photo_fixtures(directory, photo_count):
+        fixtures.append((path, 1))
+    
+    logger.info(f"Wrote {len(fixtures)} document fixture(s) to {directory}")
+    return fixtures
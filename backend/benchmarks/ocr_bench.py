@@ -0,0 +1,295 @@
+"""
+OCR Throughput Benchmark
+Measures how fast documents go through run_best_ocr() and each provider.
+
+Fixtures (text-layer, scanned, mixed and multi-page PDFs plus noisy phone
+photos) are regenerated deterministically on every run. For each fixture
+and target it reports pages/sec, p50/p95 per-page latency, peak RSS and
+characters extracted. Per-page latency is the time between consecutive
+pages coming out of the stream, i.e. what a caller waiting on the next
+page actually sees. Peak RSS is sampled while each run is in progress and
+covers this process plus its children, i.e. the OCR pool workers that do
+the rendering and recognition (psutil if installed, /proc otherwise).
+
+The OCR and page caches are disabled unless --with-cache is given, so
+every run measures real OCR work.
+
+Run from the backend directory:
+    python -m benchmarks.ocr_bench [--fixtures DIR] [--repeat N] [--output results.json]
+"""
+
+from typing import Dict, Any, List, Optional, Iterable
+from pathlib import Path
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import logging
+import threading
+
+# Try to import psutil (process-tree memory on every platform)
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+from benchmarks.fixtures import build_document_fixtures
+
+logger = logging.getLogger("ExamPulse.Benchmarks.OCR")
+
+# Name used for the full routing path in results (providers use their own names)
+TARGET_BEST = "run_best_ocr"
+
+# Seconds between memory samples while a run is in progress
+RSS_SAMPLE_INTERVAL = 0.05
+
+PROC_DIR = Path("/proc")
+
+
+def _proc_tree_rss() -> int:
+    """RSS of this process and its descendants from /proc (Linux), in bytes."""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in PROC_DIR.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            resident_pages = int((entry / "statm").read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        # The command name may contain spaces; the parent pid is the second field after it
+        parent = int(stat[stat.rindex(")") + 2:].split()[1])
+        children.setdefault(parent, []).append(int(entry.name))
+        rss[int(entry.name)] = resident_pages * page_size
+    
+    total = 0
+    stack = [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+def tree_rss_bytes() -> Optional[int]:
+    """
+    Resident set size of this process and all its children (the OCR pool workers).
+    
+    Returns:
+        Bytes, or None if neither psutil nor /proc is available
+    """
+    if PSUTIL_AVAILABLE:
+        process = psutil.Process()
+        total = 0
+        for member in [process] + process.children(recursive=True):
+            try:
+                total += member.memory_info().rss
+            except psutil.Error:
+                continue  # Exited between listing and reading
+        return total
+    if PROC_DIR.is_dir():
+        return _proc_tree_rss()
+    return None
+
+
+class RSSSampler:
+    """Samples tree_rss_bytes() on a background thread and keeps the peak."""
+    
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+    
+    def _sample(self) -> None:
+        rss = tree_rss_bytes()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def __enter__(self) -> "RSSSampler":
+        self._sample()
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+    
+    @property
+    def peak_mb(self) -> Optional[float]:
+        """Peak sampled RSS in MB (None if memory could not be read)."""
+        return round(self.peak / (1024 * 1024), 1) if self.peak is not None else None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Linearly interpolated percentile.
+    
+    Args:
+        values: Samples
+        pct: Percentile (0-100)
+    
+    Returns:
+        Percentile value, or None for no samples
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(pages: Iterable) -> Dict[str, Any]:
+    """
+    Drain a page stream, timing each page and sampling memory.
+    
+    Args:
+        pages: Iterator of OCRPage
+    
+    Returns:
+        Dict with pages, seconds, per-page latencies (ms), characters and
+        peak RSS (MB) of the process tree during the run
+    """
+    latencies = []
+    characters = 0
+    count = 0
+    with RSSSampler() as sampler:
+        start = last = time.perf_counter()
+        for page in pages:
+            now = time.perf_counter()
+            latencies.append((now - last) * 1000)
+            last = now
+            characters += len(page.text)
+            count += 1
+        seconds = time.perf_counter() - start
+    return {
+        "pages": count,
+        "seconds": seconds,
+        "latencies_ms": latencies,
+        "characters": characters,
+        "peak_rss_mb": sampler.peak_mb,
+    }
+
+
+def summarize(target: str, fixture: Path, page_count: int, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine repeated runs of one target on one fixture into a result row.
+    
+    Args:
+        target: TARGET_BEST or a provider name
+        fixture: Fixture file
+        page_count: Pages in the fixture
+        runs: Outputs of measure()
+    
+    Returns:
+        Result dict (latencies in ms, rounded; peak_rss_mb is the highest of the runs)
+    """
+    seconds = sum(run["seconds"] for run in runs)
+    pages = sum(run["pages"] for run in runs)
+    latencies = [latency for run in runs for latency in run["latencies_ms"]]
+    p50 = percentile(latencies, 50)
+    p95 = percentile(latencies, 95)
+    peaks = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    return {
+        "fixture": fixture.name,
+        "target": target,
+        "fixture_pages": page_count,
+        "pages": runs[-1]["pages"],
+        "runs": len(runs),
+        "seconds": round(seconds / len(runs), 3),
+        "pages_per_sec": round(pages / seconds, 2) if seconds > 0 else None,
+        "p50_ms": round(p50, 1) if p50 is not None else None,
+        "p95_ms": round(p95, 1) if p95 is not None else None,
+        "characters": runs[-1]["characters"],
+        "peak_rss_mb": max(peaks) if peaks else None,
+    }
+
+
+def run_benchmark(fixture_dir: Path, repeat: int = 1, photo_count: int = 2, targets: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Benchmark run_best_ocr() and every available provider on the fixture set.
+    
+    Args:
+        fixture_dir: Directory to (re)generate fixtures in
+        repeat: Runs per fixture and target
+        photo_count: Number of noisy photo fixtures
+        targets: Only run these targets (TARGET_BEST and/or provider names; None = all)
+    
+    Returns:
+        Dict with environment info and one result row per fixture and target
+    """
+    # Imported here so main() can switch the caches off before their settings are read
+    from core.ocr import run_best_ocr_stream, _cache_version
+    from core.ocr_providers import registry
+    
+    fixtures = build_document_fixtures(fixture_dir, photo_count)
+    results = []
+    
+    for path, page_count in fixtures:
+        runners = [(TARGET_BEST, lambda path=path: run_best_ocr_stream(str(path)))]
+        for provider in registry.providers():
+            if provider.supports_file_type(str(path)) and provider.is_available():
+                runners.append((provider.name, lambda path=path, provider=provider: provider.iter_pages(str(path))))
+        
+        for target, runner in runners:
+            if targets and target not in targets:
+                continue
+            row = summarize(target, path, page_count, [measure(runner()) for _ in range(max(1, repeat))])
+            logger.info(
+                f"{path.name} [{target}]: {row['pages_per_sec']} pages/s, "
+                f"p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, {row['characters']:,} chars"
+            )
+            results.append(row)
+    
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ocr_version": _cache_version(),
+            "cache_enabled": os.getenv("OCR_CACHE_ENABLED", "true"),
+        },
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark OCR throughput")
+    parser.add_argument("--fixtures", default="./benchmark_fixtures", help="Directory for generated fixtures")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per fixture and target")
+    parser.add_argument("--photos", type=int, default=2, help="Number of noisy photo fixtures")
+    parser.add_argument("--target", action="append", help=f"Only run this target ({TARGET_BEST} or a provider name); repeatable")
+    parser.add_argument("--with-cache", action="store_true", help="Leave the OCR caches enabled")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+    
+    if not args.with_cache:
+        os.environ["OCR_CACHE_ENABLED"] = "false"
+        os.environ["OCR_PAGE_CACHE_ENABLED"] = "false"
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    results = run_benchmark(Path(args.fixtures), args.repeat, args.photos, args.target)
+    report = json.dumps(results, indent=2)
+    
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+        logger.info(f"✓ Results written to {args.output}")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Preprocessing Benchmark
+Compares Tesseract on raw images against the preprocessing pipeline.
+
+For every fixture it reports end-to-end OCR time (preprocessing included),
+characters extracted and the fraction of expected words recovered, once
+with preprocessing disabled and once with the configured pipeline.
+
+Run from the backend directory:
+    python -m benchmarks.preprocess_bench [--fixtures DIR] [--count N] [--output results.json]
+"""
+
+from typing import Dict, Any, List
+from pathlib import Path
+import re
+import sys
+import json
+import time
+import argparse
+import logging
+
+from PIL import Image
+
+from core.ocr_providers.preprocess import preprocess_image, PreprocessConfig, DEFAULT_PREPROCESS_CONFIG
+from core.ocr_providers.tesseract_pool import recognize
+from benchmarks.fixtures import build_photo_fixtures
+
+logger = logging.getLogger("ExamPulse.Benchmarks.Preprocess")
+
+# Preprocessing switched off entirely: Tesseract sees the raw image
+RAW_CONFIG = PreprocessConfig(grayscale=False, downscale=False, binarize=False, crop_border=False)
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def run_once(path: Path, expected: List[str], config: PreprocessConfig) -> Dict[str, Any]:
+    """
+    OCR one fixture with a preprocessing config.
+    
+    Args:
+        path: Image file
+        expected: Lines of text drawn on the fixture
+        config: Preprocessing steps to run
+    
+    Returns:
+        Dict with timings, characters and word recall
+    """
+    with Image.open(path) as image:
+        image.load()
+        start = time.perf_counter()
+        processed, timings = preprocess_image(image, config=config)
+        text = recognize(processed)
+        total_ms = (time.perf_counter() - start) * 1000
+    
+    expected_words = set(_words(" ".join(expected)))
+    found_words = set(_words(text))
+    return {
+        "total_ms": round(total_ms, 1),
+        "preprocess_ms": {step: round(ms, 1) for step, ms in timings.items()},
+        "characters": sum(1 for char in text if char.isalnum()),
+        "word_recall": round(len(expected_words & found_words) / len(expected_words), 4) if expected_words else 0.0,
+        "size": list(processed.size),
+    }
+
+
+def run_benchmark(fixture_dir: Path, count: int) -> Dict[str, Any]:
+    """
+    Benchmark raw vs preprocessed OCR on the photo fixture set.
+    
+    Args:
+        fixture_dir: Directory to (re)generate fixtures in
+        count: Number of fixtures
+    
+    Returns:
+        Dict with per-fixture results and totals for both modes
+    """
+    fixtures = build_photo_fixtures(fixture_dir, count)
+    results = []
+    totals = {mode: {"total_ms": 0.0, "characters": 0, "word_recall": 0.0} for mode in ("raw", "preprocessed")}
+    
+    for path, expected in fixtures:
+        entry = {"fixture": path.name}
+        for mode, config in (("raw", RAW_CONFIG), ("preprocessed", DEFAULT_PREPROCESS_CONFIG)):
+            entry[mode] = run_once(path, expected, config)
+            for key in totals[mode]:
+                totals[mode][key] += entry[mode][key]
+        logger.info(
+            f"{path.name}: raw {entry['raw']['total_ms']:.0f} ms / {entry['raw']['characters']} chars, "
+            f"preprocessed {entry['preprocessed']['total_ms']:.0f} ms / {entry['preprocessed']['characters']} chars"
+        )
+        results.append(entry)
+    
+    for mode in totals:
+        totals[mode]["total_ms"] = round(totals[mode]["total_ms"], 1)
+        totals[mode]["word_recall"] = round(totals[mode]["word_recall"] / len(fixtures), 4) if fixtures else 0.0
+    
+    return {
+        "config": DEFAULT_PREPROCESS_CONFIG.signature(),
+        "fixtures": results,
+        "totals": totals,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing")
+    parser.add_argument("--fixtures", default="./benchmark_fixtures", help="Directory for generated fixtures")
+    parser.add_argument("--count", type=int, default=4, help="Number of photo fixtures")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    report = json.dumps(run_benchmark(Path(args.fixtures), args.count), indent=2)
+    
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+        logger.info(f"✓ Results written to {args.output}")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
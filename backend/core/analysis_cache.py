@@ -0,0 +1,60 @@
+"""
+Analysis Cache Module
+Classified questions of already-analysed papers, keyed by file content.
+
+The same popular past paper is uploaded over and over. Uploads are
+deduplicated by content hash, and the OCR cache already skips OCR for known
+content, but every /analyze still paid one AI classification call per
+question. A completed analysis is stored here under the file's SHA-256 plus
+the page selection and everything that shapes the result (OCR, header/footer
+and page-filter settings, AI model), so analysing the same paper again
+replays it without OCR or AI calls.
+"""
+
+from typing import Optional, List
+from pathlib import Path
+import os
+import logging
+from dotenv import load_dotenv
+
+from .ocr import _cache_version
+from .ocr_cache import OCRCache
+from .header_footer import HEADER_FOOTER_LINES, HEADER_FOOTER_MIN_RATIO, HEADER_FOOTER_MIN_PAGES
+from .page_classifier import PAGE_FILTER_ENABLED
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.AnalysisCache")
+
+# Bump to invalidate stored analyses when extraction or classification changes
+ANALYSIS_CACHE_VERSION = "2"
+
+# Cache location and size cap (configurable via .env)
+ANALYSIS_CACHE_DIR = Path(os.getenv("ANALYSIS_CACHE_DIR", "./ocr_cache/analysis"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_MB", "64")) * 1024 * 1024
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def analysis_key(content_hash: str, pages: Optional[List[int]], model: str) -> str:
+    """
+    Build the cache key of one analysis.
+    
+    Args:
+        content_hash: SHA-256 of the uploaded file
+        pages: Zero-based page indices analysed (None = whole document)
+        model: AI model that classified the questions
+    
+    Returns:
+        Hex cache key
+    """
+    selection = "all" if pages is None else ",".join(map(str, pages))
+    version = (
+        f"{ANALYSIS_CACHE_VERSION}:{_cache_version()}:"
+        f"headers={HEADER_FOOTER_LINES}/{HEADER_FOOTER_MIN_RATIO}/{HEADER_FOOTER_MIN_PAGES}:"
+        f"filter={PAGE_FILTER_ENABLED}:model={model}:pages={selection}"
+    )
+    return OCRCache.make_key(content_hash, version)
+
+
+# Singleton instance for completed analyses
+analysis_cache = OCRCache(ANALYSIS_CACHE_DIR, ANALYSIS_CACHE_MAX_BYTES, name="Analysis")
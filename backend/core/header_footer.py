@@ -0,0 +1,154 @@
+"""
+Header/Footer Detection
+Finds running headers, footers and watermarks by how often they repeat.
+
+Exam boards stamp every page with the same board name, paper code, "Page 3
+of 12" footer or "for teaching only" watermark. Rather than keeping a
+keyword list per board, the first and last few lines of every page are
+compared: a line that turns up on most pages is page furniture, not a
+question. Digits are ignored when comparing, so page numbers and dates
+still match. Matching lines are stripped from the same edge windows once
+per document, before the extractor normalizes anything; the body of a page
+is never touched.
+
+Lines that only differ by a number can still be content: marks annotations
+("(5 marks)") and bare numbers or question numbers are never treated as
+page furniture, however often they sit near a page edge.
+"""
+
+from typing import List, Dict, Any, Set, Tuple, Optional
+from collections import Counter
+from dataclasses import replace
+import os
+import re
+import logging
+from dotenv import load_dotenv
+
+from .ocr_providers import OCRPage
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.HeaderFooter")
+
+# Detection settings (configurable via .env)
+# HEADER_FOOTER_LINES: lines (and layout blocks) at the top and bottom of each page to compare
+# HEADER_FOOTER_MIN_RATIO: fraction of pages a line must appear on to be stripped
+# HEADER_FOOTER_MIN_PAGES: documents with fewer pages are left alone
+HEADER_FOOTER_LINES = int(os.getenv("HEADER_FOOTER_LINES", "3"))
+HEADER_FOOTER_MIN_RATIO = float(os.getenv("HEADER_FOOTER_MIN_RATIO", "0.5"))
+HEADER_FOOTER_MIN_PAGES = int(os.getenv("HEADER_FOOTER_MIN_PAGES", "3"))
+
+# Keys that are only a number or question number ("#", "(#)", "#.", "Q#",
+# "Question #)") - a hanging question number at the top of many pages is not
+# a header
+QUESTION_NUMBER_KEY = re.compile(r'^(?:question\s*|q\.?\s*)?[\(\[]?#+\s*[\.\):\]]?$')
+
+# Keys containing a marks annotation ("(# marks)", "[# marks]", "# mark") -
+# questions ending near the bottom of most pages are not a footer
+MARKS_KEY = re.compile(r'#+\s*marks?\b')
+
+
+def line_key(line: str) -> str:
+    """
+    Comparison key of a line: lowercased, digits masked, whitespace collapsed.
+    
+    Args:
+        line: Line of text
+    
+    Returns:
+        Key (empty for blank lines)
+    """
+    return re.sub(r'\s+', ' ', re.sub(r'\d+', '#', line.strip().lower()))
+
+
+def _is_content_key(key: str) -> bool:
+    """True for keys that may repeat at page edges but are never page furniture."""
+    return not key or bool(QUESTION_NUMBER_KEY.match(key) or MARKS_KEY.search(key))
+
+
+def _edge_indices(count: int) -> Set[int]:
+    """Indices of the first and last HEADER_FOOTER_LINES of `count` items."""
+    return set(range(min(HEADER_FOOTER_LINES, count))) | set(range(max(0, count - HEADER_FOOTER_LINES), count))
+
+
+def _edge_line_indices(lines: List[str]) -> Set[int]:
+    """Indices (into lines) of the first and last HEADER_FOOTER_LINES non-blank lines."""
+    non_blank = [i for i, line in enumerate(lines) if line.strip()]
+    return {non_blank[i] for i in _edge_indices(len(non_blank))}
+
+
+def _edge_keys(page: OCRPage) -> Set[str]:
+    """Keys of the first and last HEADER_FOOTER_LINES lines and blocks of a page."""
+    lines = page.text.split('\n')
+    edges = [lines[i] for i in _edge_line_indices(lines)]
+    if page.blocks:
+        edges += [page.blocks[i]['text'] for i in _edge_indices(len(page.blocks))]
+    keys = {line_key(line) for line in edges}
+    return {key for key in keys if not _is_content_key(key)}
+
+
+def detect_repeated_lines(pages: List[OCRPage]) -> Set[str]:
+    """
+    Find header/footer lines repeated across most pages of a document.
+    
+    Args:
+        pages: Pages of one document
+    
+    Returns:
+        Keys (see line_key()) of lines to strip; empty if the document has
+        fewer than HEADER_FOOTER_MIN_PAGES pages
+    """
+    if len(pages) < HEADER_FOOTER_MIN_PAGES:
+        return set()
+    
+    counts = Counter()
+    for page in pages:
+        counts.update(_edge_keys(page))
+    
+    min_pages = max(2, HEADER_FOOTER_MIN_RATIO * len(pages))
+    return {key for key, count in counts.items() if count >= min_pages}
+
+
+def strip_headers_footers(pages: List[OCRPage], out: Optional[Any] = None) -> Tuple[List[OCRPage], Dict[str, Any]]:
+    """
+    Remove repeated header/footer lines from every page of one document.
+    
+    Lines are detected and removed only within the first and last
+    HEADER_FOOTER_LINES lines (and layout blocks) of each page, so question
+    text that happens to match a pattern is never cut from a page's body.
+    
+    Args:
+        pages: Pages of one document (from run_best_ocr_pages(), or a
+            PageSpool from run_best_ocr_spool())
+        out: Where to append the stripped pages (default: a new list); pass
+            a PageSpool to keep a large document out of memory
+    
+    Returns:
+        Tuple of (out, holding the pages without the repeated lines, stats
+        dict with 'applied' (False if the document was too short to judge),
+        'patterns' and 'lines' removed)
+    """
+    out = [] if out is None else out
+    repeated = detect_repeated_lines(pages)
+    stats = {"applied": len(pages) >= HEADER_FOOTER_MIN_PAGES, "patterns": len(repeated), "lines": 0}
+    
+    for page in pages:
+        if repeated:
+            lines = page.text.split('\n')
+            edge_lines = _edge_line_indices(lines)
+            kept = [line for i, line in enumerate(lines) if i not in edge_lines or line_key(line) not in repeated]
+            stats["lines"] += len(lines) - len(kept)
+            blocks = page.blocks
+            if blocks:
+                edge_blocks = _edge_indices(len(blocks))
+                blocks = [
+                    block for i, block in enumerate(blocks)
+                    if i not in edge_blocks or line_key(block['text']) not in repeated
+                ]
+            page = replace(page, text='\n'.join(kept), blocks=blocks)
+        out.append(page)
+    
+    if repeated:
+        logger.info(f"Stripped {stats['lines']} header/footer line(s) matching {len(repeated)} pattern(s) across {len(pages)} page(s)")
+        logger.debug(f"Header/footer patterns: {sorted(repeated)}")
+    return out, stats
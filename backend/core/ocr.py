@@ -4,89 +4,574 @@ Modular OCR architecture with provider-based system.
 Maintains backward compatibility with existing code.
 """
 
-from typing import Optional
+from typing import Optional, Iterator, Iterable, List, Dict, Any, Callable, Awaitable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 import os
+import asyncio
 import logging
+import threading
 from pathlib import Path
 
 # Import OCR providers
-from .ocr_providers import PyMuPDFOCR, TesseractOCR
+from .ocr_providers import OCRPage, OCRJobControl, registry
+from .ocr_providers.preprocess import DEFAULT_PREPROCESS_CONFIG
+from .ocr_providers.layout import OCR_LAYOUT_BLOCKS
+from .ocr_providers.text_quality import OCR_TEXT_QUALITY_THRESHOLD
+from .ocr_cache import ocr_cache, sha256_file, OCR_CACHE_ENABLED
+from .upload_index import upload_index
+from .text_spool import TextSpool, PageSpool
 
 # Set up logger
 logger = logging.getLogger("ExamPulse.OCR")
 
-# Initialize providers
-_pymupdf_provider = PyMuPDFOCR()
-_tesseract_provider = TesseractOCR()
+# Version of the OCR configuration, part of every OCR cache key together with
+# the registered provider names and preprocessing settings. Bump this whenever
+# a change alters the text providers produce.
+OCR_CACHE_VERSION = "10"
 
+# Separator used when joining page texts into a single document string
+PAGE_SEPARATOR = "\n\n"
 
-def run_best_ocr(file_path: str) -> Optional[str]:
+# Async OCR offload for FastAPI routes (configurable via .env)
+# OCR_JOB_WORKERS: documents OCR'd at once off the event loop
+# OCR_QUEUE_DEPTH: documents allowed to wait for a worker before new requests are refused
+# OCR_RETRY_AFTER: seconds suggested to refused clients (Retry-After header)
+OCR_JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", "2"))
+OCR_QUEUE_DEPTH = int(os.getenv("OCR_QUEUE_DEPTH", "8"))
+OCR_RETRY_AFTER = int(os.getenv("OCR_RETRY_AFTER", "30"))
+
+# How often an async OCR job checks whether its HTTP client has gone away (seconds)
+DISCONNECT_POLL_INTERVAL = 1.0
+
+# Highest page number accepted in a page range, so "1-99999999" can't build a huge list
+MAX_PAGE_NUMBER = 10000
+
+
+class OCRQueueFullError(RuntimeError):
+    """Raised when the async OCR queue is full; callers should retry later."""
+    
+    def __init__(self, retry_after: int = OCR_RETRY_AFTER):
+        super().__init__(f"OCR queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def parse_page_ranges(spec: str) -> List[int]:
+    """
+    Parse a page selection like "1-3,5,8-9" (1-based, inclusive).
+    
+    Args:
+        spec: Comma-separated page numbers and ranges
+    
+    Returns:
+        Sorted zero-based page indices
+    
+    Raises:
+        ValueError: If the selection is empty or malformed
+    """
+    selected = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            start = int(first)
+            end = int(last) if sep else start
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part}'")
+        if start < 1 or end < start or end > MAX_PAGE_NUMBER:
+            raise ValueError(f"Invalid page range '{part}' (pages are numbered 1-{MAX_PAGE_NUMBER})")
+        selected.update(range(start - 1, end))
+    
+    if not selected:
+        raise ValueError("No pages selected")
+    return sorted(selected)
+
+
+def select_pages(
+    pages: Optional[str] = None,
+    preview: Optional[int] = None,
+    page_count: Optional[int] = None
+) -> Optional[List[int]]:
+    """
+    Zero-based pages to OCR for an analysis request.
+    
+    Args:
+        pages: Page ranges (see parse_page_ranges()), None for all pages
+        preview: Only take the first N pages (of the selection, if any)
+        page_count: Pages in the document, if known; selected pages past the
+            end are dropped before preview is applied
+    
+    Returns:
+        Zero-based page indices, or None for the whole document
+    
+    Raises:
+        ValueError: If the ranges are malformed, preview is not positive, or
+            none of the selected pages exist in the document
+    """
+    selected = parse_page_ranges(pages) if pages else None
+    if selected is not None and page_count is not None:
+        selected = [page_num for page_num in selected if page_num < page_count]
+        if not selected:
+            raise ValueError(f"None of the selected pages exist, the document has {page_count} page(s)")
+    if preview is not None:
+        if preview < 1:
+            raise ValueError("preview must be at least 1 page")
+        last_page = MAX_PAGE_NUMBER if page_count is None else page_count
+        selected = selected[:preview] if selected is not None else list(range(min(preview, last_page)))
+    return selected
+
+
+def run_best_ocr(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    pages: Optional[List[int]] = None
+) -> Optional[str]:
     """
     Run OCR using the best available provider for the file type.
     
     Strategy (priority order):
-    1. For PDFs: PyMuPDF → Tesseract (fallback)
-    2. For Images: Tesseract
+    1. OCR cache (keyed by file content hash + OCR_CACHE_VERSION)
+    2. Provider registry: each page goes to the cheapest provider that can
+       read it (PDF text layer → PyMuPDF, scanned pages/images → OCR)
     3. Log which provider was used
     
     Args:
         file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults); pages skipped
+            for time are listed in control.timed_out_pages
+        pages: Zero-based page indices to read (None = all pages); other pages
+            are never rendered
     
     Returns:
         Extracted text, or None if all providers fail
     """
-    if not os.path.exists(file_path):
+    # Spool pages as they arrive so large documents are held once, not as
+    # a list of pages plus the joined string
+    with TextSpool() as spool:
+        for page in run_best_ocr_stream(file_path, control, pages):
+            spool.append(page.text)
+        
+        if not spool:
+            return None
+        
+        return spool.text(PAGE_SEPARATOR)
+
+
+def run_best_ocr_pages(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    pages: Optional[List[int]] = None
+) -> List[OCRPage]:
+    """
+    Like run_best_ocr(), but keep the pages separate.
+    
+    Use this when the caller needs per-page metadata (method, confidence)
+    as well as the text; join with PAGE_SEPARATOR to get run_best_ocr() output.
+    
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults)
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Returns:
+        OCRPage for each page that produced text (empty if all providers fail)
+    """
+    return list(run_best_ocr_stream(file_path, control, pages))
+
+
+def run_best_ocr_spool(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    pages: Optional[List[int]] = None
+) -> PageSpool:
+    """
+    Like run_best_ocr_pages(), but collect the pages in a PageSpool.
+    
+    Past OCR_TEXT_SPOOL_MB the pages live in a temp file instead of memory,
+    so large documents can be read page by page by later steps. The caller
+    must close() the spool.
+    
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults)
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Returns:
+        PageSpool with an OCRPage for each page that produced text
+    """
+    spool = PageSpool()
+    try:
+        for page in run_best_ocr_stream(file_path, control, pages):
+            spool.append(page)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def summarize_pages(pages: Iterable[OCRPage]) -> List[Dict[str, Any]]:
+    """
+    Per-page OCR metadata for API responses (no text).
+    
+    Args:
+        pages: Pages from run_best_ocr_pages() / run_best_ocr_stream() / run_best_ocr_spool()
+    
+    Returns:
+        List of dicts with 1-based 'page', 'method', 'provider', 'confidence'
+        and 'text_quality' (score of the page's text layer, if it had one)
+    """
+    return [
+        {
+            "page": page.index + 1,
+            "method": page.method,
+            "provider": page.provider,
+            "confidence": round(page.confidence, 1) if page.confidence is not None else None,
+            "text_quality": page.text_quality
+        }
+        for page in pages
+    ]
+
+
+def run_best_ocr_stream(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    pages: Optional[List[int]] = None
+) -> Iterator[OCRPage]:
+    """
+    Streaming counterpart of run_best_ocr().
+    
+    Yields pages in page order as soon as each one is ready, so callers can
+    start processing page 1 while later pages are still being OCR'd. Results
+    are written to the OCR cache once the whole document has been read; a
+    cache hit replays the stored pages without running any provider.
+    Documents that were cancelled or had pages skipped for time are not
+    cached, so a later request gets a chance to read them in full.
+    
+    A page selection is served from a cached whole document when there is
+    one; otherwise only the selected pages are read, and the partial result
+    is not cached.
+    
+    Indexed uploads are looked up by the hash recorded at upload time, so
+    the file is not re-read to hash it, and an upload the storage manager
+    has evicted is still served from the cache.
+    
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults)
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Yields:
+        OCRPage for each page that produced text
+    """
+    control = control or OCRJobControl()
+    exists = os.path.exists(file_path)
+    content_hash = upload_index.sha256_for_path(file_path)
+    if not exists and not (OCR_CACHE_ENABLED and content_hash):
         logger.error(f"File not found: {file_path}")
-        return None
+        return
+    
+    cache_key = None
+    if OCR_CACHE_ENABLED:
+        try:
+            cache_key = ocr_cache.make_key(content_hash or sha256_file(file_path), _cache_version())
+        except OSError as e:
+            logger.warning(f"Could not hash file for OCR cache: {e}")
+        
+        if cache_key:
+            cached = ocr_cache.get(cache_key)
+            if cached and cached.get("pages"):
+                wanted = None if pages is None else set(pages)
+                cached_pages = [OCRPage(**page) for page in cached["pages"] if wanted is None or page["index"] in wanted]
+                total_chars = sum(len(page.text) for page in cached_pages)
+                logger.info(f"✓ OCR cache hit for {os.path.basename(file_path)} ({len(cached_pages)} page(s), {total_chars:,} characters, provider: {cached.get('provider')})")
+                yield from cached_pages
+                return
+            logger.info(f"OCR cache miss for {os.path.basename(file_path)}")
+    
+    if not exists:
+        logger.error(f"File was evicted and its OCR result is no longer cached: {file_path}")
+        return
+    
+    if not cache_key or pages is not None:
+        yield from _stream_providers(file_path, control, pages)
+        return
     
+    # Keep pages for the cache entry in a spool rather than a list, so the text
+    # and layout blocks of a large document are not held in memory while later
+    # pages are OCR'd, and write the entry from the spool page by page
+    provider = None
+    with PageSpool() as spool:
+        for page in _stream_providers(file_path, control, pages):
+            spool.append(page)
+            provider = provider or page.provider
+            yield page
+        
+        if control.cancelled or control.timed_out_pages:
+            logger.info(f"Not caching incomplete OCR result for {os.path.basename(file_path)}")
+        elif spool:
+            ocr_cache.put_list(cache_key, "pages", (asdict(page) for page in spool), {"provider": provider})
+
+
+def is_ocr_cached(content_hash: str) -> bool:
+    """
+    Check whether the whole-document OCR result of some content is cached.
+    
+    Args:
+        content_hash: SHA-256 of the file
+    
+    Returns:
+        True if an OCR cache entry exists for it under the current version
+    """
+    return OCR_CACHE_ENABLED and ocr_cache.contains(ocr_cache.make_key(content_hash, _cache_version()))
+
+
+def _cache_version() -> str:
+    """OCR cache version: config version, registered providers, preprocessing, layout and text-quality settings."""
+    return (
+        f"{OCR_CACHE_VERSION}:{registry.signature()}:{DEFAULT_PREPROCESS_CONFIG.signature()}:"
+        f"layout={OCR_LAYOUT_BLOCKS}:quality={OCR_TEXT_QUALITY_THRESHOLD}"
+    )
+
+
+def _stream_providers(file_path: str, control: OCRJobControl, pages: Optional[List[int]] = None) -> Iterator[OCRPage]:
+    """
+    Route a file through the provider registry, bypassing the cache.
+    
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Yields:
+        OCRPage for each page that produced text
+    """
     file_ext = os.path.splitext(file_path)[1].lower()
     file_size = os.path.getsize(file_path)
     
     logger.info(f"Starting OCR for: {os.path.basename(file_path)} ({file_size:,} bytes, type: {file_ext})")
+    if pages is not None:
+        logger.info(f"Reading {len(pages)} selected page(s) only")
     
-    # Process based on file type
-    if file_ext == '.pdf':
-        # Use PyMuPDF for PDFs
-        if _pymupdf_provider.is_available():
-            logger.info("Using PyMuPDF provider for PDF")
-            result = _pymupdf_provider.extract_text(file_path)
-            if result:
-                logger.info(f"✓ PyMuPDF OCR successful: {len(result):,} characters extracted")
-                return result
-            else:
-                logger.warning("✗ PyMuPDF OCR failed, trying Tesseract fallback...")
-        
-        # Fallback: Try Tesseract for scanned PDFs
-        if _tesseract_provider.is_available():
-            logger.info("Using Tesseract provider as fallback for PDF")
-            result = _tesseract_provider.extract_text(file_path)
-            if result:
-                logger.info(f"✓ Tesseract OCR successful: {len(result):,} characters extracted")
-                return result
-            else:
-                logger.warning("✗ Tesseract OCR failed")
-        else:
-            logger.warning("Tesseract not available")
-    
-    elif file_ext in ['.png', '.jpg', '.jpeg', '.webp', '.tiff']:
-        # Use Tesseract for images
-        if _tesseract_provider.is_available():
-            logger.info("Using Tesseract provider for image")
-            result = _tesseract_provider.extract_text(file_path)
-            if result:
-                logger.info(f"✓ Tesseract OCR successful: {len(result):,} characters extracted")
-                return result
-            else:
-                logger.warning("✗ Tesseract OCR failed")
-        else:
-            logger.warning("Tesseract not available")
+    if not registry.candidates(file_path):
+        logger.warning(f"Unsupported file type or no provider available: {file_ext}")
+        logger.error("All OCR providers failed")
+        return
+    
+    total_chars = 0
+    providers_used = set()
+    # The document budget counts from here, not from when the request was queued
+    control.start()
+    for page in registry.route(file_path, pages=pages, control=control):
+        total_chars += len(page.text)
+        providers_used.add(page.provider)
+        yield page
     
+    if control.timed_out_pages:
+        logger.warning(f"✗ {len(control.timed_out_pages)} page(s) skipped after running out of OCR time")
+    
+    if total_chars:
+        logger.info(f"✓ OCR successful ({', '.join(sorted(providers_used))}): {total_chars:,} characters extracted")
     else:
-        logger.warning(f"Unsupported file type: {file_ext}")
+        # All providers failed
+        logger.error("All OCR providers failed")
+
+
+class OCRJobExecutor:
+    """
+    Bounded executor that runs synchronous OCR off the asyncio event loop.
+    
+    At most `workers` documents are processed at once and at most
+    `queue_depth` more may wait; anything beyond that is refused immediately
+    with OCRQueueFullError instead of piling up behind a large PDF.
+    """
+    
+    def __init__(self, workers: int = OCR_JOB_WORKERS, queue_depth: int = OCR_QUEUE_DEPTH):
+        """
+        Initialize executor (threads are started on demand).
+        
+        Args:
+            workers: Documents processed concurrently
+            queue_depth: Documents allowed to wait for a free worker
+        """
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.rejected = 0
+        self.completed = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr-job")
+    
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+    
+    async def run(self, fn: Callable, *args):
+        """
+        Run fn(*args) on a worker thread and await its result.
+        
+        The slot is held until the job actually finishes, even if the awaiting
+        request is cancelled, so the bound reflects real work in progress.
+        
+        Args:
+            fn: Synchronous function to run
+            *args: Arguments for fn
+        
+        Returns:
+            Whatever fn returns
+        
+        Raises:
+            OCRQueueFullError: If workers and queue are all taken
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.queue_depth:
+                self.rejected += 1
+                logger.warning(f"✗ OCR queue full ({self._pending} job(s)), rejecting request")
+                raise OCRQueueFullError()
+            self._pending += 1
+        
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+    
+    def shutdown(self) -> None:
+        """Stop accepting work and drop queued jobs."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor counters.
+        
+        Returns:
+            Dict with workers, queue_depth, pending, completed and rejected
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+# Shared executor used by the async OCR helpers below
+ocr_executor = OCRJobExecutor()
+
+
+async def _watch_disconnect(control: OCRJobControl, is_disconnected: Callable[[], Awaitable[bool]]) -> None:
+    """Cancel an OCR job once its HTTP client disconnects."""
+    while not control.should_stop():
+        if await is_disconnected():
+            control.cancel("client disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def _run_controlled(
+    fn: Callable,
+    file_path: str,
+    control: Optional[OCRJobControl],
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]],
+    pages: Optional[List[int]] = None
+):
+    """
+    Run an OCR function on the shared executor, stopping it early when the
+    awaiting request is cancelled or its client disconnects.
+    """
+    control = control or OCRJobControl()
+    watcher = asyncio.create_task(_watch_disconnect(control, is_disconnected)) if is_disconnected else None
+    try:
+        return await ocr_executor.run(fn, file_path, control, pages)
+    except asyncio.CancelledError:
+        control.cancel("request cancelled")
+        raise
+    finally:
+        if watcher:
+            watcher.cancel()
+
+
+async def run_best_ocr_async(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    pages: Optional[List[int]] = None
+) -> Optional[str]:
+    """
+    Async counterpart of run_best_ocr() for FastAPI routes.
     
-    # All providers failed
-    logger.error("All OCR providers failed")
-    return None
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults)
+        is_disconnected: Coroutine function returning True once the client has
+            gone away (e.g. Request.is_disconnected); OCR is then cancelled
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Returns:
+        Extracted text, or None if all providers fail
+    
+    Raises:
+        OCRQueueFullError: If the OCR queue is full
+    """
+    return await _run_controlled(run_best_ocr, file_path, control, is_disconnected, pages)
+
+
+async def run_best_ocr_pages_async(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    pages: Optional[List[int]] = None
+) -> List[OCRPage]:
+    """
+    Async counterpart of run_best_ocr_pages() for FastAPI routes.
+    
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults)
+        is_disconnected: Coroutine function returning True once the client has
+            gone away (e.g. Request.is_disconnected); OCR is then cancelled
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Returns:
+        OCRPage for each page that produced text
+    
+    Raises:
+        OCRQueueFullError: If the OCR queue is full
+    """
+    return await _run_controlled(run_best_ocr_pages, file_path, control, is_disconnected, pages)
+
+
+async def run_best_ocr_spool_async(
+    file_path: str,
+    control: Optional[OCRJobControl] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    pages: Optional[List[int]] = None
+) -> PageSpool:
+    """
+    Async counterpart of run_best_ocr_spool() for FastAPI routes.
+    
+    Args:
+        file_path: Path to the file (PDF or image)
+        control: Time budget and cancellation (None = defaults)
+        is_disconnected: Coroutine function returning True once the client has
+            gone away (e.g. Request.is_disconnected); OCR is then cancelled
+        pages: Zero-based page indices to read (None = all pages)
+    
+    Returns:
+        PageSpool of the pages that produced text; the caller must close() it
+    
+    Raises:
+        OCRQueueFullError: If the OCR queue is full
+    """
+    return await _run_controlled(run_best_ocr_spool, file_path, control, is_disconnected, pages)
 
 
 def run_ocr(file_path: str) -> Optional[str]:
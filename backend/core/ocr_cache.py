@@ -0,0 +1,240 @@
+"""
+OCR Cache Module
+Content-addressed, on-disk cache for OCR results.
+
+Entries are keyed by the SHA-256 of the file bytes plus the OCR
+provider/config version, so re-analysing a known paper skips OCR entirely.
+The cache is capped by total size and evicts least-recently-used entries.
+"""
+
+from typing import Optional, Dict, Any, Iterable, Callable, TextIO
+from pathlib import Path
+import os
+import json
+import hashlib
+import logging
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.OCR.Cache")
+
+# Cache location and size cap (configurable via .env)
+OCR_CACHE_DIR = Path(os.getenv("OCR_CACHE_DIR", "./ocr_cache"))
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_MB", "256")) * 1024 * 1024
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Read files in 1MB blocks when hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(file_path: str) -> str:
+    """
+    Compute the SHA-256 hex digest of a file without loading it into memory.
+    
+    Args:
+        file_path: Path to the file
+    
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Disk-backed LRU cache of JSON entries.
+    
+    Each entry is stored as <key>.json inside the cache directory. The file's
+    modification time doubles as its last-access time: reads touch the file,
+    and eviction removes the oldest entries until the cache fits under max_bytes.
+    """
+    
+    def __init__(self, directory: Path, max_bytes: int, name: str = "OCR"):
+        """
+        Initialize cache.
+        
+        Args:
+            directory: Directory to store cache entries in
+            max_bytes: Maximum total size of all entries
+            name: Label used in log messages
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(path.stat().st_size for path in self.directory.glob("*.json"))
+    
+    @staticmethod
+    def make_key(content_hash: str, version: str) -> str:
+        """
+        Build a cache key from a content hash and a provider/config version.
+        
+        Args:
+            content_hash: SHA-256 of the source content
+            version: Version string of whatever produced the cached value
+        
+        Returns:
+            Hex cache key
+        """
+        return hashlib.sha256(f"{content_hash}:{version}".encode("utf-8")).hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cache entry and mark it as recently used.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return value
+    
+    def contains(self, key: str) -> bool:
+        """
+        Check for an entry without reading it or marking it as used.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            True if the entry exists
+        """
+        return self._entry_path(key).exists()
+    
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a cache entry, evicting old entries if the size cap is exceeded.
+        
+        Args:
+            key: Cache key
+            value: JSON-serialisable value
+        """
+        # Serialise straight to the file so large entries are never held as one string
+        self._write(key, lambda f: json.dump(value, f, ensure_ascii=False))
+    
+    def put_list(self, key: str, list_field: str, items: Iterable[Any], fields: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Store an entry whose bulk is one list, written item by item.
+        
+        The stored value is `{**fields, list_field: list(items)}`, but the
+        items are consumed lazily, so they can come from a spool on disk.
+        
+        Args:
+            key: Cache key
+            list_field: Name of the list in the stored value
+            items: JSON-serialisable items of the list
+            fields: Other (small) fields of the stored value
+        """
+        def write(f: TextIO) -> None:
+            f.write("{")
+            for name, field in (fields or {}).items():
+                f.write(f"{json.dumps(name)}: {json.dumps(field, ensure_ascii=False)}, ")
+            f.write(f"{json.dumps(list_field)}: [")
+            for i, item in enumerate(items):
+                if i:
+                    f.write(", ")
+                json.dump(item, f, ensure_ascii=False)
+            f.write("]}")
+        
+        self._write(key, write)
+    
+    def _write(self, key: str, write: Callable[[TextIO], None]) -> None:
+        """Write an entry through a temp file, then account for its size and evict if over the cap."""
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            old_size = path.stat().st_size if path.exists() else 0
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                write(f)
+            size = tmp_path.stat().st_size
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"{self.name} cache write failed for {key[:12]}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        
+        with self._lock:
+            self._total_bytes += size - old_size
+            over_cap = self._total_bytes > self.max_bytes
+        
+        if over_cap:
+            self._evict()
+    
+    def _evict(self) -> None:
+        """Remove least-recently-used entries until the cache fits under max_bytes."""
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            
+            self._total_bytes = total
+            self.evictions += removed
+        
+        if removed:
+            logger.info(f"{self.name} cache evicted {removed} entr{'y' if removed == 1 else 'ies'} ({total:,} bytes remaining)")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Dict with hits, misses, evictions, hit_rate, size_bytes and max_bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Singleton instance for whole-document OCR results
+ocr_cache = OCRCache(OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES)
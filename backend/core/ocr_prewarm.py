@@ -0,0 +1,250 @@
+"""
+OCR Prewarm Module
+Background OCR of freshly uploaded files.
+
+OCR used to start only when the user pressed analyze, so the time spent
+picking files was wasted. With OCR_PREWARM_ENABLED, each upload is queued
+here and OCR'd in the background. That also counts its pages and scores its
+text layer. The whole-document result lands in the OCR cache, so /analyze
+and /analyze/multi get a cache hit and only pay for extraction and
+classification.
+
+Prewarming never competes with live analysis for long:
+- the queue and worker count are bounded, and a full queue drops the upload
+  (analysis will OCR it on demand)
+- workers wait while the live OCR executor is saturated
+- an analysis of a file that is still queued takes the job over, and one
+  that arrives mid-run waits for the run instead of OCR'ing the file twice
+"""
+
+from typing import Optional, Dict, Any
+from collections import OrderedDict
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from dotenv import load_dotenv
+
+from .ocr import run_best_ocr_pages, ocr_executor
+from .ocr_providers import OCRJobControl
+from .upload_index import upload_index
+from .storage import storage_manager
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.OCR.Prewarm")
+
+# Background OCR on upload (configurable via .env)
+# OCR_PREWARM_ENABLED: queue every new upload for OCR straight away
+# OCR_PREWARM_WORKERS: documents OCR'd in the background at once
+# OCR_PREWARM_QUEUE_DEPTH: uploads allowed to wait; further uploads are not prewarmed
+# OCR_PREWARM_WAIT: longest an analysis waits for a running prewarm of its file (seconds)
+OCR_PREWARM_ENABLED = os.getenv("OCR_PREWARM_ENABLED", "false").lower() in ("1", "true", "yes")
+OCR_PREWARM_WORKERS = int(os.getenv("OCR_PREWARM_WORKERS", "1"))
+OCR_PREWARM_QUEUE_DEPTH = int(os.getenv("OCR_PREWARM_QUEUE_DEPTH", "16"))
+OCR_PREWARM_WAIT = float(os.getenv("OCR_PREWARM_WAIT", "120"))
+
+# How often an idle worker re-checks whether live analysis has freed up (seconds)
+BUSY_POLL_INTERVAL = 0.5
+
+# Prewarm results kept for /health and status lookups
+MAX_RESULTS = 256
+
+
+class OCRPrewarmer:
+    """
+    Bounded background queue that OCRs uploads ahead of analysis.
+    
+    Worker threads are started on the first submit(). Jobs are keyed by
+    file path; each job's result (pages, mean text quality, timing) is kept
+    in a small LRU for status().
+    """
+    
+    def __init__(self, workers: int = OCR_PREWARM_WORKERS, queue_depth: int = OCR_PREWARM_QUEUE_DEPTH):
+        """
+        Initialize prewarmer (threads are started on demand).
+        
+        Args:
+            workers: Documents OCR'd in the background at once
+            queue_depth: Uploads allowed to wait for a worker
+        """
+        self.workers = max(1, workers)
+        self.queue_depth = max(1, queue_depth)
+        self.dropped = 0
+        self.completed = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=self.queue_depth)
+        self._lock = threading.Lock()
+        self._queued: set = set()
+        self._running: Dict[str, threading.Event] = {}
+        self._controls: Dict[str, OCRJobControl] = {}
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._threads = []
+        self._stopping = threading.Event()
+    
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"ocr-prewarm-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def submit(self, file_id: str, file_path: str) -> bool:
+        """
+        Queue a file for background OCR without blocking.
+        
+        Args:
+            file_id: Upload's file_id (its page count is recorded in the upload index)
+            file_path: Absolute path of the stored file
+        
+        Returns:
+            True if queued, False if prewarming is off, the file is already
+            queued or running, or the queue is full
+        """
+        if not OCR_PREWARM_ENABLED or self._stopping.is_set():
+            return False
+        self._start()
+        
+        with self._lock:
+            if file_path in self._queued or file_path in self._running:
+                return False
+            try:
+                self._queue.put_nowait((file_id, file_path))
+            except queue.Full:
+                self.dropped += 1
+                logger.info(f"Prewarm queue full, {os.path.basename(file_path)} will be OCR'd on analysis")
+                return False
+            self._queued.add(file_path)
+        return True
+    
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                file_id, file_path = self._queue.get(timeout=BUSY_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            
+            # Let live analysis have the OCR workers first
+            while not self._stopping.is_set() and ocr_executor.stats()["pending"] >= ocr_executor.workers:
+                time.sleep(BUSY_POLL_INTERVAL)
+            
+            with self._lock:
+                if file_path not in self._queued:
+                    continue  # Taken over by an analysis request
+                self._queued.discard(file_path)
+                done = threading.Event()
+                control = OCRJobControl()
+                self._running[file_path] = done
+                self._controls[file_path] = control
+            
+            try:
+                self._prewarm(file_id, file_path, control)
+            except Exception as e:
+                logger.warning(f"Prewarm of {os.path.basename(file_path)} failed: {e}")
+                self._record(file_path, {"status": "failed", "error": str(e)})
+            finally:
+                with self._lock:
+                    self._running.pop(file_path, None)
+                    self._controls.pop(file_path, None)
+                    self.completed += 1
+                done.set()
+    
+    def _prewarm(self, file_id: str, file_path: str, control: OCRJobControl) -> None:
+        """OCR a whole document into the OCR cache and record its summary."""
+        started = time.monotonic()
+        with storage_manager.pin(file_path):
+            pages = run_best_ocr_pages(file_path, control)
+        
+        scores = [page.text_quality for page in pages if page.text_quality is not None]
+        result = {
+            "status": "cancelled" if control.cancelled else ("done" if pages else "no_text"),
+            "pages": len(pages),
+            "characters": sum(len(page.text) for page in pages),
+            "text_quality": round(sum(scores) / len(scores), 3) if scores else None,
+            "timed_out_pages": [page_num + 1 for page_num in control.timed_out_pages],
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        self._record(file_path, result)
+        
+        record = upload_index.get(file_id)
+        if record and record["page_count"] is None and pages and not control.cancelled:
+            upload_index.set_page_count(file_id, max(page.index for page in pages) + 1)
+        
+        logger.info(f"Prewarmed {os.path.basename(file_path)}: {result}")
+    
+    def _record(self, file_path: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._results[file_path] = result
+            self._results.move_to_end(file_path)
+            while len(self._results) > MAX_RESULTS:
+                self._results.popitem(last=False)
+    
+    async def claim(self, file_path: str, timeout: float = OCR_PREWARM_WAIT) -> None:
+        """
+        Called by analysis routes before they OCR a file.
+        
+        A queued prewarm of the file is dropped (the analysis OCRs it now); a
+        running one is waited for, up to `timeout` seconds, so its result
+        comes from the OCR cache instead of being computed twice.
+        
+        Args:
+            file_path: Absolute path of the file about to be OCR'd
+            timeout: Longest time to wait for a running prewarm
+        """
+        with self._lock:
+            self._queued.discard(file_path)
+            done = self._running.get(file_path)
+        if done and not done.is_set():
+            logger.info(f"Waiting for background OCR of {os.path.basename(file_path)}")
+            await asyncio.to_thread(done.wait, timeout)
+    
+    def status(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Prewarm state of a file.
+        
+        Args:
+            file_path: Absolute path of the file
+        
+        Returns:
+            {"status": "queued"} / {"status": "running"}, the finished
+            job's result dict, or None if the file was never prewarmed
+        """
+        with self._lock:
+            if file_path in self._queued:
+                return {"status": "queued"}
+            if file_path in self._running:
+                return {"status": "running"}
+            return self._results.get(file_path)
+    
+    def shutdown(self) -> None:
+        """Stop the workers and cancel running jobs."""
+        self._stopping.set()
+        with self._lock:
+            for control in self._controls.values():
+                control.cancel("server shutting down")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get prewarm counters.
+        
+        Returns:
+            Dict with enabled, workers, queue_depth, queued, running,
+            completed and dropped
+        """
+        with self._lock:
+            return {
+                "enabled": OCR_PREWARM_ENABLED,
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "completed": self.completed,
+                "dropped": self.dropped,
+            }
+
+
+# Shared prewarmer fed by the upload routes
+ocr_prewarmer = OCRPrewarmer()
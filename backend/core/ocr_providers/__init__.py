@@ -3,12 +3,33 @@ OCR Providers Module
 Modular OCR architecture with pluggable providers.
 """
 
-from .base_ocr import BaseOCR
+from .base_ocr import BaseOCR, OCRPage, METHOD_TEXT_LAYER, METHOD_OCR
 from .pymupdf_ocr import PyMuPDFOCR
 from .tesseract_ocr import TesseractOCR
+from .tesseract_pool import TesseractPool, tesseract_pool
+from .preprocess import PreprocessConfig, preprocess_image
+from .job_control import OCRJobControl, OCRPageTimeout, OCRJobStopped
+from .registry import ProviderRegistry, registry, register_provider
+
+# Default providers; others can be added with register_provider()
+register_provider(PyMuPDFOCR())
+register_provider(TesseractOCR())
 
 __all__ = [
     'BaseOCR',
+    'OCRPage',
+    'METHOD_TEXT_LAYER',
+    'METHOD_OCR',
     'PyMuPDFOCR',
     'TesseractOCR',
+    'TesseractPool',
+    'tesseract_pool',
+    'PreprocessConfig',
+    'preprocess_image',
+    'OCRJobControl',
+    'OCRPageTimeout',
+    'OCRJobStopped',
+    'ProviderRegistry',
+    'registry',
+    'register_provider',
 ]
@@ -4,18 +4,48 @@ Abstract base class for all OCR providers.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import Optional, Iterator, List, Dict, Tuple, FrozenSet, Any, TYPE_CHECKING
+import os
 import logging
 
+if TYPE_CHECKING:
+    from .job_control import OCRJobControl
+
 logger = logging.getLogger("ExamPulse.OCR.Base")
 
+# How the text of a page was obtained. These double as provider capabilities:
+# a provider declaring METHOD_OCR can rasterise and recognise pages.
+METHOD_TEXT_LAYER = "text_layer"
+METHOD_OCR = "ocr"
+
+
+@dataclass
+class OCRPage:
+    """Text extracted from a single page of a document."""
+    index: int  # Zero-based page index
+    text: str
+    method: str = METHOD_OCR
+    provider: str = ""
+    confidence: Optional[float] = None  # Mean OCR word confidence (0-100); None for text-layer pages
+    blocks: Optional[List[Dict[str, Any]]] = None  # Paragraph blocks with layout metadata (see layout.py); text-layer pages only
+    text_quality: Optional[float] = None  # Score of the page's text layer (0-1, see text_quality.py); None if it had none
+
 
 class BaseOCR(ABC):
     """
     Abstract base class for OCR providers.
     All OCR providers must implement extract_text().
+    
+    Providers declare what they can do so the router in registry.py can pick
+    the cheapest one per page:
+    - file_types: file extensions the provider accepts
+    - page_costs: capability (METHOD_*) -> estimated cost per page in seconds
     """
     
+    file_types: Tuple[str, ...] = ()
+    page_costs: Dict[str, float] = {}
+    
     def __init__(self, name: str):
         """
         Initialize OCR provider.
@@ -39,6 +69,66 @@ class BaseOCR(ABC):
         """
         pass
     
+    @property
+    def capabilities(self) -> FrozenSet[str]:
+        """Capabilities (METHOD_*) this provider declares a page cost for."""
+        return frozenset(self.page_costs)
+    
+    def cost_per_page(self, capability: str) -> float:
+        """
+        Estimated cost of handling one page with the given capability.
+        
+        Args:
+            capability: METHOD_TEXT_LAYER or METHOD_OCR
+        
+        Returns:
+            Estimated seconds per page (infinite if unsupported)
+        """
+        return self.page_costs.get(capability, float("inf"))
+    
+    def plan_pages(self, file_path: str) -> Optional[List[str]]:
+        """
+        Decide, per page, which capability is needed to read it.
+        
+        Only providers that can inspect a document cheaply (e.g. check for a
+        text layer) override this.
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            List with one METHOD_* per page, or None if this provider can't tell
+        """
+        return None
+    
+    def iter_pages(
+        self,
+        file_path: str,
+        pages: Optional[List[int]] = None,
+        capability: Optional[str] = None,
+        control: Optional["OCRJobControl"] = None
+    ) -> Iterator[OCRPage]:
+        """
+        Extract text page by page, yielding each page as soon as it is ready.
+        
+        Pages are yielded in page order. The default implementation treats the
+        whole file as a single page; providers that can work per page override it.
+        
+        Args:
+            file_path: Path to the file (PDF or image)
+            pages: Zero-based page indices to read (None = all pages)
+            capability: Force a METHOD_* for every page (None = provider decides)
+            control: Time budget and cancellation for this document (None = defaults)
+        
+        Yields:
+            OCRPage for each page that produced text
+        """
+        if pages is not None and 0 not in pages:
+            return
+        text = self.extract_text(file_path)
+        if text:
+            yield OCRPage(index=0, text=text, provider=self.name)
+    
     @abstractmethod
     def is_available(self) -> bool:
         """
@@ -49,7 +139,6 @@ class BaseOCR(ABC):
         """
         pass
     
-    @abstractmethod
     def supports_file_type(self, file_path: str) -> bool:
         """
         Check if this provider supports the given file type.
@@ -58,9 +147,10 @@ class BaseOCR(ABC):
             file_path: Path to the file
         
         Returns:
-            True if file type is supported, False otherwise
+            True if the file extension is in file_types, False otherwise
         """
-        pass
+        file_ext = os.path.splitext(file_path)[1].lower()
+        return file_ext in self.file_types
     
     def get_file_size(self, file_path: str) -> int:
         """
@@ -72,7 +162,6 @@ class BaseOCR(ABC):
         Returns:
             File size in bytes
         """
-        import os
         try:
             return os.path.getsize(file_path)
         except OSError:
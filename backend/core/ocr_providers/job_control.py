@@ -0,0 +1,162 @@
+"""
+OCR Job Control
+Time budgets and cancellation for a single document's OCR.
+
+One pathological page (a dense diagram, a corrupt image stream) can keep
+Tesseract busy for minutes. Each document gets an OCRJobControl that bounds
+every page (enforced in the worker, by killing/stopping recognition) and the
+document as a whole (enforced by the provider while it waits for pages), and
+that can be cancelled from outside, e.g. when the HTTP client disconnects.
+
+The document clock starts when the job starts running (start()), not when
+the control is created, so time spent queued behind other documents does
+not count. The document budget only bounds rasterised OCR; text layers are
+cheap and are still read once it runs out.
+"""
+
+from typing import Optional, List, Any
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import os
+import time
+import threading
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.OCR.JobControl")
+
+# Time budgets in seconds (configurable via .env, 0 disables)
+# OCR_PAGE_TIMEOUT: recognition time allowed per page (all passes together)
+# OCR_DOCUMENT_TIMEOUT: total OCR time allowed per document
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+OCR_DOCUMENT_TIMEOUT = float(os.getenv("OCR_DOCUMENT_TIMEOUT", "600"))
+
+# How often waiting providers re-check the deadline and cancellation flag
+POLL_INTERVAL = 0.25
+
+
+class OCRPageTimeout(RuntimeError):
+    """Raised inside a worker when recognising a page exceeds its time budget."""
+
+
+class OCRJobStopped(Exception):
+    """Raised by wait_for() when the job was cancelled or ran out of time."""
+
+
+class OCRJobControl:
+    """
+    Deadline and cancellation flag shared by everything OCR'ing one document.
+    
+    Providers check cancelled between pages, should_stop() before OCR'ing a
+    page and while waiting for OCR workers, and record pages they had to
+    abandon with mark_timed_out().
+    """
+    
+    def __init__(self, page_timeout: float = OCR_PAGE_TIMEOUT, document_timeout: float = OCR_DOCUMENT_TIMEOUT):
+        """
+        Initialize control; the document clock starts with start().
+        
+        Args:
+            page_timeout: Seconds of recognition allowed per page (0 = unlimited)
+            document_timeout: Seconds allowed for the whole document (0 = unlimited)
+        """
+        self.page_timeout = page_timeout
+        self.document_timeout = document_timeout
+        self.started: Optional[float] = None
+        self.cancel_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._timed_out_pages: List[int] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() has been called."""
+        return self._cancelled.is_set()
+    
+    @property
+    def timed_out_pages(self) -> List[int]:
+        """Zero-based indices of pages abandoned for running out of time, sorted."""
+        with self._lock:
+            return sorted(set(self._timed_out_pages))
+    
+    def start(self) -> None:
+        """Start the document clock, once the job is actually running (later calls are no-ops)."""
+        with self._lock:
+            if self.started is None:
+                self.started = time.monotonic()
+    
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Stop OCR for this document as soon as possible.
+        
+        Args:
+            reason: Why OCR was cancelled (logged)
+        """
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self._cancelled.set()
+            logger.info(f"OCR cancelled: {reason}")
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the document budget (None = unlimited); all of it until start()."""
+        if not self.document_timeout:
+            return None
+        if self.started is None:
+            return self.document_timeout
+        return max(0.0, self.document_timeout - (time.monotonic() - self.started))
+    
+    def expired(self) -> bool:
+        """True if the document budget is used up."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+    
+    def should_stop(self) -> bool:
+        """True if OCR should stop (cancelled or out of time)."""
+        return self.cancelled or self.expired()
+    
+    def page_budget(self) -> Optional[float]:
+        """
+        Recognition time a worker may spend on the next page.
+        
+        Returns:
+            Seconds (the smaller of the page budget and what is left of the
+            document budget), or None if unlimited
+        """
+        budgets = [budget for budget in (self.page_timeout or None, self.remaining()) if budget is not None]
+        return min(budgets) if budgets else None
+    
+    def mark_timed_out(self, page_index: int) -> None:
+        """
+        Record a page that was abandoned for running out of time.
+        
+        Args:
+            page_index: Zero-based page index
+        """
+        with self._lock:
+            self._timed_out_pages.append(page_index)
+
+
+def wait_for(future: Future, control: OCRJobControl) -> Any:
+    """
+    Wait for an OCR job's result, giving up when the document should stop.
+    
+    Args:
+        future: Future of a job submitted to the OCR pool
+        control: Control of the document the job belongs to
+    
+    Returns:
+        The job's result
+    
+    Raises:
+        OCRJobStopped: If the document was cancelled or ran out of time first
+            (the future is cancelled if it has not started yet)
+    """
+    while True:
+        if control.should_stop():
+            future.cancel()
+            raise OCRJobStopped(control.cancel_reason or "document time budget exceeded")
+        try:
+            return future.result(timeout=POLL_INTERVAL)
+        except FutureTimeoutError:
+            continue
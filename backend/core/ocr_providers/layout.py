@@ -0,0 +1,146 @@
+"""
+Layout Blocks
+Paragraph-level text blocks with page and position metadata, built from
+PyMuPDF's block/line/span output.
+
+page.get_text("text") flattens a page into lines and throws away where one
+paragraph ends and the next begins, which the question extractor then has
+to guess back with regexes. The "dict" output keeps every line's bounding
+box and font size, so paragraphs can be split on real vertical gaps,
+outdents and font changes instead.
+"""
+
+from typing import Dict, Any, List, Optional
+import os
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.OCR.Layout")
+
+# Structured extraction (configurable via .env)
+# OCR_LAYOUT_BLOCKS: attach paragraph blocks to text-layer pages so the
+# question extractor can split on layout instead of re-joining lines
+# OCR_LAYOUT_PARAGRAPH_GAP: vertical gap between two lines, as a fraction of the
+# line height, that starts a new paragraph
+OCR_LAYOUT_BLOCKS = os.getenv("OCR_LAYOUT_BLOCKS", "true").lower() in ("1", "true", "yes")
+OCR_LAYOUT_PARAGRAPH_GAP = float(os.getenv("OCR_LAYOUT_PARAGRAPH_GAP", "0.6"))
+
+# Font size change (points) between consecutive lines that starts a new paragraph
+FONT_SIZE_DELTA = 1.0
+
+# A line starting this far (points) left of the previous line is an outdent,
+# e.g. the hanging number of the next question
+OUTDENT_TOLERANCE = 6.0
+
+# Span flag for bold text in PyMuPDF's "dict" output
+FONT_BOLD = 16
+
+
+def _line_text(line: Dict[str, Any]) -> str:
+    return "".join(span["text"] for span in line.get("spans", []))
+
+
+def layout_text(layout: Dict[str, Any]) -> str:
+    """
+    Plain text of a page from its "dict" output, one line per text line.
+    
+    Lets a page be extracted once and used both as plain text and as blocks.
+    
+    Args:
+        layout: Result of page.get_text("dict")
+    
+    Returns:
+        Page text (empty if the page has no text)
+    """
+    lines = [
+        _line_text(line)
+        for block in layout.get("blocks", [])
+        if block.get("type", 0) == 0
+        for line in block.get("lines", [])
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _starts_paragraph(prev: Dict[str, Any], bbox: List[float], size: float, first_line: bool) -> bool:
+    """True if a line starting a new row is not a continuation of the paragraph."""
+    height = prev["bbox"][3] - prev["bbox"][1]
+    gap = bbox[1] - prev["bbox"][3]
+    if height > 0 and gap > OCR_LAYOUT_PARAGRAPH_GAP * height:
+        return True
+    if abs(size - prev["size"]) > FONT_SIZE_DELTA:
+        return True
+    # A paragraph's first line may be indented (or hang), so only later lines count
+    return not first_line and bbox[0] < prev["bbox"][0] - OUTDENT_TOLERANCE
+
+
+def _join(text: str, addition: str) -> str:
+    """Append a line to a paragraph, undoing end-of-line hyphenation."""
+    if text.endswith("-") and len(text) > 1 and text[-2].isalpha() and addition[:1].islower():
+        return text[:-1] + addition
+    return f"{text} {addition}"
+
+
+def layout_blocks(layout: Dict[str, Any], page_index: int) -> List[Dict[str, Any]]:
+    """
+    Group a page's lines into paragraphs.
+    
+    Lines on the same row (e.g. a question number and its text) are joined;
+    a new paragraph starts on a vertical gap, a font size change or an
+    outdent. Paragraphs never span PyMuPDF blocks.
+    
+    Args:
+        layout: Result of page.get_text("dict", sort=True)
+        page_index: Zero-based page index
+    
+    Returns:
+        Blocks in reading order, each a dict with 'page' (zero-based), 'bbox'
+        ([x0, y0, x1, y1] in points), 'text', 'font_size' and 'bold'
+    """
+    paragraphs = []
+    
+    for block in layout.get("blocks", []):
+        if block.get("type", 0) != 0:
+            continue
+        
+        paragraph: Optional[Dict[str, Any]] = None
+        prev: Optional[Dict[str, Any]] = None
+        first_line = True
+        
+        for line in block.get("lines", []):
+            spans = [span for span in line.get("spans", []) if span["text"].strip()]
+            if not spans:
+                continue
+            
+            text = _line_text(line).strip()
+            bbox = list(line["bbox"])
+            size = max(span["size"] for span in spans)
+            bold = all(span["flags"] & FONT_BOLD for span in spans)
+            
+            same_row = prev is not None and bbox[1] < (prev["bbox"][1] + prev["bbox"][3]) / 2 < bbox[3]
+            
+            if paragraph is None or (not same_row and _starts_paragraph(prev, bbox, size, first_line)):
+                paragraph = {"page": page_index, "bbox": bbox, "text": text, "font_size": size, "bold": bold}
+                paragraphs.append(paragraph)
+                first_line = True
+            else:
+                paragraph["text"] = _join(paragraph["text"], text)
+                paragraph["bbox"] = [
+                    min(paragraph["bbox"][0], bbox[0]),
+                    min(paragraph["bbox"][1], bbox[1]),
+                    max(paragraph["bbox"][2], bbox[2]),
+                    max(paragraph["bbox"][3], bbox[3]),
+                ]
+                paragraph["font_size"] = max(paragraph["font_size"], size)
+                paragraph["bold"] = paragraph["bold"] and bold
+                if not same_row:
+                    first_line = False
+            
+            prev = {"bbox": bbox, "size": size}
+    
+    for paragraph in paragraphs:
+        paragraph["bbox"] = [round(coord, 1) for coord in paragraph["bbox"]]
+        paragraph["font_size"] = round(paragraph["font_size"], 1)
+    
+    return paragraphs
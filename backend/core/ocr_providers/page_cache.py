@@ -0,0 +1,98 @@
+"""
+Page OCR Cache
+Per-page cache of OCR results for scanned PDF pages.
+
+Exam boards re-issue the same paper with a new cover page or an errata
+sheet, which changes the file hash and misses the whole-document OCR cache.
+Caching each scanned page by a fingerprint of its own content means a
+re-uploaded document only OCRs the pages that actually changed.
+
+Warm the cache from an existing uploads directory with:
+    python -m core.ocr_providers.page_cache ./uploads
+"""
+
+from typing import Optional
+from pathlib import Path
+import os
+import sys
+import hashlib
+import logging
+from dotenv import load_dotenv
+
+from ..ocr_cache import OCRCache
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.OCR.PageCache")
+
+# Cache location and size cap (configurable via .env)
+OCR_PAGE_CACHE_DIR = Path(os.getenv("OCR_PAGE_CACHE_DIR", "./ocr_cache/pages"))
+OCR_PAGE_CACHE_MAX_BYTES = int(os.getenv("OCR_PAGE_CACHE_MAX_MB", "128")) * 1024 * 1024
+OCR_PAGE_CACHE_ENABLED = os.getenv("OCR_PAGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def page_fingerprint(doc, page) -> Optional[str]:
+    """
+    Hash the content that determines how a page renders.
+    
+    Covers the page's content stream, the raw streams of every image it
+    draws, and its geometry. Scanned pages usually share an identical
+    content stream ("draw image /Im0"), so the image bytes are what tell
+    two scans apart.
+    
+    Args:
+        doc: Open fitz document
+        page: Page of that document
+    
+    Returns:
+        Hex digest, or None if the page could not be read
+    """
+    try:
+        digest = hashlib.sha256()
+        digest.update(page.read_contents())
+        for image in page.get_images(full=True):
+            digest.update(doc.xref_stream_raw(image[0]) or b"")
+        digest.update(f"{tuple(page.rect)}:{page.rotation}".encode("utf-8"))
+        return digest.hexdigest()
+    except Exception as e:
+        logger.debug(f"Could not fingerprint page {page.number + 1}: {e}")
+        return None
+
+
+def warm_from_directory(directory: str) -> int:
+    """
+    Populate the page cache by OCR'ing every PDF in a directory.
+    
+    Pages already in the cache are skipped, so this is safe to re-run.
+    
+    Args:
+        directory: Directory to scan (e.g. UPLOAD_DIR)
+    
+    Returns:
+        Number of PDFs processed
+    """
+    from .pymupdf_ocr import PyMuPDFOCR
+    
+    provider = PyMuPDFOCR()
+    processed = 0
+    
+    # Uploads live in hash shard subdirectories
+    for file_path in sorted(Path(directory).rglob("*.pdf")):
+        logger.info(f"Warming page cache from {file_path.name}")
+        for _ in provider.iter_pages(str(file_path)):
+            pass
+        processed += 1
+    
+    logger.info(f"Page cache warmed from {processed} PDF(s): {page_cache.stats()}")
+    return processed
+
+
+# Singleton instance for per-page OCR results
+page_cache = OCRCache(OCR_PAGE_CACHE_DIR, OCR_PAGE_CACHE_MAX_BYTES, name="Page OCR")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Import through the package so the provider and this script share one cache instance
+    from core.ocr_providers.page_cache import warm_from_directory as warm
+    warm(sys.argv[1] if len(sys.argv) > 1 else os.getenv("UPLOAD_DIR", "./uploads"))
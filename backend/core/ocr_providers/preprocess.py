@@ -0,0 +1,229 @@
+"""
+Image Preprocessing
+Vectorised (NumPy) cleanup applied to images before Tesseract.
+
+Phone photos of exam papers arrive oversized, unevenly lit and framed by
+desk or table edges. Each step below is optional and timed:
+1. Grayscale - drop colour channels
+2. Downscale - shrink to the target DPI (assuming an A4 page when the image
+   has no DPI or a placeholder one, like the 72 DPI phone cameras write)
+3. Border crop - strip dark bands along the edges (desk, scanner lid); done
+   on the grayscale image, since binarising turns a uniform desk white
+4. Binarise - adaptive (local mean) thresholding, robust to shadows
+
+Shared by the image path (TesseractOCR) and the scanned-PDF path (PyMuPDFOCR).
+"""
+
+from dataclasses import dataclass, astuple
+from typing import Dict, Optional, Tuple
+import os
+import time
+import logging
+
+logger = logging.getLogger("ExamPulse.OCR.Preprocess")
+
+# Try to import NumPy and Pillow
+try:
+    import numpy as np
+    from PIL import Image
+    PREPROCESS_AVAILABLE = True
+except ImportError:
+    PREPROCESS_AVAILABLE = False
+
+# Set once the missing-dependency warning has been logged
+_unavailable_warned = False
+
+# Long edge of an A4 page in inches, used to estimate DPI of photos
+A4_LONG_EDGE_INCHES = 11.69
+
+# Stated resolutions at or below this are placeholders (phone JPEGs say 72)
+# unless the pixel size agrees with them
+MIN_TRUSTED_DPI = 100
+
+
+def _env_flag(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """Which preprocessing steps to run, and their parameters."""
+    grayscale: bool = True
+    downscale: bool = True
+    binarize: bool = True
+    crop_border: bool = True
+    target_dpi: int = 300
+    # Local window for binarisation, as a fraction of the shorter image side
+    window_fraction: float = 1 / 16
+    # A pixel is ink if it is this much darker than its local mean
+    threshold_offset: float = 0.15
+    # Edge rows/columns darker than this fraction are treated as border
+    border_dark_ratio: float = 0.6
+    
+    @classmethod
+    def from_env(cls) -> "PreprocessConfig":
+        """
+        Build config from .env (OCR_PREPROCESS=false disables every step).
+        
+        Returns:
+            PreprocessConfig
+        """
+        enabled = _env_flag("OCR_PREPROCESS")
+        return cls(
+            grayscale=enabled and _env_flag("OCR_PREPROCESS_GRAYSCALE"),
+            downscale=enabled and _env_flag("OCR_PREPROCESS_DOWNSCALE"),
+            binarize=enabled and _env_flag("OCR_PREPROCESS_BINARIZE"),
+            crop_border=enabled and _env_flag("OCR_PREPROCESS_CROP"),
+            target_dpi=int(os.getenv("OCR_TARGET_DPI", "300")),
+        )
+    
+    @property
+    def enabled(self) -> bool:
+        """True if any step is switched on."""
+        return self.grayscale or self.downscale or self.binarize or self.crop_border
+    
+    def signature(self) -> str:
+        """Compact description of the config, used in OCR cache keys."""
+        return "pre=" + ",".join(str(value) for value in astuple(self))
+
+
+# Default config loaded from .env
+DEFAULT_PREPROCESS_CONFIG = PreprocessConfig.from_env()
+
+
+def _downscale(image: "Image.Image", dpi: Optional[float], target_dpi: int) -> "Image.Image":
+    """Shrink an image to target_dpi. Never upscales."""
+    if not dpi or dpi <= MIN_TRUSTED_DPI:
+        dpi = max(dpi or 0.0, max(image.size) / A4_LONG_EDGE_INCHES)
+    if dpi <= target_dpi:
+        return image
+    scale = target_dpi / dpi
+    new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(new_size, Image.LANCZOS)
+
+
+def _binarize(pixels: "np.ndarray", window_fraction: float, threshold_offset: float) -> "np.ndarray":
+    """
+    Adaptive thresholding against the local mean (Bradley-Roth).
+    
+    Local sums come from running sums (a separable integral image), so the
+    cost is O(pixels) regardless of window size.
+    
+    Args:
+        pixels: 2-D uint8 grayscale array
+        window_fraction: Window size as a fraction of the shorter side
+        threshold_offset: How much darker than the local mean counts as ink
+    
+    Returns:
+        2-D uint8 array with 0 for ink and 255 for background
+    """
+    height, width = pixels.shape
+    half = max(7, int(min(height, width) * window_fraction) // 2)
+    window = 2 * half + 1
+    
+    # Vertical window sums. Edge-padding the running sum clips windows at the
+    # image border, so every sum is a plain slice difference. int32 is enough:
+    # the largest value, in the horizontal running sum below, is
+    # 255 * window * width.
+    running = np.zeros((height + 1, width), dtype=np.int32)
+    np.cumsum(pixels, axis=0, dtype=np.int32, out=running[1:])
+    running = np.pad(running, ((half, half), (0, 0)), mode="edge")
+    column_sums = running[window:] - running[:-window]
+    
+    # Horizontal window sums of the vertical sums
+    running = np.zeros((height, width + 1), dtype=np.int32)
+    np.cumsum(column_sums, axis=1, out=running[:, 1:])
+    running = np.pad(running, ((0, 0), (half, half)), mode="edge")
+    window_sum = running[:, window:] - running[:, :-window]
+    
+    # Pixels actually covered by each (clipped) window
+    rows = np.arange(height)
+    cols = np.arange(width)
+    window_rows = np.minimum(rows + half + 1, height) - np.maximum(rows - half, 0)
+    window_cols = np.minimum(cols + half + 1, width) - np.maximum(cols - half, 0)
+    window_area = np.outer(window_rows, window_cols).astype(np.float32)
+    
+    ink = pixels * window_area < window_sum * np.float32(1.0 - threshold_offset)
+    return np.where(ink, 0, 255).astype(np.uint8)
+
+
+def _crop_border(pixels: "np.ndarray", dark_ratio: float) -> "np.ndarray":
+    """Strip edge rows/columns that are mostly dark (desk, shadows, scanner lid)."""
+    dark = pixels < 128
+    dark_rows = dark.mean(axis=1) > dark_ratio
+    dark_cols = dark.mean(axis=0) > dark_ratio
+    
+    def _first_clear(flags: "np.ndarray") -> int:
+        clear = np.flatnonzero(~flags)
+        return int(clear[0]) if clear.size else 0
+    
+    top = _first_clear(dark_rows)
+    bottom = len(dark_rows) - _first_clear(dark_rows[::-1])
+    left = _first_clear(dark_cols)
+    right = len(dark_cols) - _first_clear(dark_cols[::-1])
+    
+    # Leave the image alone if cropping would remove almost everything
+    if bottom - top < pixels.shape[0] // 4 or right - left < pixels.shape[1] // 4:
+        return pixels
+    return pixels[top:bottom, left:right]
+
+
+def preprocess_image(
+    image: "Image.Image",
+    dpi: Optional[float] = None,
+    config: Optional[PreprocessConfig] = None
+) -> Tuple["Image.Image", Dict[str, float]]:
+    """
+    Run the enabled preprocessing steps on an image.
+    
+    Args:
+        image: PIL image
+        dpi: Known resolution of the image (None = read from image or estimate)
+        config: Steps to run (defaults to DEFAULT_PREPROCESS_CONFIG)
+    
+    Returns:
+        Tuple of (processed image, per-step timings in milliseconds)
+    """
+    global _unavailable_warned
+    config = config or DEFAULT_PREPROCESS_CONFIG
+    timings: Dict[str, float] = {}
+    
+    if not config.enabled:
+        return image, timings
+    if not PREPROCESS_AVAILABLE:
+        if not _unavailable_warned:
+            logger.warning("NumPy or Pillow is not installed: OCR images are not preprocessed")
+            _unavailable_warned = True
+        return image, timings
+    
+    if dpi is None and image.info.get("dpi"):
+        dpi = float(image.info["dpi"][0]) or None
+    
+    if config.grayscale and image.mode != "L":
+        start = time.perf_counter()
+        image = image.convert("L")
+        timings["grayscale_ms"] = (time.perf_counter() - start) * 1000
+    
+    if config.downscale:
+        start = time.perf_counter()
+        image = _downscale(image, dpi, config.target_dpi)
+        timings["downscale_ms"] = (time.perf_counter() - start) * 1000
+    
+    # The array steps need a single-channel image
+    if (config.binarize or config.crop_border) and image.mode == "L":
+        pixels = np.asarray(image)
+        
+        # Crop first: after binarisation a uniformly dark desk is white
+        if config.crop_border:
+            start = time.perf_counter()
+            pixels = _crop_border(pixels, config.border_dark_ratio)
+            timings["crop_ms"] = (time.perf_counter() - start) * 1000
+        
+        if config.binarize:
+            start = time.perf_counter()
+            pixels = _binarize(pixels, config.window_fraction, config.threshold_offset)
+            timings["binarize_ms"] = (time.perf_counter() - start) * 1000
+        
+        image = Image.fromarray(pixels, mode="L")
+    
+    return image, timings
@@ -3,11 +3,22 @@ PyMuPDF OCR Provider
 Extracts text from PDFs using PyMuPDF (fitz).
 """
 
-from typing import Optional
+from typing import Optional, Iterator, Dict, Any, List
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager, ExitStack
 import os
-import io
+import mmap
+import time
 import logging
-from .base_ocr import BaseOCR
+from .base_ocr import BaseOCR, OCRPage, METHOD_TEXT_LAYER, METHOD_OCR
+from .tesseract_pool import TesseractPool, tesseract_pool, pool_task, recognize_with_confidence, OCR_WORKERS, OCR_LANG
+from .page_cache import page_cache, page_fingerprint, OCR_PAGE_CACHE_ENABLED
+from .preprocess import preprocess_image, DEFAULT_PREPROCESS_CONFIG
+from .job_control import OCRJobControl, OCRJobStopped, OCRPageTimeout, wait_for
+from .layout import layout_text, layout_blocks, OCR_LAYOUT_BLOCKS
+from .text_quality import score_text, is_usable
+from ..text_spool import TextSpool
 
 logger = logging.getLogger("ExamPulse.OCR.PyMuPDF")
 
@@ -31,31 +42,282 @@ except ImportError:
     TESSERACT_AVAILABLE = False
 
 
+# Memory budget mode for very large documents (configurable via .env)
+# OCR_MEMORY_BUDGET: open PDFs from a memory-mapped file instead of reading them
+# into MuPDF buffers, empty MuPDF's resource store (decoded images, fonts) after
+# every page and cap the scanned pages rendered or queued at once
+# OCR_MAX_RENDERED_PAGES: that cap (defaults to one page per OCR worker)
+OCR_MEMORY_BUDGET = os.getenv("OCR_MEMORY_BUDGET", "false").lower() in ("1", "true", "yes")
+OCR_MAX_RENDERED_PAGES = int(os.getenv("OCR_MAX_RENDERED_PAGES", OCR_WORKERS))
+
+# Parallel OCR settings for scanned pages (configurable via .env)
+# OCR_MAX_IN_FLIGHT: maximum number of pages submitted to the OCR pool at once
+# (the number of worker processes is OCR_WORKERS, see tesseract_pool.py)
+OCR_MAX_IN_FLIGHT = int(os.getenv("OCR_MAX_IN_FLIGHT", OCR_WORKERS * 2))
+
+# Multi-pass OCR for scanned pages (configurable via .env)
+# Every scanned page is first rendered at OCR_FAST_ZOOM (1.5x = 108 DPI) and OCR'd;
+# only pages whose mean word confidence is below OCR_MIN_CONFIDENCE (0-100) are
+# re-rendered at OCR_RENDER_ZOOM (3x = 216 DPI) and OCR'd again.
+OCR_FAST_ZOOM = float(os.getenv("OCR_FAST_ZOOM", "1.5"))
+OCR_RENDER_ZOOM = float(os.getenv("OCR_RENDER_ZOOM", "3.0"))
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "70"))
+
+# Blank-page detection for scanned pages (configurable via .env)
+# A pixel counts as ink when darker than OCR_INK_THRESHOLD (0-255); pages whose
+# ink coverage is below OCR_BLANK_INK_RATIO skip Tesseract entirely.
+OCR_INK_THRESHOLD = int(os.getenv("OCR_INK_THRESHOLD", "128"))
+OCR_BLANK_INK_RATIO = float(os.getenv("OCR_BLANK_INK_RATIO", "0.002"))
+
+# Settings that change scanned-page OCR output, part of every page cache key
+PAGE_OCR_VERSION = (
+    f"zoom={OCR_FAST_ZOOM}/{OCR_RENDER_ZOOM}:conf={OCR_MIN_CONFIDENCE}:"
+    f"ink={OCR_INK_THRESHOLD}/{OCR_BLANK_INK_RATIO}:lang={OCR_LANG}:"
+    f"{DEFAULT_PREPROCESS_CONFIG.signature()}:4"
+)
+
+
+def _ink_coverage(image: "Image.Image") -> float:
+    """
+    Fraction of dark pixels in a grayscale image.
+    
+    Uses the image histogram, so it runs in C without touching pixels in Python.
+    
+    Args:
+        image: Grayscale ("L") image
+    
+    Returns:
+        Ink coverage between 0.0 and 1.0
+    """
+    histogram = image.histogram()
+    total = image.width * image.height
+    if not total:
+        return 0.0
+    return sum(histogram[:OCR_INK_THRESHOLD]) / total
+
+
+@contextmanager
+def open_pdf(file_path: str):
+    """
+    Open a PDF, memory-mapped in budget mode.
+    
+    The mapped file is shared with the OS page cache (and with every worker
+    process mapping the same upload) rather than copied into each process.
+    
+    Args:
+        file_path: Path to PDF file
+    
+    Yields:
+        Open fitz document, closed (and unmapped) on exit
+    """
+    if not OCR_MEMORY_BUDGET:
+        doc = fitz.open(file_path)
+        try:
+            yield doc
+        finally:
+            doc.close()
+        return
+    
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        doc = fitz.open(stream=view, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            # The mapping can only be closed once nothing borrows it
+            doc.close()
+            view.release()
+
+
+def _release_render_memory() -> None:
+    """Empty MuPDF's resource store (budget mode only)."""
+    if OCR_MEMORY_BUDGET:
+        fitz.TOOLS.store_shrink(100)
+
+
+def _read_text_layer(page, page_num: int) -> Dict[str, Any]:
+    """
+    Read a page's text layer, with paragraph blocks when OCR_LAYOUT_BLOCKS is on.
+    
+    In layout mode the page is extracted once as "dict" output (without
+    images) and both the plain text and the blocks are built from it.
+    
+    Args:
+        page: fitz page
+        page_num: Zero-based page index
+    
+    Returns:
+        Dict with 'text' and 'blocks' (None unless in layout mode)
+    """
+    if not OCR_LAYOUT_BLOCKS:
+        return {"text": page.get_text("text", sort=True), "blocks": None}
+    
+    layout = page.get_text("dict", sort=True, flags=fitz.TEXTFLAGS_TEXT)
+    return {"text": layout_text(layout), "blocks": layout_blocks(layout, page_num)}
+
+
+def _format_confidence(confidence: Optional[float]) -> str:
+    return "n/a" if confidence is None else f"{confidence:.0f}"
+
+
+def _ocr_page_at_zoom(page, zoom: float, check_blank: bool, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Render a page at one zoom level and run Tesseract on it.
+    
+    The page is rendered straight to grayscale and wrapped as a PIL image over
+    the pixmap's sample buffer (no PNG encode/decode round trip). Near-blank
+    pages are detected from ink coverage and never reach Tesseract; other
+    pages go through preprocess_image() (binarisation, border crop) first.
+    
+    Args:
+        page: fitz page
+        zoom: Render zoom (1.0 = 72 DPI)
+        check_blank: Skip OCR if the page has almost no ink
+        timeout: Seconds allowed for recognition (None = unlimited)
+    
+    Returns:
+        Dict with 'text' (may be empty), 'confidence', 'blank', 'ink',
+        'render_ms', 'preprocess_ms' and 'ocr_ms'
+    
+    Raises:
+        OCRPageTimeout: If recognition ran out of time
+    """
+    pix = None
+    image = None
+    processed = None
+    try:
+        render_start = time.perf_counter()
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        image = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+        ink = _ink_coverage(image)
+        render_ms = (time.perf_counter() - render_start) * 1000
+        
+        if check_blank and ink < OCR_BLANK_INK_RATIO:
+            return {"text": "", "confidence": None, "blank": True, "ink": ink, "render_ms": render_ms, "preprocess_ms": 0.0, "ocr_ms": 0.0}
+        
+        processed, timings = preprocess_image(image, dpi=72 * zoom)
+        preprocess_ms = sum(timings.values())
+        
+        ocr_start = time.perf_counter()
+        text, confidence = recognize_with_confidence(processed, timeout=timeout)
+        ocr_ms = (time.perf_counter() - ocr_start) * 1000
+        
+        return {
+            "text": text,
+            "confidence": confidence,
+            "blank": False,
+            "ink": ink,
+            "render_ms": render_ms,
+            "preprocess_ms": preprocess_ms,
+            "ocr_ms": ocr_ms,
+        }
+    finally:
+        # The images may borrow the pixmap's sample buffer, so release them first
+        del processed
+        del image
+        del pix
+
+
+@pool_task
+def _ocr_scanned_page(file_path: str, page_num: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    OCR a single scanned PDF page, re-rendering it only if the result is poor.
+    
+    Module-level so it can be pickled and executed in an OCR pool worker,
+    where recognize_with_confidence() reuses the worker's loaded Tesseract
+    engine. Each call opens its own document handle because fitz documents
+    cannot be shared across processes.
+    
+    The first pass renders at OCR_FAST_ZOOM. If its mean word confidence is
+    below OCR_MIN_CONFIDENCE the page is rendered again at OCR_RENDER_ZOOM,
+    and whichever pass Tesseract was more confident about is kept. Both
+    passes share the timeout; a retry that runs out of time keeps the first pass.
+    
+    Args:
+        file_path: Path to PDF file
+        page_num: Zero-based page index
+        timeout: Seconds of recognition allowed for the page (None = unlimited)
+    
+    Returns:
+        Dict with 'text' (may be empty), 'confidence', 'passes', 'zoom', 'blank',
+        'timed_out', 'ink', and total 'render_ms', 'preprocess_ms' and 'ocr_ms'
+        over all passes
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    
+    with open_pdf(file_path) as doc:
+        try:
+            page = doc[page_num]
+            try:
+                result = _ocr_page_at_zoom(page, OCR_FAST_ZOOM, check_blank=True, timeout=timeout)
+            except OCRPageTimeout:
+                return {"text": "", "confidence": None, "blank": False, "timed_out": True, "passes": 1, "zoom": OCR_FAST_ZOOM}
+            result.update(passes=1, zoom=OCR_FAST_ZOOM, timed_out=False)
+            
+            low_confidence = result["confidence"] is None or result["confidence"] < OCR_MIN_CONFIDENCE
+            if result["blank"] or not low_confidence or OCR_RENDER_ZOOM <= OCR_FAST_ZOOM:
+                return result
+            
+            remaining = deadline - time.monotonic() if deadline else None
+            try:
+                retry = _ocr_page_at_zoom(page, OCR_RENDER_ZOOM, check_blank=False, timeout=remaining)
+            except OCRPageTimeout:
+                return result
+            retry.update(zoom=OCR_RENDER_ZOOM)
+            best = retry if (retry["confidence"] or -1.0) >= (result["confidence"] or -1.0) else result
+            
+            return dict(
+                best,
+                passes=2,
+                first_confidence=result["confidence"],
+                render_ms=result["render_ms"] + retry["render_ms"],
+                preprocess_ms=result["preprocess_ms"] + retry["preprocess_ms"],
+                ocr_ms=result["ocr_ms"] + retry["ocr_ms"],
+            )
+        finally:
+            _release_render_memory()
+
+
 class PyMuPDFOCR(BaseOCR):
     """
     PyMuPDF OCR provider for PDF files.
-    Uses direct text extraction, falls back to Tesseract OCR for scanned pages.
+    Uses direct text extraction, falls back to Tesseract OCR for scanned pages
+    and for pages whose text layer looks unusable (see text_quality.py), keeping
+    that text layer when OCR reads no better. Scanned pages are OCR'd in parallel on the shared Tesseract worker pool.
     """
     
-    def __init__(self):
+    file_types = ('.pdf',)
+    page_costs = {
+        METHOD_TEXT_LAYER: 0.005,
+        METHOD_OCR: 1.5,
+    }
+    
+    def __init__(self, max_in_flight: Optional[int] = None, pool: Optional[TesseractPool] = None):
+        """
+        Initialize PyMuPDF provider.
+        
+        Args:
+            max_in_flight: Maximum pages queued in the pool at once (defaults to OCR_MAX_IN_FLIGHT,
+                capped at OCR_MAX_RENDERED_PAGES in memory budget mode)
+            pool: OCR worker pool for scanned pages (defaults to the shared tesseract_pool)
+        """
         super().__init__("PyMuPDF")
+        self.max_in_flight = max(1, max_in_flight or OCR_MAX_IN_FLIGHT)
+        if OCR_MEMORY_BUDGET:
+            self.max_in_flight = min(self.max_in_flight, max(1, OCR_MAX_RENDERED_PAGES))
+        self.pool = pool or tesseract_pool
     
     def is_available(self) -> bool:
         """Check if PyMuPDF is available."""
         return PYMUPDF_AVAILABLE
     
-    def supports_file_type(self, file_path: str) -> bool:
-        """PyMuPDF supports PDF files."""
-        file_ext = os.path.splitext(file_path)[1].lower()
-        return file_ext == '.pdf'
-    
     def extract_text(self, file_path: str) -> Optional[str]:
         """
         Extract text from PDF using PyMuPDF.
         
         Tries multiple extraction methods:
         1. Direct text extraction (for text-based PDFs)
-        2. OCR on rendered pages (for scanned/image-based PDFs)
+        2. OCR on rendered pages (for scanned/image-based PDFs), run in parallel
         
         Args:
             file_path: Path to PDF file
@@ -63,81 +325,341 @@ class PyMuPDFOCR(BaseOCR):
         Returns:
             Extracted text from all pages, or None if failed
         """
+        with TextSpool() as all_text:
+            for page in self.iter_pages(file_path):
+                all_text.append(page.text)
+            
+            if all_text:
+                combined_text = all_text.text("\n\n")
+                self.logger.info(f"Successfully extracted {len(combined_text):,} characters")
+                return combined_text
+            else:
+                self.logger.error("No text extracted from PDF")
+                return None
+    
+    def plan_pages(self, file_path: str) -> Optional[List[str]]:
+        """
+        Check each page for a usable text layer.
+        
+        Pages whose text layer scores below OCR_TEXT_QUALITY_THRESHOLD are
+        planned for OCR like pages without one.
+        
+        Args:
+            file_path: Path to PDF file
+        
+        Returns:
+            METHOD_TEXT_LAYER or METHOD_OCR for every page, or None if the PDF can't be opened
+        """
         if not self.is_available():
-            self.logger.warning("PyMuPDF not available")
             return None
         
+        try:
+            with open_pdf(file_path) as doc:
+                plan = []
+                for page in doc:
+                    text = page.get_text("text")
+                    plan.append(METHOD_TEXT_LAYER if text.strip() and is_usable(score_text(text)) else METHOD_OCR)
+                return plan
+        except Exception as e:
+            self.logger.error(f"Could not inspect PDF pages: {e}")
+            return None
+    
+    def iter_pages(
+        self,
+        file_path: str,
+        pages: Optional[List[int]] = None,
+        capability: Optional[str] = None,
+        control: Optional[OCRJobControl] = None
+    ) -> Iterator[OCRPage]:
+        """
+        Extract text from PDF page by page.
+        
+        Text-layer pages are read directly; scanned pages, and pages whose text
+        layer scores below OCR_TEXT_QUALITY_THRESHOLD, are submitted to the
+        OCR pool as they are found. Each page's text-layer score is recorded
+        in OCRPage.text_quality. Pages are yielded in page order as soon as
+        every earlier page is ready, so consumers can start on page 1 while
+        later pages are still being OCR'd.
+        
+        Args:
+            file_path: Path to PDF file
+            pages: Zero-based page indices to read (None = all pages)
+            capability: METHOD_TEXT_LAYER to only read text layers, METHOD_OCR to
+                OCR every page, or None to OCR only pages without a text layer
+            control: Time budget and cancellation for this document (defaults to
+                OCR_PAGE_TIMEOUT / OCR_DOCUMENT_TIMEOUT); pages abandoned for time
+                are recorded in control.timed_out_pages
+        
+        Yields:
+            OCRPage for each page that produced text
+        """
+        if not self.is_available():
+            self.logger.warning("PyMuPDF not available")
+            return
+        
         if not os.path.exists(file_path):
             self.logger.error(f"File not found: {file_path}")
-            return None
+            return
         
         file_size = self.get_file_size(file_path)
         self.logger.info(f"Processing PDF: {os.path.basename(file_path)} ({file_size:,} bytes)")
         
+        control = control or OCRJobControl()
+        control.start()
+        resources = ExitStack()
+        # Pages in page order: (page_num, method, text layer / OCR result / Future, page cache key)
+        pending = deque()
+        in_flight = 0
+        pages_with_text = 0
+        pages_without_text = 0
+        pages_garbage_text = 0
+        # Text-layer quality score per page that had any text
+        page_quality: Dict[int, float] = {}
+        # Low-scoring text layers sent to OCR, kept unless OCR reads better
+        rejected_layers: Dict[int, Dict[str, Any]] = {}
+        # Scanned-page timing, aggregated for the summary log
+        ocr_stats = {"pages": 0, "blank": 0, "cached": 0, "retried": 0, "timed_out": 0, "render_ms": 0.0, "preprocess_ms": 0.0, "ocr_ms": 0.0}
+        
         try:
             # Open PDF with PyMuPDF
-            doc = fitz.open(file_path)
+            doc = resources.enter_context(open_pdf(file_path))
             total_pages = len(doc)
             self.logger.info(f"PDF has {total_pages} page(s)")
             
-            # Extract text from each page
-            all_text = []
-            pages_with_text = 0
-            pages_without_text = 0
+            if pages is None:
+                page_nums = range(total_pages)
+            else:
+                page_nums = sorted(page_num for page_num in set(pages) if 0 <= page_num < total_pages)
             
-            for page_num in range(total_pages):
+            out_of_time_logged = False
+            for page_num in page_nums:
+                if control.cancelled:
+                    break
+                
                 self.logger.debug(f"Processing page {page_num + 1}/{total_pages}...")
                 page = doc[page_num]
                 
                 # Method 1: Try direct text extraction first (fastest, works for text-based PDFs)
-                text = page.get_text("text", sort=True)
+                text_layer = {"text": "", "blocks": None} if capability == METHOD_OCR else _read_text_layer(page, page_num)
+                
+                # A text layer of junk (unmapped glyphs, a bad scanner's OCR layer) is OCR'd instead
+                usable = True
+                if text_layer["text"].strip():
+                    quality = score_text(text_layer["text"])
+                    page_quality[page_num] = quality["score"]
+                    usable = is_usable(quality) or capability == METHOD_TEXT_LAYER or not TESSERACT_AVAILABLE
+                    if not usable:
+                        pages_garbage_text += 1
+                        rejected_layers[page_num] = text_layer
+                        self.logger.info(
+                            f"  Text layer on page {page_num + 1} looks unusable (score {quality['score']:.2f}: "
+                            f"printable {quality['printable_ratio']:.0%}, words {quality['word_ratio']:.0%}, "
+                            f"avg token {quality['avg_token_length']:.1f}), OCR'ing instead"
+                        )
                 
-                # If no text found, try OCR on the rendered page (for scanned PDFs)
-                if not text.strip():
+                if text_layer["text"].strip() and usable:
+                    pages_with_text += 1
+                    self.logger.debug(f"  Direct extraction: {len(text_layer['text'])} chars from page {page_num + 1}")
+                    pending.append((page_num, METHOD_TEXT_LAYER, text_layer, None))
+                elif capability == METHOD_TEXT_LAYER:
+                    self.logger.debug(f"  No direct text on page {page_num + 1}, OCR left to another provider")
+                else:
+                    # Method 2: No usable text found, OCR the rendered page (for scanned PDFs)
                     pages_without_text += 1
-                    self.logger.info(f"  No direct text on page {page_num + 1}, trying OCR...")
+                    if usable:
+                        self.logger.info(f"  No direct text on page {page_num + 1}, trying OCR...")
+                    
+                    # Reuse this page's OCR result if the same page was seen before
+                    cache_key = None
+                    cached = None
+                    if OCR_PAGE_CACHE_ENABLED:
+                        fingerprint = page_fingerprint(doc, page)
+                        if fingerprint:
+                            cache_key = page_cache.make_key(fingerprint, PAGE_OCR_VERSION)
+                            cached = page_cache.get(cache_key)
                     
-                    if TESSERACT_AVAILABLE:
-                        try:
-                            # Render page as image with higher DPI for better OCR
-                            mat = fitz.Matrix(2.0, 2.0)  # 2x zoom = 144 DPI
-                            pix = page.get_pixmap(matrix=mat)
-                            img_data = pix.tobytes("png")
-                            image = Image.open(io.BytesIO(img_data))
-                            
-                            # Run Tesseract OCR on the image
-                            ocr_text = pytesseract.image_to_string(image, lang='eng')
-                            
-                            if ocr_text.strip():
-                                text = ocr_text
-                                self.logger.info(f"  OCR extracted {len(text)} chars from page {page_num + 1}")
-                            else:
-                                self.logger.warning(f"  OCR found no text on page {page_num + 1}")
-                        except Exception as ocr_error:
-                            self.logger.error(f"  OCR failed for page {page_num + 1}: {ocr_error}")
+                    if cached is not None:
+                        pending.append((page_num, METHOD_OCR, dict(cached, cached=True), None))
+                    elif control.expired():
+                        # The document budget only bounds OCR; text layers are still read
+                        control.mark_timed_out(page_num)
+                        ocr_stats["timed_out"] += 1
+                        if not out_of_time_logged:
+                            self.logger.warning("  Document time budget exceeded, skipping OCR for the remaining scanned page(s)")
+                            out_of_time_logged = True
+                    elif TESSERACT_AVAILABLE:
+                        future = self.pool.submit(_ocr_scanned_page, file_path, page_num, control.page_budget())
+                        pending.append((page_num, METHOD_OCR, future, cache_key))
+                        in_flight += 1
                     else:
                         self.logger.warning("  Tesseract not available for OCR fallback")
-                else:
-                    pages_with_text += 1
-                    self.logger.debug(f"  Direct extraction: {len(text)} chars from page {page_num + 1}")
                 
-                if text.strip():
-                    all_text.append(text)
+                # Drop the page (and, in budget mode, its cached fonts/images) before moving on
+                page = None
+                _release_render_memory()
+                
+                # Yield every page at the head of the queue that is ready; block on
+                # the oldest OCR job when the in-flight limit is reached
+                while pending:
+                    head = pending[0][2]
+                    if isinstance(head, Future) and not head.done() and in_flight < self.max_in_flight:
+                        break
+                    page_num_ready, method, result, cache_key = pending.popleft()
+                    if isinstance(result, Future):
+                        in_flight -= 1
+                    page_result = self._resolve_page(page_num_ready, method, result, ocr_stats, control, cache_key)
+                    page_result = self._prefer_text_layer(page_num_ready, page_result, rejected_layers.pop(page_num_ready, None), page_quality)
+                    if page_result:
+                        page_result.text_quality = page_quality.get(page_num_ready)
+                        yield page_result
             
-            doc.close()
+            # Drain remaining OCR jobs in page order
+            while pending:
+                page_num_ready, method, result, cache_key = pending.popleft()
+                page_result = self._resolve_page(page_num_ready, method, result, ocr_stats, control, cache_key)
+                page_result = self._prefer_text_layer(page_num_ready, page_result, rejected_layers.pop(page_num_ready, None), page_quality)
+                if page_result:
+                    page_result.text_quality = page_quality.get(page_num_ready)
+                    yield page_result
             
             # Summary
-            self.logger.info(f"Extraction summary: {pages_with_text} pages with direct text, {pages_without_text} pages used OCR")
-            
-            if all_text:
-                combined_text = "\n\n".join(all_text)
-                self.logger.info(f"Successfully extracted {len(combined_text):,} characters")
-                return combined_text
-            else:
-                self.logger.error("No text extracted from PDF")
-                return None
-                
+            self.logger.info(f"Extraction summary: {pages_with_text} pages with direct text, {pages_without_text} pages used OCR ({pages_garbage_text} with an unusable text layer)")
+            if ocr_stats["pages"] or ocr_stats["cached"] or ocr_stats["timed_out"]:
+                ocr_pages = ocr_stats["pages"] - ocr_stats["blank"]
+                avg_render = ocr_stats["render_ms"] / ocr_stats["pages"] if ocr_stats["pages"] else 0.0
+                avg_preprocess = ocr_stats["preprocess_ms"] / ocr_pages if ocr_pages else 0.0
+                avg_ocr = ocr_stats["ocr_ms"] / ocr_pages if ocr_pages else 0.0
+                self.logger.info(
+                    f"Scanned page timing: {ocr_stats['pages']} rendered (avg {avg_render:.0f} ms), "
+                    f"{ocr_pages} OCR'd (avg preprocess {avg_preprocess:.0f} ms, OCR {avg_ocr:.0f} ms), "
+                    f"{ocr_stats['retried']} re-OCR'd at {OCR_RENDER_ZOOM}x for low confidence, "
+                    f"{ocr_stats['blank']} blank page(s) skipped, "
+                    f"{ocr_stats['cached']} page(s) from page cache, "
+                    f"{ocr_stats['timed_out']} page(s) timed out"
+                )
+        
         except Exception as e:
             self.logger.error(f"PDF extraction error: {e}", exc_info=True)
+        finally:
+            # Drop queued OCR jobs if the consumer stopped early
+            for _, _, result, _ in pending:
+                if isinstance(result, Future):
+                    result.cancel()
+            resources.close()
+    
+    def _prefer_text_layer(
+        self,
+        page_num: int,
+        page_result: Optional[OCRPage],
+        text_layer: Optional[Dict[str, Any]],
+        page_quality: Dict[int, float]
+    ) -> Optional[OCRPage]:
+        """
+        Keep a low-scoring text layer unless OCR'ing the page read better.
+        
+        A clean text layer in a language the word list does not know scores
+        low too, and OCR with OCR_LANG usually reads it worse.
+        
+        Args:
+            page_num: Zero-based page index
+            page_result: _resolve_page() result for the page's OCR
+            text_layer: _read_text_layer() result rejected for the page, if any
+            page_quality: Text-layer score per page
+        
+        Returns:
+            The OCR result if it scores higher than the text layer, otherwise
+            the text layer as an OCRPage
+        """
+        if text_layer is None:
+            return page_result
+        layer_score = page_quality[page_num]
+        ocr_score = score_text(page_result.text)["score"] if page_result else None
+        if ocr_score is not None and ocr_score > layer_score:
+            return page_result
+        ocr_summary = "no text" if ocr_score is None else f"{ocr_score:.2f}"
+        self.logger.info(
+            f"  OCR of page {page_num + 1} scored no better than its text layer "
+            f"({ocr_summary} vs {layer_score:.2f}), keeping the text layer"
+        )
+        return OCRPage(index=page_num, text=text_layer["text"], method=METHOD_TEXT_LAYER, provider=self.name, blocks=text_layer["blocks"])
+    
+    def _resolve_page(
+        self,
+        page_num: int,
+        method: str,
+        result,
+        ocr_stats: Dict[str, Any],
+        control: OCRJobControl,
+        cache_key: Optional[str] = None
+    ) -> Optional[OCRPage]:
+        """
+        Turn a queued page into an OCRPage, waiting for its OCR job if needed.
+        
+        Args:
+            page_num: Zero-based page index
+            method: METHOD_TEXT_LAYER or METHOD_OCR
+            result: _read_text_layer() result for text-layer pages; for OCR pages, a cached
+                _ocr_scanned_page() result or a Future resolving to one
+            ocr_stats: Running scanned-page timing totals, updated in place
+            control: Time budget and cancellation for the document
+            cache_key: Page cache key to store a fresh OCR result under
+        
+        Returns:
+            OCRPage, or None if the page produced no text or ran out of time
+        """
+        if isinstance(result, Future):
+            try:
+                result = wait_for(result, control)
+            except OCRJobStopped as stopped:
+                if not control.cancelled:
+                    control.mark_timed_out(page_num)
+                    ocr_stats["timed_out"] += 1
+                    self.logger.warning(f"  Page {page_num + 1} abandoned: {stopped}")
+                return None
+            except Exception as ocr_error:
+                self.logger.error(f"  OCR failed for page {page_num + 1}: {ocr_error}")
+                return None
+        
+        if method != METHOD_TEXT_LAYER and result.get("timed_out"):
+            control.mark_timed_out(page_num)
+            ocr_stats["timed_out"] += 1
+            self.logger.warning(f"  Page {page_num + 1} ran out of recognition time, skipped")
             return None
-
+        
+        if method == METHOD_TEXT_LAYER:
+            text = result["text"]
+        elif result.get("cached"):
+            text = result["text"]
+            ocr_stats["cached"] += 1
+            self.logger.info(f"  Page {page_num + 1} served from page cache ({len(text)} chars)")
+        else:
+            if cache_key:
+                page_cache.put(cache_key, result)
+            
+            text = result["text"]
+            ocr_stats["pages"] += 1
+            ocr_stats["render_ms"] += result["render_ms"]
+            ocr_stats["preprocess_ms"] += result["preprocess_ms"]
+            ocr_stats["ocr_ms"] += result["ocr_ms"]
+            
+            if result["passes"] > 1:
+                ocr_stats["retried"] += 1
+                self.logger.info(
+                    f"  Page {page_num + 1} confidence {_format_confidence(result['first_confidence'])} "
+                    f"at {OCR_FAST_ZOOM}x, re-OCR'd at {OCR_RENDER_ZOOM}x (kept {result['zoom']}x)"
+                )
+            
+            if result["blank"]:
+                ocr_stats["blank"] += 1
+                self.logger.info(f"  Page {page_num + 1} is blank ({result['ink']:.2%} ink), skipped OCR")
+            elif text.strip():
+                self.logger.info(f"  OCR extracted {len(text)} chars from page {page_num + 1} (confidence {_format_confidence(result['confidence'])}, render {result['render_ms']:.0f} ms, preprocess {result['preprocess_ms']:.0f} ms, OCR {result['ocr_ms']:.0f} ms)")
+            else:
+                self.logger.warning(f"  OCR found no text on page {page_num + 1}")
+        
+        if not text.strip():
+            return None
+        
+        if method == METHOD_TEXT_LAYER:
+            return OCRPage(index=page_num, text=text, method=method, provider=self.name, blocks=result["blocks"])
+        return OCRPage(index=page_num, text=text, method=method, provider=self.name, confidence=result.get("confidence"))
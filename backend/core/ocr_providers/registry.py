@@ -0,0 +1,165 @@
+"""
+OCR Provider Registry
+Keeps track of available OCR providers and routes each page to the cheapest
+provider able to read it.
+
+Providers declare the file types they accept and an estimated cost per page
+for each capability (see BaseOCR.file_types / page_costs). New providers are
+plugged in with register_provider() - core/ocr.py does not need to change.
+"""
+
+from typing import Optional, Iterator, List, Dict
+import heapq
+import logging
+
+from .base_ocr import BaseOCR, OCRPage, METHOD_TEXT_LAYER, METHOD_OCR
+from .job_control import OCRJobControl
+
+logger = logging.getLogger("ExamPulse.OCR.Registry")
+
+
+class ProviderRegistry:
+    """Registry of OCR providers with cost-aware, per-page routing."""
+    
+    def __init__(self):
+        self._providers: Dict[str, BaseOCR] = {}
+    
+    def register(self, provider: BaseOCR) -> BaseOCR:
+        """
+        Register a provider (replacing any provider with the same name).
+        
+        Args:
+            provider: OCR provider instance
+        
+        Returns:
+            The registered provider
+        """
+        self._providers[provider.name] = provider
+        logger.debug(f"Registered OCR provider {provider.name}: {sorted(provider.capabilities)} for {provider.file_types}")
+        return provider
+    
+    def get(self, name: str) -> Optional[BaseOCR]:
+        """Get a registered provider by name."""
+        return self._providers.get(name)
+    
+    def providers(self) -> List[BaseOCR]:
+        """All registered providers, in registration order."""
+        return list(self._providers.values())
+    
+    def signature(self) -> str:
+        """Stable description of the registered providers, used in OCR cache keys."""
+        return "+".join(sorted(self._providers))
+    
+    def candidates(self, file_path: str, capability: Optional[str] = None) -> List[BaseOCR]:
+        """
+        Available providers that accept a file, cheapest first.
+        
+        Args:
+            file_path: Path to the file
+            capability: Only include providers with this capability (None = any)
+        
+        Returns:
+            Providers sorted by cost per page for the capability
+        """
+        matching = [
+            provider for provider in self._providers.values()
+            if provider.supports_file_type(file_path)
+            and provider.is_available()
+            and (capability is None or capability in provider.capabilities)
+        ]
+        if capability is None:
+            return sorted(matching, key=lambda provider: min(provider.page_costs.values(), default=float("inf")))
+        return sorted(matching, key=lambda provider: provider.cost_per_page(capability))
+    
+    def route(
+        self,
+        file_path: str,
+        pages: Optional[List[int]] = None,
+        control: Optional[OCRJobControl] = None
+    ) -> Iterator[OCRPage]:
+        """
+        Read a file page by page, choosing the cheapest provider for each page.
+        
+        Pages with a usable text layer go to the cheapest text-layer provider;
+        only pages without one are sent to a rasterising OCR provider. When the
+        same provider is cheapest for both it decides per page itself, so the
+        document is only opened once. Pages are yielded in page order.
+        
+        Args:
+            file_path: Path to the file
+            pages: Zero-based page indices to read (None = all pages)
+            control: Time budget and cancellation shared by every provider used
+                for this document (None = defaults)
+        
+        Yields:
+            OCRPage for each page that produced text
+        """
+        control = control or OCRJobControl()
+        text_providers = self.candidates(file_path, METHOD_TEXT_LAYER)
+        ocr_providers = self.candidates(file_path, METHOD_OCR)
+        
+        if not text_providers and not ocr_providers:
+            logger.warning(f"No OCR provider available for {file_path}")
+            return
+        
+        text_provider = text_providers[0] if text_providers else None
+        ocr_provider = ocr_providers[0] if ocr_providers else None
+        
+        # One provider covers everything (e.g. PyMuPDF for PDFs, Tesseract for images);
+        # fall back to the next cheapest provider only if it produced nothing
+        if text_provider is None or ocr_provider is None or text_provider is ocr_provider:
+            for provider in self.candidates(file_path):
+                logger.info(f"Using {provider.name} provider")
+                produced = False
+                for page in provider.iter_pages(file_path, pages=pages, control=control):
+                    produced = True
+                    yield page
+                if produced:
+                    return
+                if control.should_stop():
+                    logger.warning(f"✗ {provider.name} stopped early, not trying other providers")
+                    return
+                logger.warning(f"✗ {provider.name} produced no text, trying next provider...")
+            return
+        
+        # Different providers are cheapest per capability: plan pages up front
+        plan = text_provider.plan_pages(file_path)
+        if plan is None:
+            logger.info(f"Could not plan pages, using {text_provider.name} provider")
+            yield from text_provider.iter_pages(file_path, pages=pages, control=control)
+            return
+        
+        wanted = set(range(len(plan))) if pages is None else set(pages)
+        text_pages = [page_num for page_num, method in enumerate(plan) if method == METHOD_TEXT_LAYER and page_num in wanted]
+        ocr_pages = [page_num for page_num, method in enumerate(plan) if method == METHOD_OCR and page_num in wanted]
+        
+        logger.info(
+            f"Routing {len(text_pages)} text-layer page(s) to {text_provider.name}, "
+            f"{len(ocr_pages)} page(s) to {ocr_provider.name} for OCR"
+        )
+        
+        streams = []
+        if text_pages:
+            streams.append(text_provider.iter_pages(file_path, pages=text_pages, capability=METHOD_TEXT_LAYER, control=control))
+        if ocr_pages:
+            streams.append(ocr_provider.iter_pages(file_path, pages=ocr_pages, capability=METHOD_OCR, control=control))
+        
+        # Both streams are in page order; merge them lazily so OCR can run ahead
+        yield from heapq.merge(*streams, key=lambda page: page.index)
+
+
+# Shared registry; default providers are registered in ocr_providers/__init__.py
+registry = ProviderRegistry()
+
+
+def register_provider(provider: BaseOCR) -> BaseOCR:
+    """
+    Register an OCR provider with the shared registry.
+    
+    Args:
+        provider: OCR provider instance
+    
+    Returns:
+        The registered provider
+    """
+    return registry.register(provider)
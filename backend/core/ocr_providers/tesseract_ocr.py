@@ -3,10 +3,14 @@ Tesseract OCR Provider
 Extracts text from images using Tesseract OCR.
 """
 
-from typing import Optional
+from typing import Optional, Iterator, List, Dict, Any
 import os
+import time
 import logging
-from .base_ocr import BaseOCR
+from .base_ocr import BaseOCR, OCRPage, METHOD_OCR
+from .tesseract_pool import TesseractPool, tesseract_pool, pool_task, recognize_with_confidence
+from .preprocess import preprocess_image
+from .job_control import OCRJobControl, OCRJobStopped, OCRPageTimeout, wait_for
 
 logger = logging.getLogger("ExamPulse.OCR.Tesseract")
 
@@ -23,24 +27,63 @@ except ImportError:
     TESSERACT_AVAILABLE = False
 
 
+@pool_task
+def _ocr_image_frame(file_path: str, frame_num: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Preprocess one frame of an image file and run Tesseract on it.
+    
+    Module-level so it can be executed in an OCR pool worker, where
+    recognize() reuses the worker's loaded Tesseract engine.
+    
+    Args:
+        file_path: Path to image file
+        frame_num: Zero-based frame index (0 for single-frame images)
+        timeout: Seconds allowed for recognition (None = unlimited)
+    
+    Returns:
+        Dict with 'text' (may be empty), 'confidence', 'timed_out', 'preprocess'
+        (per-step timings in ms) and 'ocr_ms'
+    """
+    with Image.open(file_path) as image:
+        image.seek(frame_num)
+        processed, timings = preprocess_image(image)
+        
+        ocr_start = time.perf_counter()
+        try:
+            text, confidence = recognize_with_confidence(processed, timeout=timeout)
+            timed_out = False
+        except OCRPageTimeout:
+            text, confidence, timed_out = "", None, True
+        ocr_ms = (time.perf_counter() - ocr_start) * 1000
+        
+        return {"text": text, "confidence": confidence, "timed_out": timed_out, "preprocess": timings, "ocr_ms": ocr_ms}
+
+
 class TesseractOCR(BaseOCR):
     """
     Tesseract OCR provider for image files.
-    Supports PNG, JPG, JPEG formats.
+    Supports PNG, JPG, JPEG, WEBP and TIFF formats.
     """
     
-    def __init__(self):
+    file_types = ('.png', '.jpg', '.jpeg', '.webp', '.tiff', '.tif')
+    page_costs = {
+        METHOD_OCR: 1.0,
+    }
+    
+    def __init__(self, pool: Optional[TesseractPool] = None):
+        """
+        Initialize Tesseract provider.
+        
+        Args:
+            pool: OCR worker pool (defaults to the shared tesseract_pool)
+        """
         super().__init__("Tesseract")
+        self.pool = pool or tesseract_pool
     
     def is_available(self) -> bool:
         """Check if Tesseract is available."""
         return TESSERACT_AVAILABLE
     
-    def supports_file_type(self, file_path: str) -> bool:
-        """Tesseract supports image files."""
-        file_ext = os.path.splitext(file_path)[1].lower()
-        return file_ext in ['.png', '.jpg', '.jpeg']
-    
     def extract_text(self, file_path: str) -> Optional[str]:
         """
         Extract text from image file using Tesseract OCR.
@@ -51,34 +94,102 @@ class TesseractOCR(BaseOCR):
         Returns:
             Extracted text, or None if failed
         """
+        all_text = [page.text for page in self.iter_pages(file_path)]
+        
+        if not all_text:
+            self.logger.warning("No text extracted from image")
+            return None
+        
+        text = "\n\n".join(all_text)
+        self.logger.info(f"Successfully extracted {len(text):,} characters")
+        return text
+    
+    def iter_pages(
+        self,
+        file_path: str,
+        pages: Optional[List[int]] = None,
+        capability: Optional[str] = None,
+        control: Optional[OCRJobControl] = None
+    ) -> Iterator[OCRPage]:
+        """
+        Extract text from an image frame by frame.
+        
+        Single images yield one page; multi-frame images (e.g. TIFF scans)
+        yield one page per frame as soon as it is recognised.
+        
+        Args:
+            file_path: Path to image file
+            pages: Zero-based frame indices to read (None = all frames)
+            capability: Ignored, images always need METHOD_OCR
+            control: Time budget and cancellation for this image; frames abandoned
+                for time are recorded in control.timed_out_pages
+        
+        Yields:
+            OCRPage for each frame that produced text
+        """
         if not self.is_available():
             self.logger.warning("Tesseract not available")
-            return None
+            return
         
         if not os.path.exists(file_path):
             self.logger.error(f"File not found: {file_path}")
-            return None
+            return
         
+        control = control or OCRJobControl()
+        control.start()
         file_size = self.get_file_size(file_path)
         self.logger.info(f"Processing image: {os.path.basename(file_path)} ({file_size:,} bytes)")
         
         try:
-            # Open image
-            image = Image.open(file_path)
-            width, height = image.size
-            self.logger.debug(f"Image dimensions: {width}x{height}")
-            
-            # Run OCR
-            text = pytesseract.image_to_string(image, lang='eng')
+            # Open image to read its dimensions and frame count
+            with Image.open(file_path) as image:
+                width, height = image.size
+                frame_count = getattr(image, "n_frames", 1)
+            self.logger.debug(f"Image dimensions: {width}x{height}, {frame_count} frame(s)")
             
-            if not text.strip():
-                self.logger.warning("No text extracted from image")
-                return None
-            
-            self.logger.info(f"Successfully extracted {len(text):,} characters")
-            return text
+            if pages is None:
+                frame_nums = list(range(frame_count))
+            else:
+                frame_nums = sorted(frame_num for frame_num in set(pages) if 0 <= frame_num < frame_count)
             
+            # Run OCR on every frame in the worker pool, yielding in frame order
+            futures = [
+                self.pool.submit(_ocr_image_frame, file_path, frame_num, control.page_budget())
+                for frame_num in frame_nums
+            ]
+            try:
+                for frame_num, future in zip(frame_nums, futures):
+                    try:
+                        result = wait_for(future, control)
+                    except OCRJobStopped as stopped:
+                        if not control.cancelled:
+                            control.mark_timed_out(frame_num)
+                            self.logger.warning(f"Frame {frame_num + 1} abandoned: {stopped}")
+                        continue
+                    
+                    if result["timed_out"]:
+                        control.mark_timed_out(frame_num)
+                        self.logger.warning(f"Frame {frame_num + 1} ran out of recognition time, skipped")
+                        continue
+                    
+                    text = result["text"]
+                    steps = ", ".join(f"{step[:-3]} {ms:.0f} ms" for step, ms in result["preprocess"].items())
+                    self.logger.debug(f"Frame {frame_num + 1} timing: {steps or 'no preprocessing'}, OCR {result['ocr_ms']:.0f} ms")
+                    
+                    if not text.strip():
+                        self.logger.debug(f"No text on frame {frame_num + 1}")
+                        continue
+                    
+                    yield OCRPage(
+                        index=frame_num,
+                        text=text,
+                        method=METHOD_OCR,
+                        provider=self.name,
+                        confidence=result["confidence"]
+                    )
+            finally:
+                for future in futures:
+                    future.cancel()
+        
         except Exception as e:
             self.logger.error(f"Image OCR error: {e}", exc_info=True)
-            return None
-
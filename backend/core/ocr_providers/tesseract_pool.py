@@ -0,0 +1,420 @@
+"""
+Tesseract Worker Pool
+Long-lived worker processes for Tesseract OCR.
+
+pytesseract forks a new `tesseract` process for every image, reloading the
+language model and writing temp files each time. This pool keeps its worker
+processes alive between pages, and each worker keeps a loaded `tesserocr`
+engine (PyTessBaseAPI), so per-page cost is just recognition time. If the
+tesserocr bindings cannot be installed the workers fall back to pytesseract,
+which still starts one tesseract process per page; a warning is logged when
+that happens.
+"""
+
+from typing import Optional, Dict, Any, Callable, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+import os
+import time
+import logging
+import functools
+import threading
+
+from .job_control import OCRPageTimeout
+
+logger = logging.getLogger("ExamPulse.OCR.TesseractPool")
+
+# Try to import Tesseract
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+    # Configure Tesseract path for Windows
+    TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+    if os.path.exists(TESSERACT_PATH):
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+# Try to import tesserocr (keeps the engine loaded between pages)
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Pool settings (configurable via .env)
+# OCR_WORKERS: number of long-lived OCR worker processes
+# OCR_POOL_HEALTH_INTERVAL: seconds between worker health checks (0 disables)
+# OCR_POOL_HEALTH_TIMEOUT: seconds a worker has to answer a health check
+# OCR_POOL_MAX_RESTARTS: restarts allowed within OCR_POOL_RESTART_WINDOW before the pool gives up
+# OCR_POOL_RESTART_WINDOW: seconds after which a restart no longer counts against the budget
+DEFAULT_OCR_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", DEFAULT_OCR_WORKERS))
+OCR_POOL_HEALTH_INTERVAL = float(os.getenv("OCR_POOL_HEALTH_INTERVAL", "60"))
+OCR_POOL_HEALTH_TIMEOUT = float(os.getenv("OCR_POOL_HEALTH_TIMEOUT", "10"))
+OCR_POOL_MAX_RESTARTS = int(os.getenv("OCR_POOL_MAX_RESTARTS", "5"))
+OCR_POOL_RESTART_WINDOW = float(os.getenv("OCR_POOL_RESTART_WINDOW", "3600"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+
+# Engine loaded once per worker process by _init_worker()
+_worker_api = None
+
+
+def _init_worker(lang: str) -> None:
+    """
+    Worker process initializer: load the Tesseract engine once.
+    
+    Args:
+        lang: Tesseract language code
+    """
+    global _worker_api
+    if TESSEROCR_AVAILABLE:
+        try:
+            _worker_api = tesserocr.PyTessBaseAPI(lang=lang)
+        except Exception as e:
+            logger.warning(f"Could not load tesserocr engine, using pytesseract: {e}")
+            _worker_api = None
+
+
+def recognize(image, lang: str = OCR_LANG) -> str:
+    """
+    Recognise text in an image.
+    
+    Inside a pool worker this uses the engine loaded by _init_worker();
+    elsewhere (or without tesserocr) it falls back to pytesseract.
+    
+    Args:
+        image: PIL image
+        lang: Tesseract language code
+    
+    Returns:
+        Recognised text (may be empty)
+    """
+    if _worker_api is not None:
+        _worker_api.SetImage(image)
+        return _worker_api.GetUTF8Text()
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def recognize_with_confidence(
+    image,
+    lang: str = OCR_LANG,
+    timeout: Optional[float] = None
+) -> Tuple[str, Optional[float]]:
+    """
+    Recognise text in an image and score how sure Tesseract was.
+    
+    Uses tesserocr's MeanTextConf() inside a pool worker; otherwise a single
+    pytesseract image_to_data() call, with the text rebuilt from its words.
+    
+    Args:
+        image: PIL image
+        lang: Tesseract language code
+        timeout: Seconds allowed for recognition (None = unlimited)
+    
+    Returns:
+        Tuple of (text, mean word confidence 0-100 or None if no words were found)
+    
+    Raises:
+        OCRPageTimeout: If recognition did not finish within timeout
+    """
+    if timeout is not None and timeout <= 0:
+        raise OCRPageTimeout("no time left for recognition")
+    
+    if _worker_api is not None:
+        _worker_api.SetImage(image)
+        # tesserocr stops recognition itself once the timeout (ms) passes
+        if not _worker_api.Recognize(timeout=int(timeout * 1000) if timeout else 0):
+            raise OCRPageTimeout(f"recognition exceeded {timeout:.0f}s")
+        text = _worker_api.GetUTF8Text()
+        return text, (float(_worker_api.MeanTextConf()) if text.strip() else None)
+    
+    try:
+        # pytesseract kills the tesseract process once the timeout passes
+        data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT, timeout=timeout or 0)
+    except RuntimeError as e:
+        if "timeout" in str(e).lower():
+            raise OCRPageTimeout(f"recognition exceeded {timeout:.0f}s") from e
+        raise
+    return _text_from_data(data)
+
+
+def _text_from_data(data: Dict[str, list]) -> Tuple[str, Optional[float]]:
+    """
+    Rebuild plain text and mean confidence from image_to_data() output.
+    
+    Words on the same line are joined with spaces, lines with newlines and
+    paragraphs with a blank line, matching image_to_string() layout.
+    
+    Args:
+        data: pytesseract.Output.DICT result
+    
+    Returns:
+        Tuple of (text, mean word confidence 0-100 or None if no words were found)
+    """
+    paragraphs = []
+    confidences = []
+    current_paragraph = None
+    current_line = None
+    
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        try:
+            confidence = float(data["conf"][i])
+        except (KeyError, ValueError, TypeError):
+            confidence = -1.0
+        if not word or confidence < 0:
+            continue
+        
+        paragraph_key = (data["block_num"][i], data["par_num"][i])
+        line_key = paragraph_key + (data["line_num"][i],)
+        if paragraph_key != current_paragraph:
+            paragraphs.append([])
+            current_paragraph = paragraph_key
+            current_line = None
+        if line_key != current_line:
+            paragraphs[-1].append([])
+            current_line = line_key
+        
+        paragraphs[-1][-1].append(word)
+        confidences.append(confidence)
+    
+    text = "\n\n".join("\n".join(" ".join(line) for line in lines) for lines in paragraphs)
+    mean_confidence = sum(confidences) / len(confidences) if confidences else None
+    return text, mean_confidence
+
+
+def pool_task(fn: Callable) -> Callable:
+    """
+    Decorate a worker entry point so its errors always reach the parent.
+    
+    An exception the parent cannot unpickle (pytesseract's
+    TesseractNotFoundError, for one) breaks the whole ProcessPoolExecutor,
+    so every exception is re-raised as a plain RuntimeError naming the
+    original type.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    return wrapper
+
+
+def _ping() -> Dict[str, Any]:
+    """Health check run inside a worker."""
+    return {"pid": os.getpid(), "engine": "tesserocr" if _worker_api is not None else "pytesseract"}
+
+
+class TesseractPool:
+    """
+    Pool of long-lived OCR worker processes.
+    
+    Workers are started lazily on first use. A crashed worker breaks the
+    underlying ProcessPoolExecutor; the pool notices (on the failed job or on
+    the next health check) and starts a fresh set of workers. It gives up only
+    after more than max_restarts crashes within restart_window seconds, and
+    recovers once older crashes fall out of the window. A result the parent
+    could not unpickle also breaks the executor, but no worker died, so that
+    restart is not counted. Health checks run on a background thread, never
+    on the submit path.
+    
+    Worker entry points should be decorated with pool_task().
+    """
+    
+    def __init__(
+        self,
+        size: int = OCR_WORKERS,
+        lang: str = OCR_LANG,
+        health_interval: float = OCR_POOL_HEALTH_INTERVAL,
+        health_timeout: float = OCR_POOL_HEALTH_TIMEOUT,
+        max_restarts: int = OCR_POOL_MAX_RESTARTS,
+        restart_window: float = OCR_POOL_RESTART_WINDOW,
+    ):
+        """
+        Initialize pool (no processes are started until the first job).
+        
+        Args:
+            size: Number of worker processes
+            lang: Tesseract language code loaded by each worker
+            health_interval: Seconds between health checks (0 disables)
+            health_timeout: Seconds a worker has to answer a health check
+            max_restarts: Restarts allowed within restart_window before the pool refuses new work
+            restart_window: Seconds a restart counts against max_restarts
+        """
+        self.size = max(1, size)
+        self.lang = lang
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.restarts = 0
+        self._restart_times: deque = deque()
+        self.jobs_submitted = 0
+        self._in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._broken = False
+        self._crashed = False
+        self._last_health_check = 0.0
+        self._health_thread: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+    
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        """Return a live executor, (re)starting workers if needed. Caller holds the lock."""
+        if self._executor is not None and self._broken:
+            if self._crashed:
+                self._restart_locked("worker crashed")
+            else:
+                self._restart_locked("a worker result could not be read", count=False)
+        
+        if self._executor is None:
+            if self._recent_restarts() > self.max_restarts:
+                raise RuntimeError(
+                    f"OCR worker pool exceeded {self.max_restarts} restarts in {self.restart_window:.0f}s"
+                )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                initializer=_init_worker,
+                initargs=(self.lang,),
+            )
+            self._broken = False
+            self._crashed = False
+            self._last_health_check = time.monotonic()
+            logger.info(f"Started OCR worker pool ({self.size} worker(s), engine: {'tesserocr' if TESSEROCR_AVAILABLE else 'pytesseract'})")
+            if not TESSEROCR_AVAILABLE:
+                logger.warning("tesserocr is not installed: OCR workers start a tesseract process per page")
+        
+        return self._executor
+    
+    def _recent_restarts(self) -> int:
+        """Restarts within the last restart_window seconds. Caller holds the lock."""
+        cutoff = time.monotonic() - self.restart_window
+        while self._restart_times and self._restart_times[0] < cutoff:
+            self._restart_times.popleft()
+        return len(self._restart_times)
+    
+    def _restart_locked(self, reason: str, count: bool = True) -> None:
+        """
+        Tear down the current workers so the next job starts fresh ones. Caller holds the lock.
+        
+        Args:
+            reason: Logged cause of the restart
+            count: Whether the restart counts against max_restarts (worker deaths and hangs do)
+        """
+        logger.warning(f"Restarting OCR worker pool: {reason}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._broken = False
+        self._crashed = False
+        self.restarts += 1
+        if count:
+            self._restart_times.append(time.monotonic())
+    
+    def _on_done(self, future: Future) -> None:
+        """Track completion and mark the pool broken if a job's executor broke."""
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._in_flight -= 1
+            if isinstance(error, BrokenProcessPool):
+                self._broken = True
+                # The executor attaches the unpickling error as the cause;
+                # a worker that died leaves none
+                if error.__cause__ is None:
+                    self._crashed = True
+    
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Submit a job to the pool.
+        
+        Args:
+            fn: Module-level (picklable) function to run in a worker
+            *args: Arguments for fn
+        
+        Returns:
+            Future for the job's result
+        """
+        with self._lock:
+            # Only health-check an idle pool, so the ping doesn't queue behind real work
+            if self.health_interval and self._in_flight == 0 and time.monotonic() - self._last_health_check > self.health_interval:
+                self._start_health_check()
+            
+            executor = self._ensure_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # Not counted only if _on_done() already found that no worker died
+                self._restart_locked("worker crashed", count=self._crashed or not self._broken)
+                future = self._ensure_executor().submit(fn, *args)
+            self.jobs_submitted += 1
+            self._in_flight += 1
+        
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def _start_health_check(self) -> None:
+        """Run health_check() on a background thread unless one is running. Caller holds the lock."""
+        if self._executor is None or (self._health_thread and self._health_thread.is_alive()):
+            return
+        self._last_health_check = time.monotonic()
+        self._health_thread = threading.Thread(target=self.health_check, name="ocr-pool-health", daemon=True)
+        self._health_thread.start()
+    
+    def health_check(self) -> bool:
+        """
+        Check that the workers respond, restarting them if not.
+        
+        Returns:
+            True if the pool answered within health_timeout
+        """
+        with self._lock:
+            if self._executor is None:
+                return True
+            self._last_health_check = time.monotonic()
+            executor = self._executor
+        
+        try:
+            executor.submit(_ping).result(timeout=self.health_timeout)
+            return True
+        except Exception as e:
+            with self._lock:
+                if isinstance(e, FuturesTimeout) and self._in_flight:
+                    # The ping queued behind jobs submitted after the check started
+                    return True
+                if self._executor is executor:
+                    self._restart_locked(f"health check failed ({type(e).__name__})")
+            return False
+    
+    def shutdown(self) -> None:
+        """Stop all workers."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool counters.
+        
+        Returns:
+            Dict with size, running, in_flight, engine, restarts (all
+            restarts), recent_restarts (crashes within the restart window)
+            and jobs_submitted
+        """
+        with self._lock:
+            recent_restarts = self._recent_restarts()
+        return {
+            "size": self.size,
+            "running": self._executor is not None,
+            "in_flight": self._in_flight,
+            "engine": "tesserocr" if TESSEROCR_AVAILABLE else "pytesseract",
+            "restarts": self.restarts,
+            "recent_restarts": recent_restarts,
+            "jobs_submitted": self.jobs_submitted,
+        }
+
+
+# Shared pool used by every provider that needs Tesseract
+tesseract_pool = TesseractPool()
@@ -0,0 +1,144 @@
+"""
+Text Layer Quality
+Fast scoring of a page's text layer, to catch PDFs whose text is junk.
+
+Some exam PDFs carry a broken text layer: CID-encoded glyphs with no
+Unicode mapping, ligature soup, or an invisible OCR layer left by a bad
+scanner. get_text() returns plenty of characters, so the page looks
+readable, but the extractor gets nothing useful out of it. Pages scoring
+below OCR_TEXT_QUALITY_THRESHOLD are rasterised and OCR'd instead.
+
+The score combines three cheap signals:
+- printable ratio: share of characters that are printable and not U+FFFD,
+  private-use or control characters
+- dictionary-word ratio: share of Latin-script words found in a small list
+  of common English and exam words
+- average token length: real text averages 2-10 characters per token
+
+The word list only knows English, so pages mostly in another script (Urdu,
+Arabic, Greek...) are scored without the word signal, and a text layer that
+still scores low is only replaced when OCR actually reads better (see
+PyMuPDFOCR), so clean French or Spanish layers survive.
+"""
+
+from typing import Dict, Any
+import os
+import re
+import unicodedata
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.OCR.TextQuality")
+
+# Text layers scoring below this (0-1) are OCR'd instead (configurable via .env, 0 disables)
+OCR_TEXT_QUALITY_THRESHOLD = float(os.getenv("OCR_TEXT_QUALITY_THRESHOLD", "0.6"))
+
+# Pages with fewer tokens than this are judged on the printable ratio alone
+MIN_TOKENS = 8
+
+# Dictionary-word ratio that counts as fully readable text; prose is usually
+# well above it, formula-heavy pages a little below
+WORD_RATIO_TARGET = 0.2
+
+# Weights of the word and token-length signals in the score
+WORD_WEIGHT = 0.6
+LENGTH_WEIGHT = 0.4
+
+# Unicode categories that never appear in a healthy text layer
+# (control, unassigned, private use, surrogate)
+BAD_CATEGORIES = {"Cc", "Cn", "Co", "Cs"}
+
+COMMON_WORDS = frozenset("""
+a about above after all also an and answer any are area as at be because been
+before below between both but by calculate can cell change compare define
+describe does draw each energy example explain find following for force form
+from function give given has have hence how identify if in into is it its law
+list mark marks mass may more most name no not number of on one only or other
+paper part point question questions reason show shown solve state such table
+than that the their then there these this time to total two under use used
+value was water were what when where which why will with write your
+""".split())
+
+# Share of words that must be in Latin script for the word signal to apply
+MIN_LATIN_SHARE = 0.5
+
+TOKEN_PATTERN = re.compile(r"\S+")
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+
+def _printable_ratio(text: str) -> float:
+    """Share of non-space characters that are real, printable text."""
+    chars = [c for c in text if not c.isspace()]
+    if not chars:
+        return 0.0
+    good = sum(
+        1 for c in chars
+        if c != "\ufffd" and unicodedata.category(c) not in BAD_CATEGORIES
+    )
+    return good / len(chars)
+
+
+def _is_latin(word: str) -> bool:
+    """True if every letter is from a Latin block (Basic Latin to Extended-B, or Extended Additional)."""
+    return all(ord(c) < 0x250 or 0x1E00 <= ord(c) <= 0x1EFF for c in word)
+
+
+def score_text(text: str) -> Dict[str, Any]:
+    """
+    Score how readable a page's text layer is.
+    
+    Args:
+        text: Text layer of one page
+    
+    Returns:
+        Dict with 'score' (0-1, higher is better), 'printable_ratio',
+        'word_ratio' (over Latin-script words), 'avg_token_length',
+        'tokens' and 'word_signal' (False when the page is mostly in
+        another script and was scored without the word ratio)
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    printable = _printable_ratio(text)
+    
+    if not tokens:
+        return {"score": 0.0, "printable_ratio": printable, "word_ratio": 0.0, "avg_token_length": 0.0, "tokens": 0, "word_signal": False}
+    
+    words = [match.lower() for token in tokens for match in WORD_PATTERN.findall(token)]
+    latin_words = [word for word in words if _is_latin(word)]
+    word_ratio = sum(1 for word in latin_words if word in COMMON_WORDS) / len(latin_words) if latin_words else 0.0
+    word_signal = bool(latin_words) and len(latin_words) >= MIN_LATIN_SHARE * len(words)
+    avg_length = sum(len(token) for token in tokens) / len(tokens)
+    
+    if len(tokens) < MIN_TOKENS:
+        score = printable
+    else:
+        # Full marks for 2-10 characters per token, falling off outside that
+        length_score = max(0.0, 1.0 - max(2.0 - avg_length, avg_length - 10.0, 0.0) / 10.0)
+        if word_signal:
+            word_score = min(1.0, word_ratio / WORD_RATIO_TARGET)
+            score = printable * (WORD_WEIGHT * word_score + LENGTH_WEIGHT * length_score)
+        else:
+            score = printable * length_score
+    
+    return {
+        "score": round(score, 3),
+        "printable_ratio": round(printable, 3),
+        "word_ratio": round(word_ratio, 3),
+        "avg_token_length": round(avg_length, 2),
+        "tokens": len(tokens),
+        "word_signal": word_signal,
+    }
+
+
+def is_usable(quality: Dict[str, Any]) -> bool:
+    """
+    Check a score_text() result against OCR_TEXT_QUALITY_THRESHOLD.
+    
+    Args:
+        quality: Result of score_text()
+    
+    Returns:
+        True if the text layer is good enough to use as is
+    """
+    return quality["score"] >= OCR_TEXT_QUALITY_THRESHOLD
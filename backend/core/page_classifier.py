@@ -0,0 +1,186 @@
+"""
+Page Classifier
+Tags OCR'd pages by what they contain, so only question pages reach the
+question extractor.
+
+Past papers often come with a marking scheme, a formula or data sheet and
+"This page is intentionally left blank" pages appended. Each numbered line
+on those pages used to become a "question" and cost a paid classification
+call. Pages are tagged from cheap text features (headings, answer grids,
+mark-scheme annotations, amount of text) before extraction, and only
+question pages go forward.
+
+Formula sheets are only recognised by their heading: a page dense with
+equations is just as likely to be the working space or "(b) Solve
+2x + 5 = 11" parts of a maths question that runs over from the page before.
+Likewise "M1" or "A1" inside a line is as often a mass or a spreadsheet
+cell as a mark: without a heading, a page is only an answer key when
+several lines end in annotations, and a page with a line the extractor
+would keep as a question is never skipped on those grounds.
+"""
+
+from typing import List, Dict, Any, Tuple
+from collections import Counter
+import os
+import re
+import logging
+from dotenv import load_dotenv
+
+from .ocr_providers import OCRPage
+from .question_extractor import BLOCK_QUESTION_START
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.PageClassifier")
+
+# Skip answer-key, formula-sheet and blank pages before extraction (configurable via .env)
+PAGE_FILTER_ENABLED = os.getenv("PAGE_FILTER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Page kinds
+PAGE_QUESTIONS = "questions"
+PAGE_ANSWER_KEY = "answer_key"
+PAGE_FORMULA_SHEET = "formula_sheet"
+PAGE_BLANK = "blank"
+
+# Lines at the top of a page searched for a heading, and the longest line
+# that still counts as one
+HEADING_LINES = 5
+HEADING_MAX_LENGTH = 60
+
+# Pages with fewer letters than this carry no questions
+MIN_LETTERS = 20
+
+# Shortest text after a question number that the extractor keeps as a question
+MIN_QUESTION_LENGTH = 15
+
+ANSWER_KEY_HEADING = re.compile(
+    r'\b(?:mark(?:ing)?\s+scheme|answer\s+key|model\s+answers?|key\s+to\s+answers|'
+    r'answers?\s+(?:sheet|grid)|worked\s+solutions?|examiner\'?s?\s+(?:report|notes?))\b',
+    re.IGNORECASE
+)
+FORMULA_SHEET_HEADING = re.compile(
+    r'\b(?:formula(?:e|s)?\s+sheet|list\s+of\s+formula(?:e|s)?|data\s+sheet|'
+    r'(?:useful\s+)?formula(?:e|s)?\s+and\s+data|periodic\s+table)\b',
+    re.IGNORECASE
+)
+BLANK_NOTICE = re.compile(r'\b(?:left\s+blank|blank\s+page)\b', re.IGNORECASE)
+
+# "12. B", "12 (c)" - one line of an MCQ answer grid
+ANSWER_GRID_LINE = re.compile(r'^\(?\d{1,3}[\.\):]?\)?\s*\(?[A-Ea-e]\)?$')
+
+# Mark-scheme annotations ending a line: "x = 3 M1 A1" (method/accuracy/
+# independent marks). "[2]" is not one - question papers print mark
+# allocations that way too.
+MARK_ANNOTATION_END = re.compile(r'(?:^|\s)[MAB][01](?:\s+[MAB][01])*\s*$')
+
+# Share of lines that must look like an answer grid / end in mark annotations,
+# and the fewest annotated lines that make a mark scheme
+ANSWER_GRID_RATIO = 0.4
+ANNOTATION_RATIO = 0.3
+ANNOTATION_MIN_LINES = 3
+
+
+def classify_page(text: str) -> str:
+    """
+    Tag a page from its text.
+    
+    Args:
+        text: OCR text of one page
+    
+    Returns:
+        PAGE_QUESTIONS, PAGE_ANSWER_KEY, PAGE_FORMULA_SHEET or PAGE_BLANK
+    """
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    letters = sum(1 for c in text if c.isalpha())
+    
+    if not lines:
+        return PAGE_BLANK
+    
+    # "This page is intentionally left blank" with little else on the page
+    if len(lines) <= 4 and letters <= 4 * MIN_LETTERS and BLANK_NOTICE.search(text):
+        return PAGE_BLANK
+    
+    headings = [
+        line for line in lines[:HEADING_LINES]
+        if len(line) <= HEADING_MAX_LENGTH and not BLOCK_QUESTION_START.match(line)
+    ]
+    if any(ANSWER_KEY_HEADING.search(line) for line in headings):
+        return PAGE_ANSWER_KEY
+    if any(FORMULA_SHEET_HEADING.search(line) for line in headings):
+        return PAGE_FORMULA_SHEET
+    
+    # Without a heading, a page with a question on it is a question page
+    if not any(_looks_like_question(line) for line in lines):
+        # Mostly "1. B" lines: an MCQ answer grid
+        if sum(1 for line in lines if ANSWER_GRID_LINE.match(line)) >= ANSWER_GRID_RATIO * len(lines):
+            return PAGE_ANSWER_KEY
+        
+        # Mark-scheme lines end in M1 / A1 / B1 annotations
+        annotated = sum(1 for line in lines if MARK_ANNOTATION_END.search(line))
+        if annotated >= ANNOTATION_MIN_LINES and annotated >= ANNOTATION_RATIO * len(lines):
+            return PAGE_ANSWER_KEY
+    
+    # Stray marks, page numbers or scanner noise
+    if letters < MIN_LETTERS:
+        return PAGE_BLANK
+    
+    return PAGE_QUESTIONS
+
+
+def _looks_like_question(line: str) -> bool:
+    """True if the extractor would turn this line into a question."""
+    match = BLOCK_QUESTION_START.match(line)
+    return bool(match) and len(line[match.end():].strip()) > MIN_QUESTION_LENGTH
+
+
+def filter_question_pages(pages: List[OCRPage]) -> Tuple[List[OCRPage], Dict[str, Any]]:
+    """
+    Keep only the pages of one document that contain questions.
+    
+    If no page looks like a question page, every page is kept so the
+    extractor still gets a chance at the document. Pages are read in a
+    single pass, so a PageSpool works as well as a list; only the kept
+    pages are collected in memory.
+    
+    Args:
+        pages: Pages of one document (after header/footer stripping)
+    
+    Returns:
+        Tuple of (question pages, stats dict with 'pages', 'question_pages',
+        'skipped' (count per kind), 'skipped_pages' (1-based page and kind)
+        and 'ai_calls_saved' (numbered lines with question-length text on
+        skipped pages, each of which would have become a question to classify))
+    """
+    stats = {"pages": len(pages), "question_pages": len(pages), "skipped": {}, "skipped_pages": [], "ai_calls_saved": 0}
+    if not PAGE_FILTER_ENABLED or not pages:
+        return pages, stats
+    
+    kept = []
+    skipped_pages = []
+    ai_calls_saved = 0
+    for page in pages:
+        kind = classify_page(page.text)
+        if kind == PAGE_QUESTIONS:
+            kept.append(page)
+            continue
+        skipped_pages.append({"page": page.index + 1, "kind": kind})
+        ai_calls_saved += sum(1 for line in page.text.split('\n') if _looks_like_question(line.strip()))
+    
+    if not kept:
+        logger.warning("No page looks like a question page, keeping all pages")
+        return pages, stats
+    
+    stats.update(
+        question_pages=len(kept),
+        skipped=dict(Counter(skipped["kind"] for skipped in skipped_pages)),
+        skipped_pages=skipped_pages,
+        ai_calls_saved=ai_calls_saved,
+    )
+    
+    if skipped_pages:
+        logger.info(
+            f"Skipped {len(skipped_pages)} of {len(pages)} page(s) before extraction "
+            f"({', '.join(f'{count} {kind}' for kind, count in stats['skipped'].items())}), "
+            f"saving ~{stats['ai_calls_saved']} classification call(s)"
+        )
+    return kept, stats
@@ -4,8 +4,11 @@ Extracts and cleans questions from OCR text.
 
 Key Features:
 - Watermark/Noise Removal: Filters out footer text, watermarks, and boilerplate
+  (skipped when core/header_footer.py already stripped repeated lines)
 - MCQ Option Reconstruction: Converts inline options (A. Time B. Force) to multi-line format
 - Context-Aware Extraction: Uses multi-file context for better accuracy
+- Structured Extraction: Splits questions on paragraph blocks from the PDF layout
+  (see core/ocr_providers/layout.py) instead of re-joining broken lines
 
 Example MCQ Transformation:
   Before: "Which of the following is a base physical quantity? A. Time B. Force C. Density D. Velocity"
@@ -14,13 +17,28 @@ Example MCQ Transformation:
 
 import re
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Set up logger
 logger = logging.getLogger("ExamPulse.QuestionExtractor")
 
+# Start of a question in a layout block: "Question 3", "Q3." or "3." / "3)"
+BLOCK_QUESTION_START = re.compile(
+    r'^(?:(?:Question\s+|Q\.?\s*)(\d{1,2})[\.\):]?|([1-9]\d?)[\.\)])(?:\s+|$)',
+    re.IGNORECASE
+)
 
-def extract_questions_with_context(ocr_text: str, global_context: List[str] = None) -> List[Dict[str, Any]]:
+# How far (points) right of a page's left margin a "3." block may start and
+# still count as a question number rather than a numbered list item
+QUESTION_MARGIN_TOLERANCE = 24.0
+
+
+def extract_questions_with_context(
+    ocr_text: str,
+    global_context: List[str] = None,
+    blocks: Optional[List[Dict[str, Any]]] = None,
+    remove_watermarks: bool = True
+) -> List[Dict[str, Any]]:
     """
     Extract questions from OCR text with multi-file context.
     
@@ -33,42 +51,48 @@ def extract_questions_with_context(ocr_text: str, global_context: List[str] = No
     Args:
         ocr_text: Text extracted from OCR (can be combined from multiple files)
         global_context: Optional list of all file texts for context-aware extraction
+        blocks: Optional layout blocks for the same text (see blocks_from_pages());
+            when given, questions are split on blocks and line re-joining is skipped
+        remove_watermarks: Run the per-line watermark keyword filter; pass False
+            when repeated headers/footers were already stripped per document
     
     Returns:
         List of extracted questions with raw text
         Each question dict contains: {'text': str, 'raw_text': str, 'question_number': int, 'marks': int|None}
+        (plus 'page' and 'bbox' of the first block when extracted from blocks)
     """
     if not ocr_text or not ocr_text.strip():
         logger.warning("Empty OCR text provided")
         return []
     
-    # If global context provided, use it for better normalization
-    if global_context and len(global_context) > 1:
-        logger.info(f"Using multi-file context: {len(global_context)} files")
-        # Normalize with context awareness
-        normalized_text = _normalize_ocr_text_with_context(ocr_text, global_context)
-    else:
-        # Single file - use standard normalization
-        normalized_text = _normalize_ocr_text(ocr_text)
+    questions = _extract_questions_from_blocks(blocks, remove_watermarks) if blocks else []
     
-    logger.info(f"Extracting questions from text ({len(normalized_text):,} characters)")
-    
-    # Save first 500 characters for debugging
-    sample_text = normalized_text[:500].replace('\n', '\\n')
-    logger.debug(f"Normalized text sample (first 500 chars): {sample_text}")
-    
-    questions = []
-    
-    # Split text into lines for better processing
-    lines = normalized_text.split('\n')
-    
-    # Use line-based extraction which is more reliable
-    questions = _extract_questions_line_based(lines)
-    
-    # If line-based didn't work, try simpler approach
     if not questions:
-        logger.info("Line-based extraction found no questions, trying simple extraction...")
-        questions = _extract_questions_simple(normalized_text)
+        # If global context provided, use it for better normalization
+        if global_context and len(global_context) > 1:
+            logger.info(f"Using multi-file context: {len(global_context)} files")
+            # Normalize with context awareness
+            normalized_text = _normalize_ocr_text_with_context(ocr_text, global_context, remove_watermarks)
+        else:
+            # Single file - use standard normalization
+            normalized_text = _normalize_ocr_text(ocr_text, remove_watermarks)
+        
+        logger.info(f"Extracting questions from text ({len(normalized_text):,} characters)")
+        
+        # Save first 500 characters for debugging
+        sample_text = normalized_text[:500].replace('\n', '\\n')
+        logger.debug(f"Normalized text sample (first 500 chars): {sample_text}")
+        
+        # Split text into lines for better processing
+        lines = normalized_text.split('\n')
+        
+        # Use line-based extraction which is more reliable
+        questions = _extract_questions_line_based(lines)
+        
+        # If line-based didn't work, try simpler approach
+        if not questions:
+            logger.info("Line-based extraction found no questions, trying simple extraction...")
+            questions = _extract_questions_simple(normalized_text)
     
     # Remove duplicates (same question number) - especially important for multi-file
     seen_numbers = set()
@@ -106,7 +130,11 @@ def extract_questions_with_context(ocr_text: str, global_context: List[str] = No
     return unique_questions
 
 
-def extract_questions(ocr_text: str) -> List[Dict[str, Any]]:
+def extract_questions(
+    ocr_text: str,
+    blocks: Optional[List[Dict[str, Any]]] = None,
+    remove_watermarks: bool = True
+) -> List[Dict[str, Any]]:
     """
     Extract questions from OCR text.
     
@@ -117,37 +145,45 @@ def extract_questions(ocr_text: str) -> List[Dict[str, Any]]:
     
     Args:
         ocr_text: Text extracted from OCR
+        blocks: Optional layout blocks for the same text (see blocks_from_pages());
+            when given, questions are split on blocks and the heuristic
+            line-joining pass is skipped. Falls back to the text if no
+            question is found in the blocks.
+        remove_watermarks: Run the per-line watermark keyword filter; pass False
+            when repeated headers/footers were already stripped per document
     
     Returns:
         List of extracted questions with raw text
         Each question dict contains: {'text': str, 'raw_text': str, 'question_number': int, 'marks': int|None}
+        (plus 'page' and 'bbox' of the first block when extracted from blocks)
     """
     if not ocr_text or not ocr_text.strip():
         logger.warning("Empty OCR text provided")
         return []
     
-    logger.info(f"Extracting questions from text ({len(ocr_text):,} characters)")
-    
-    # Step 1: Normalize OCR text (fix spacing, broken lines, etc.)
-    normalized_text = _normalize_ocr_text(ocr_text)
-    logger.debug(f"Normalized text length: {len(normalized_text):,} characters")
-    
-    # Save first 500 characters for debugging
-    sample_text = normalized_text[:500].replace('\n', '\\n')
-    logger.debug(f"Normalized text sample (first 500 chars): {sample_text}")
-    
-    questions = []
+    questions = _extract_questions_from_blocks(blocks, remove_watermarks) if blocks else []
     
-    # Split text into lines for better processing
-    lines = normalized_text.split('\n')
-    
-    # Use line-based extraction which is more reliable
-    questions = _extract_questions_line_based(lines)
-    
-    # If line-based didn't work, try simpler approach
     if not questions:
-        logger.info("Line-based extraction found no questions, trying simple extraction...")
-        questions = _extract_questions_simple(normalized_text)
+        logger.info(f"Extracting questions from text ({len(ocr_text):,} characters)")
+        
+        # Step 1: Normalize OCR text (fix spacing, broken lines, etc.)
+        normalized_text = _normalize_ocr_text(ocr_text, remove_watermarks)
+        logger.debug(f"Normalized text length: {len(normalized_text):,} characters")
+        
+        # Save first 500 characters for debugging
+        sample_text = normalized_text[:500].replace('\n', '\\n')
+        logger.debug(f"Normalized text sample (first 500 chars): {sample_text}")
+        
+        # Split text into lines for better processing
+        lines = normalized_text.split('\n')
+        
+        # Use line-based extraction which is more reliable
+        questions = _extract_questions_line_based(lines)
+        
+        # If line-based didn't work, try simpler approach
+        if not questions:
+            logger.info("Line-based extraction found no questions, trying simple extraction...")
+            questions = _extract_questions_simple(normalized_text)
     
     # Remove duplicates (same question number)
     seen_numbers = set()
@@ -502,20 +538,173 @@ def _extract_questions_simple(ocr_text: str) -> List[Dict[str, Any]]:
     return questions
 
 
-def _remove_watermark_lines(lines: List[str]) -> List[str]:
+def blocks_from_pages(pages: List[Any], remove_watermarks: bool = True) -> Optional[List[Dict[str, Any]]]:
     """
-    Remove watermark, footer, and noise lines from OCR text.
+    Collect layout blocks for structured extraction from OCR pages.
     
-    Removes lines containing:
-    - Watermark keywords (AKU-EB, Examinations, Teaching & Learning, etc.)
-    - Page numbers (Page X of Y format)
-    - Mostly uppercase boilerplate (> 20 chars, no digits, no lowercase)
+    Text-layer pages contribute their paragraph blocks as they are. Pages
+    without blocks (scanned pages) are normalized and contribute one block per
+    line, without position metadata.
     
     Args:
-        lines: List of text lines
+        pages: OCRPage objects in page order (from run_best_ocr_pages())
+        remove_watermarks: Run the per-line watermark keyword filter on scanned pages
     
     Returns:
-        Filtered list of lines with watermarks removed
+        Blocks in reading order, or None if no page has layout blocks (the
+        caller should then extract from plain text)
+    """
+    if not any(getattr(page, 'blocks', None) for page in pages):
+        return None
+    
+    blocks = []
+    for page in pages:
+        if page.blocks:
+            blocks.extend(page.blocks)
+            continue
+        for line in _normalize_ocr_text(page.text, remove_watermarks).split('\n'):
+            if line.strip():
+                blocks.append({'page': page.index, 'bbox': None, 'text': line.strip(), 'font_size': None, 'bold': False})
+    
+    return blocks
+
+
+def _make_question(question_num: int, parts: List[str], first_block: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build a question dict from the paragraphs of one question (None if too short)."""
+    question_text = '\n'.join(parts).strip()
+    if len(question_text) <= 15:
+        return None
+    
+    marks_match = re.search(r'\((\d+)\s*marks?\)', question_text, re.IGNORECASE)
+    cleaned_text = clean_question_text(question_text)
+    if not cleaned_text:
+        return None
+    
+    return {
+        'question_number': question_num,
+        'marks': int(marks_match.group(1)) if marks_match else None,
+        'text': cleaned_text,
+        'raw_text': question_text,
+        'page': first_block.get('page'),
+        'bbox': first_block.get('bbox')
+    }
+
+
+def _extract_questions_from_blocks(blocks: List[Dict[str, Any]], remove_watermarks: bool = True) -> List[Dict[str, Any]]:
+    """
+    Extract questions from layout blocks.
+    
+    Each block is a paragraph, so a question starts at a block that begins
+    with a question number and runs until the next one; no lines need to be
+    re-joined. A bare "3." block only counts when it sits at the page's left
+    margin, which keeps indented numbered lists inside a question together.
+    Lines of scanned pages have no position, so a bare "3." there is judged
+    by the text pass's rules instead (see _bare_number_starts_question()).
+    
+    Args:
+        blocks: Layout blocks in reading order (see blocks_from_pages())
+        remove_watermarks: Drop watermark blocks with the per-line keyword filter
+    
+    Returns:
+        List of extracted questions (empty if no question start was found)
+    """
+    # A block is a whole paragraph, so never drop one that starts a question
+    blocks = [
+        block for block in blocks
+        if block['text'].strip()
+        and (not remove_watermarks or BLOCK_QUESTION_START.match(block['text'].strip()) or not _is_watermark_line(block['text'].strip()))
+    ]
+    
+    # Left margin of each page, from blocks that have a position. Pages are
+    # told apart by runs of the same page index, since blocks from several
+    # files reuse the same indices.
+    margins: List[Optional[float]] = []
+    page_of_block: List[int] = []
+    for position, block in enumerate(blocks):
+        if position == 0 or block['page'] != blocks[position - 1]['page']:
+            margins.append(None)
+        page_of_block.append(len(margins) - 1)
+        if block.get('bbox'):
+            x0 = block['bbox'][0]
+            margins[-1] = x0 if margins[-1] is None else min(margins[-1], x0)
+    
+    questions = []
+    question_num = None
+    first_block = None
+    parts: List[str] = []
+    
+    for position, block in enumerate(blocks):
+        text = block['text'].strip()
+        match = BLOCK_QUESTION_START.match(text)
+        
+        if match:
+            detected_num = int(match.group(1) or match.group(2))
+            if detected_num == 0 or detected_num > 50:
+                match = None
+            elif match.group(2) and block.get('bbox'):
+                if block['bbox'][0] > margins[page_of_block[position]] + QUESTION_MARGIN_TOLERANCE:
+                    match = None
+            elif match.group(2):
+                previous = blocks[position - 1]['text'] if position else None
+                if not _bare_number_starts_question(text, previous):
+                    match = None
+        
+        if match:
+            if question_num is not None:
+                question = _make_question(question_num, parts, first_block)
+                if question:
+                    questions.append(question)
+            question_num = detected_num
+            first_block = block
+            rest = text[match.end():].strip()
+            parts = [rest] if rest else []
+        elif question_num is not None:
+            parts.append(text)
+        # Blocks before the first question are headers/instructions - skip them
+    
+    if question_num is not None:
+        question = _make_question(question_num, parts, first_block)
+        if question:
+            questions.append(question)
+    
+    logger.info(f"Block-based extraction found {len(questions)} questions in {len(blocks)} blocks")
+    return questions
+
+
+def _bare_number_starts_question(line: str, previous_line: Optional[str]) -> bool:
+    """
+    Decide whether a "3." / "3)" line without position metadata starts a question.
+    
+    Applies the same rules as _extract_questions_line_based(): the number
+    needs five characters of text after it, not following a line that ends
+    in a digit (a decimal or list) and not being a short line after one that
+    ends in punctuation (a list item); a capital letter straight after the
+    number always counts.
+    
+    Args:
+        line: Stripped line starting with a number
+        previous_line: Line before it (None at the start of the document)
+    
+    Returns:
+        True if the line starts a question
+    """
+    previous = (previous_line or "").strip()
+    if re.match(r'^([1-9]\d{0,1})[\.\)]\s+(.{5,})', line):
+        continued = previous and (previous[-1].isdigit() or (previous[-1] in '.,;:' and len(line) < 20))
+        if not continued:
+            return True
+    return bool(re.match(r'^([1-9]\d{0,1})[\.\)]\s*([A-Z])', line))
+
+
+def _is_watermark_line(line_stripped: str) -> bool:
+    """
+    Check whether a single non-empty line is a watermark, footer or boilerplate.
+    
+    Args:
+        line_stripped: Stripped, non-empty line
+    
+    Returns:
+        True if the line should be dropped
     """
     watermark_keywords = [
         'aku-eb',
@@ -525,6 +714,50 @@ def _remove_watermark_lines(lines: List[str]) -> List[str]:
         'page',
     ]
     
+    line_lower = line_stripped.lower()
+    
+    # Check for watermark keywords
+    for keyword in watermark_keywords:
+        if keyword in line_lower:
+            # Special handling for "Page" - only remove if it's "Page X of Y" format
+            if keyword == 'page':
+                if re.search(r'page\s+\d+\s+(of|/)\s+\d+', line_lower):
+                    return True
+            else:
+                return True
+    
+    # Check for mostly uppercase boilerplate (no digits, no lowercase, > 20 chars)
+    if len(line_stripped) > 20:
+        # Count uppercase, lowercase, digits
+        upper_count = sum(1 for c in line_stripped if c.isupper())
+        lower_count = sum(1 for c in line_stripped if c.islower())
+        digit_count = sum(1 for c in line_stripped if c.isdigit())
+        total_chars = len([c for c in line_stripped if c.isalnum()])
+        
+        if total_chars > 0:
+            upper_ratio = upper_count / total_chars
+            # If > 80% uppercase, no lowercase, and no digits -> likely boilerplate
+            if upper_ratio > 0.8 and lower_count == 0 and digit_count == 0:
+                return True
+    
+    return False
+
+
+def _remove_watermark_lines(lines: List[str]) -> List[str]:
+    """
+    Remove watermark, footer, and noise lines from OCR text.
+    
+    Removes lines containing:
+    - Watermark keywords (AKU-EB, Examinations, Teaching & Learning, etc.)
+    - Page numbers (Page X of Y format)
+    - Mostly uppercase boilerplate (> 20 chars, no digits, no lowercase)
+    
+    Args:
+        lines: List of text lines
+    
+    Returns:
+        Filtered list of lines with watermarks removed
+    """
     filtered_lines = []
     removed_count = 0
     
@@ -534,42 +767,11 @@ def _remove_watermark_lines(lines: List[str]) -> List[str]:
             filtered_lines.append(line)  # Keep empty lines
             continue
         
-        line_lower = line_stripped.lower()
-        
-        # Check for watermark keywords
-        is_watermark = False
-        for keyword in watermark_keywords:
-            if keyword in line_lower:
-                # Special handling for "Page" - only remove if it's "Page X of Y" format
-                if keyword == 'page':
-                    if re.search(r'page\s+\d+\s+(of|/)\s+\d+', line_lower):
-                        is_watermark = True
-                        break
-                else:
-                    is_watermark = True
-                    break
-        
-        if is_watermark:
+        if _is_watermark_line(line_stripped):
             removed_count += 1
             logger.debug(f"Removed watermark line: {line_stripped[:80]}")
             continue
         
-        # Check for mostly uppercase boilerplate (no digits, no lowercase, > 20 chars)
-        if len(line_stripped) > 20:
-            # Count uppercase, lowercase, digits
-            upper_count = sum(1 for c in line_stripped if c.isupper())
-            lower_count = sum(1 for c in line_stripped if c.islower())
-            digit_count = sum(1 for c in line_stripped if c.isdigit())
-            total_chars = len([c for c in line_stripped if c.isalnum()])
-            
-            if total_chars > 0:
-                upper_ratio = upper_count / total_chars
-                # If > 80% uppercase, no lowercase, and no digits -> likely boilerplate
-                if upper_ratio > 0.8 and lower_count == 0 and digit_count == 0:
-                    removed_count += 1
-                    logger.debug(f"Removed boilerplate line: {line_stripped[:80]}")
-                    continue
-        
         # Keep the line
         filtered_lines.append(line)
     
@@ -640,7 +842,7 @@ def _reconstruct_mcq_options(question_text: str) -> str:
     return question_text
 
 
-def _normalize_ocr_text(ocr_text: str) -> str:
+def _normalize_ocr_text(ocr_text: str, remove_watermarks: bool = True) -> str:
     """
     Normalize OCR text to fix common issues.
     
@@ -653,6 +855,8 @@ def _normalize_ocr_text(ocr_text: str) -> str:
     
     Args:
         ocr_text: Raw OCR text
+        remove_watermarks: Remove watermark/footer lines by keyword (False when
+            repeated lines were already stripped per document)
     
     Returns:
         Normalized text
@@ -662,7 +866,8 @@ def _normalize_ocr_text(ocr_text: str) -> str:
     
     # Step 0: Remove watermark/noise lines first
     lines = ocr_text.split('\n')
-    lines = _remove_watermark_lines(lines)
+    if remove_watermarks:
+        lines = _remove_watermark_lines(lines)
     
     # Step 1: Fix line breaks - join lines that are clearly part of the same sentence
     normalized_lines = []
@@ -725,7 +930,7 @@ def _normalize_ocr_text(ocr_text: str) -> str:
     return text
 
 
-def _normalize_ocr_text_with_context(ocr_text: str, global_context: List[str]) -> str:
+def _normalize_ocr_text_with_context(ocr_text: str, global_context: List[str], remove_watermarks: bool = True) -> str:
     """
     Normalize OCR text with multi-file context awareness.
     
@@ -737,6 +942,7 @@ def _normalize_ocr_text_with_context(ocr_text: str, global_context: List[str]) -
     Args:
         ocr_text: Current file's OCR text
         global_context: List of all file texts for pattern detection
+        remove_watermarks: Remove watermark/footer lines by keyword
     
     Returns:
         Normalized text with context-aware improvements
@@ -745,7 +951,7 @@ def _normalize_ocr_text_with_context(ocr_text: str, global_context: List[str]) -
         return ""
     
     # First, normalize the current text
-    normalized = _normalize_ocr_text(ocr_text)
+    normalized = _normalize_ocr_text(ocr_text, remove_watermarks)
     
     # Analyze patterns across all files to improve normalization
     # Extract common question patterns from all files
@@ -798,9 +1004,10 @@ def _normalize_ocr_text_with_context(ocr_text: str, global_context: List[str]) -
     improved_text = re.sub(r'---\s*FILE:.*?---\s*', '', improved_text, flags=re.IGNORECASE)  # Remove file headers
     
     # Remove watermark lines from improved text
-    lines = improved_text.split('\n')
-    lines = _remove_watermark_lines(lines)
-    improved_text = '\n'.join(lines)
+    if remove_watermarks:
+        lines = improved_text.split('\n')
+        lines = _remove_watermark_lines(lines)
+        improved_text = '\n'.join(lines)
     
     return improved_text.strip()
 
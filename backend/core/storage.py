@@ -0,0 +1,260 @@
+"""
+Upload Storage Manager
+Placement, quotas and eviction of raw uploads.
+
+UPLOAD_DIR used to grow forever in one flat directory. Uploads are now
+stored in hash-prefix shard directories (uploads/ab/cd/<file_id>_<name>),
+so no directory gets large. A sweeper deletes raw files once they are no
+longer needed:
+- uploads unused for UPLOAD_MAX_AGE_DAYS
+- least-recently-used uploads while the total is over UPLOAD_QUOTA_MB
+
+A file is only evicted when its whole-document OCR result is in the OCR
+cache, because analysis can then be served without the original. The
+upload keeps its index record (marked evicted), so its file_id keeps
+working. Files pinned by an in-flight OCR or analysis job are never
+evicted.
+
+Open resumable upload sessions count toward UPLOAD_QUOTA_MB with their
+full declared size from the moment they start, so sessions cannot
+together outgrow the quota before any of them is finalised.
+"""
+
+from typing import Optional, Dict, Any
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+import os
+import time
+import asyncio
+import logging
+import threading
+from dotenv import load_dotenv
+
+from .ocr import is_ocr_cached
+from .upload_index import upload_index, UPLOAD_DIR, UPLOAD_STAGING_DIR
+from .upload_sessions import upload_sessions
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.Storage")
+
+# Storage lifecycle (configurable via .env, 0 disables each)
+# UPLOAD_QUOTA_MB: total size of stored raw uploads and open upload sessions before LRU eviction (and refused uploads)
+# UPLOAD_MAX_AGE_DAYS: raw uploads unused for this long are evicted
+# UPLOAD_SWEEP_INTERVAL: seconds between background sweeps
+UPLOAD_QUOTA_BYTES = int(os.getenv("UPLOAD_QUOTA_MB", "2048")) * 1024 * 1024
+UPLOAD_MAX_AGE_SECONDS = float(os.getenv("UPLOAD_MAX_AGE_DAYS", "30")) * 24 * 3600
+UPLOAD_SWEEP_INTERVAL = float(os.getenv("UPLOAD_SWEEP_INTERVAL", "600"))
+
+# Shard directories: two levels of two hex characters (65,536 leaf directories)
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+
+def shard_dir(content_hash: str) -> Path:
+    """
+    Shard directory of an upload, from its content hash.
+    
+    Args:
+        content_hash: SHA-256 hex digest of the file
+    
+    Returns:
+        e.g. UPLOAD_DIR/ab/cd for a hash starting "abcd"
+    """
+    parts = [content_hash[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return UPLOAD_DIR.joinpath(*parts)
+
+
+class StorageManager:
+    """
+    Places uploads in shard directories and evicts them under quota/age rules.
+    
+    Jobs pin the files they read with pin(); pins and evictions share one
+    lock, so a file cannot be deleted between a job's check and its pin.
+    """
+    
+    def __init__(self, quota_bytes: int = UPLOAD_QUOTA_BYTES, max_age_seconds: float = UPLOAD_MAX_AGE_SECONDS):
+        """
+        Initialize storage manager.
+        
+        Args:
+            quota_bytes: Total size of stored uploads allowed (0 = unlimited)
+            max_age_seconds: Unused time after which an upload is evicted (0 = never)
+        """
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evicted_bytes = 0
+        self.sweeps = 0
+        self._pins = Counter()
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+        UPLOAD_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    
+    def place(self, staged_path: Path, content_hash: str) -> Path:
+        """
+        Move a fully received upload into its shard directory.
+        
+        Args:
+            staged_path: Upload in UPLOAD_STAGING_DIR
+            content_hash: SHA-256 hex digest of the file
+        
+        Returns:
+            Final path of the file
+        """
+        directory = shard_dir(content_hash)
+        directory.mkdir(parents=True, exist_ok=True)
+        final_path = directory / staged_path.name
+        os.replace(staged_path, final_path)
+        return final_path
+    
+    @contextmanager
+    def pin(self, file_path: str):
+        """
+        Keep a file from being evicted while a job reads it.
+        
+        Args:
+            file_path: Absolute path of the stored file
+        """
+        with self._lock:
+            self._pins[file_path] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[file_path] -= 1
+                if self._pins[file_path] <= 0:
+                    del self._pins[file_path]
+    
+    def _evict(self, record: Dict[str, Any], reason: str) -> bool:
+        """Delete a stored upload unless it is pinned; its record is kept, marked evicted."""
+        with self._lock:
+            if self._pins.get(record["path"]):
+                return False
+            try:
+                Path(record["path"]).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not evict {record['path']}: {e}")
+                return False
+            upload_index.mark_evicted(record["file_id"])
+            self.evicted_bytes += record["size"]
+        logger.info(f"Evicted {record['filename']} ({record['file_id']}, {record['size']:,} bytes): {reason}")
+        return True
+    
+    def sweep(self) -> Dict[str, Any]:
+        """
+        Evict uploads past UPLOAD_MAX_AGE_DAYS, then least-recently-used
+        uploads until the total, with the space reserved by open upload
+        sessions, fits under UPLOAD_QUOTA_MB.
+        
+        Only uploads whose OCR result is cached and that are not pinned are
+        considered.
+        
+        Returns:
+            Dict with 'evicted' (count), 'freed_bytes' and 'bytes' (stored
+            after the sweep)
+        """
+        now = time.time()
+        records = upload_index.live_files()
+        total = sum(record["size"] for record in records)
+        reserved = upload_sessions.reserved_bytes()
+        evicted = 0
+        freed = 0
+        
+        for record in records:
+            last_used = record["last_used_at"] or record["uploaded_at"]
+            expired = self.max_age_seconds and now - last_used > self.max_age_seconds
+            over_quota = self.quota_bytes and total + reserved > self.quota_bytes
+            if not (expired or over_quota):
+                continue
+            if not is_ocr_cached(record["sha256"]):
+                continue
+            if self._evict(record, "unused too long" if expired else "over upload quota"):
+                evicted += 1
+                freed += record["size"]
+                total -= record["size"]
+        
+        with self._lock:
+            self.sweeps += 1
+        if self.quota_bytes and total + reserved > self.quota_bytes:
+            logger.warning(f"Uploads use {total:,} bytes (+{reserved:,} reserved by upload sessions), over the {self.quota_bytes:,} byte quota, and nothing more can be evicted")
+        if evicted:
+            logger.info(f"Storage sweep evicted {evicted} upload(s), freed {freed:,} bytes ({total:,} bytes stored)")
+        return {"evicted": evicted, "freed_bytes": freed, "bytes": total}
+    
+    def _fits(self, stored_bytes: int, extra_bytes: int, exclude_session: Optional[str]) -> bool:
+        used = stored_bytes + upload_sessions.reserved_bytes(exclude=exclude_session)
+        # Without a known size, any space left at all counts as room
+        if not extra_bytes:
+            return used < self.quota_bytes
+        return used + extra_bytes <= self.quota_bytes
+    
+    def has_room(self, extra_bytes: int = 0, exclude_session: Optional[str] = None) -> bool:
+        """
+        Check whether an upload fits under the quota, sweeping first if not.
+        
+        Stored uploads and the declared sizes of open upload sessions both
+        count as used.
+        
+        Args:
+            extra_bytes: Size of the upload, if known (0 = any room left)
+            exclude_session: Upload session whose own reservation is not
+                counted, when re-checking that session
+        
+        Returns:
+            True if the quota is disabled or the upload fits under it
+        """
+        if not self.quota_bytes:
+            return True
+        if self._fits(upload_index.stats()["bytes"], extra_bytes, exclude_session):
+            return True
+        return self._fits(self.sweep()["bytes"], extra_bytes, exclude_session)
+    
+    async def _sweep_forever(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.sweep)
+                await asyncio.to_thread(upload_sessions.expire)
+            except Exception as e:
+                logger.error(f"Storage sweep failed: {e}", exc_info=True)
+    
+    def start(self, interval: float = UPLOAD_SWEEP_INTERVAL) -> None:
+        """Start the background sweeper on the running event loop (no-op if interval is 0)."""
+        if interval and not self._sweeper:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever(interval))
+            logger.info(f"Storage sweeper started (every {interval:.0f}s)")
+    
+    def stop(self) -> None:
+        """Stop the background sweeper."""
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get storage counters.
+        
+        Returns:
+            Dict with stored files/bytes, bytes reserved by upload sessions,
+            quota, evicted uploads/bytes, sweeps and pinned files
+        """
+        index_stats = upload_index.stats()
+        reserved_bytes = upload_sessions.reserved_bytes()
+        with self._lock:
+            return {
+                "files": index_stats["files"],
+                "bytes": index_stats["bytes"],
+                "session_reserved_bytes": reserved_bytes,
+                "quota_bytes": self.quota_bytes,
+                "evicted_files": index_stats["evicted"],
+                "evicted_bytes": self.evicted_bytes,
+                "sweeps": self.sweeps,
+                "pinned": len(self._pins),
+            }
+
+
+# Singleton instance shared by the upload and analysis routes
+storage_manager = StorageManager()
@@ -0,0 +1,170 @@
+"""
+Text Spool Module
+Accumulates extracted text without holding it all in memory.
+
+Large compilations produce tens of megabytes of OCR text. A TextSpool keeps
+parts in memory until a threshold is passed, then spills them to a temporary
+file, so building a document page by page costs one copy of the text at the
+end instead of a list of pages plus the joined string. A PageSpool does
+the same for whole OCRPage objects, so a document's pages can be passed
+between processing steps without keeping them all in memory.
+"""
+
+from typing import Optional, Iterator, List, Tuple, Any
+from dataclasses import asdict
+import os
+import json
+import tempfile
+import logging
+from dotenv import load_dotenv
+
+from .ocr_providers import OCRPage
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.TextSpool")
+
+# Text held in memory before spilling to a temp file (configurable via .env)
+OCR_TEXT_SPOOL_BYTES = int(os.getenv("OCR_TEXT_SPOOL_MB", "8")) * 1024 * 1024
+
+
+class TextSpool:
+    """
+    Append-only store of text parts, spilled to disk past max_memory_bytes.
+    
+    Each part may carry a metadata object (e.g. an OCRPage without its text),
+    returned alongside the text by items().
+    """
+    
+    def __init__(self, max_memory_bytes: int = OCR_TEXT_SPOOL_BYTES):
+        """
+        Initialize spool.
+        
+        Args:
+            max_memory_bytes: Bytes kept in memory before spilling to a temp file
+                (0 spills straight away)
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.char_count = 0
+        self._file = tempfile.SpooledTemporaryFile(max_size=max(1, max_memory_bytes), mode="w+b")
+        self._size = 0
+        # (offset, length in bytes, metadata) per part
+        self._parts: List[Tuple[int, int, Any]] = []
+    
+    def __len__(self) -> int:
+        return len(self._parts)
+    
+    def __enter__(self) -> "TextSpool":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    @property
+    def spilled(self) -> bool:
+        """True once the text has been moved to a temp file on disk."""
+        return bool(getattr(self._file, "_rolled", False))
+    
+    def append(self, text: str, meta: Optional[Any] = None) -> None:
+        """
+        Add a part.
+        
+        Args:
+            text: Text of the part
+            meta: Optional metadata stored with the part
+        """
+        was_spilled = self.spilled
+        data = text.encode("utf-8")
+        self._file.seek(self._size)
+        self._file.write(data)
+        self._parts.append((self._size, len(data), meta))
+        self._size += len(data)
+        self.char_count += len(text)
+        
+        if self.spilled and not was_spilled:
+            logger.info(f"Text spool passed {self.max_memory_bytes:,} bytes, spilled to disk")
+    
+    def _read(self, offset: int, length: int) -> str:
+        self._file.seek(offset)
+        return self._file.read(length).decode("utf-8")
+    
+    def items(self) -> Iterator[Tuple[Any, str]]:
+        """
+        Iterate over parts in the order they were added.
+        
+        Yields:
+            Tuple of (metadata, text) for each part
+        """
+        for offset, length, meta in self._parts:
+            yield meta, self._read(offset, length)
+    
+    def text(self, separator: str = "\n\n") -> str:
+        """
+        Join every part into one string.
+        
+        Args:
+            separator: String placed between parts
+        
+        Returns:
+            Joined text
+        """
+        return separator.join(text for _, text in self.items())
+    
+    def close(self) -> None:
+        """Release the buffer (deletes the temp file if one was created)."""
+        self._file.close()
+        self._parts = []
+
+
+class PageSpool:
+    """
+    Append-only store of whole OCR pages (text, blocks and metadata),
+    spilled to disk like TextSpool.
+    
+    Pages are serialised as JSON, so nothing but offsets stays in memory
+    once the spool has spilled. Iterating yields fresh OCRPage objects and
+    can be repeated; append() makes it usable wherever a list of pages is
+    built up.
+    """
+    
+    def __init__(self, max_memory_bytes: int = OCR_TEXT_SPOOL_BYTES):
+        """
+        Initialize spool.
+        
+        Args:
+            max_memory_bytes: Bytes kept in memory before spilling to a temp file
+        """
+        self._spool = TextSpool(max_memory_bytes)
+        self.char_count = 0
+    
+    def __len__(self) -> int:
+        return len(self._spool)
+    
+    def __iter__(self) -> Iterator[OCRPage]:
+        for _, data in self._spool.items():
+            yield OCRPage(**json.loads(data))
+    
+    def __enter__(self) -> "PageSpool":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    @property
+    def spilled(self) -> bool:
+        """True once the pages have been moved to a temp file on disk."""
+        return self._spool.spilled
+    
+    def append(self, page: OCRPage) -> None:
+        """
+        Add a page.
+        
+        Args:
+            page: Page to store (it is copied, later changes are not seen)
+        """
+        self._spool.append(json.dumps(asdict(page), ensure_ascii=False))
+        self.char_count += len(page.text)
+    
+    def close(self) -> None:
+        """Release the buffer (deletes the temp file if one was created)."""
+        self._spool.close()
@@ -0,0 +1,351 @@
+"""
+Upload Index
+SQLite manifest of uploaded files, keyed by file_id.
+
+Analysis routes used to find an upload by scanning UPLOAD_DIR for a file
+whose name contained the file_id. That is a linear scan per lookup (per
+file, for multi-file requests) and can pick the wrong file when one id is
+a substring of another name. Uploads are now recorded here with their
+path, SHA-256 hash, size and page count, and looked up by primary key.
+
+Rebuild the index from an existing upload directory with:
+    python -m core.upload_index ./uploads
+"""
+
+from typing import Optional, Dict, Any, List
+from pathlib import Path
+import os
+import re
+import sys
+import glob
+import time
+import sqlite3
+import logging
+import threading
+from dotenv import load_dotenv
+
+from .ocr_cache import sha256_file
+
+# Try to import PyMuPDF for page counts
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.UploadIndex")
+
+# Upload directory and index location (configurable via .env)
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
+UPLOAD_INDEX_PATH = Path(os.getenv("UPLOAD_INDEX_PATH", str(UPLOAD_DIR / "index.sqlite3")))
+
+# Uploads are streamed here before being moved into their shard directory
+UPLOAD_STAGING_DIR = UPLOAD_DIR / "incoming"
+
+# Uploads are stored as "<file_id>_<original filename>"
+UPLOAD_NAME = re.compile(r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})_(.+)$')
+
+# File types indexed by rebuild()
+INDEXED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    file_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    page_count INTEGER,
+    uploaded_at REAL NOT NULL,
+    last_used_at REAL,
+    evicted_at REAL
+);
+CREATE INDEX IF NOT EXISTS uploads_sha256 ON uploads (sha256);
+CREATE INDEX IF NOT EXISTS uploads_path ON uploads (path);
+"""
+
+# Columns added after the first release, created on older index files at startup
+MIGRATIONS = {
+    "last_used_at": "ALTER TABLE uploads ADD COLUMN last_used_at REAL",
+    "evicted_at": "ALTER TABLE uploads ADD COLUMN evicted_at REAL",
+}
+
+
+def count_pages(file_path: str) -> Optional[int]:
+    """
+    Count the pages of an upload without rendering anything.
+    
+    Args:
+        file_path: Path to a PDF or image
+    
+    Returns:
+        Page count (1 for images), or None if a PDF cannot be opened
+    """
+    if Path(file_path).suffix.lower() != '.pdf':
+        return 1
+    if not PYMUPDF_AVAILABLE:
+        return None
+    try:
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning(f"Could not count pages of {file_path}: {e}")
+        return None
+
+
+class UploadIndex:
+    """
+    SQLite-backed map of file_id -> upload record.
+    
+    Records are dicts with 'file_id', 'filename', 'path', 'sha256', 'size',
+    'page_count', 'uploaded_at', 'last_used_at' and 'evicted_at' (set once
+    the storage manager has deleted the file because its OCR is cached).
+    One connection is shared between threads behind a lock; every operation
+    is a single indexed statement.
+    """
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(uploads)")}
+            for column, statement in MIGRATIONS.items():
+                if columns and column not in columns:
+                    self._conn.execute(statement)
+            self._conn.executescript(SCHEMA)
+    
+    def add(self, file_id: str, filename: str, path: Path, sha256: str, size: int,
+            page_count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Record (or replace) an upload.
+        
+        Args:
+            file_id: Unique file identifier
+            filename: Original filename
+            path: Where the file is stored
+            sha256: Hex digest of the file contents
+            size: Size in bytes
+            page_count: Number of pages, if known
+        
+        Returns:
+            The stored record
+        """
+        record = {
+            "file_id": file_id,
+            "filename": filename,
+            "path": str(Path(path).resolve()),
+            "sha256": sha256,
+            "size": size,
+            "page_count": page_count,
+            "uploaded_at": time.time(),
+            "last_used_at": time.time(),
+            "evicted_at": None,
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO uploads "
+                "(file_id, filename, path, sha256, size, page_count, uploaded_at, last_used_at, evicted_at) "
+                "VALUES (:file_id, :filename, :path, :sha256, :size, :page_count, :uploaded_at, :last_used_at, :evicted_at)",
+                record
+            )
+        return record
+    
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an upload record by file_id.
+        
+        Args:
+            file_id: Unique file identifier
+        
+        Returns:
+            Record dict, or None if the file_id is unknown
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM uploads WHERE file_id = ?", (file_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def find_by_hash(self, sha256: str, include_evicted: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Find an earlier upload with the same contents.
+        
+        Args:
+            sha256: Hex digest of the file contents
+            include_evicted: Also return uploads whose file was evicted
+        
+        Returns:
+            Record of the oldest upload with this hash whose file still
+            exists (or was evicted, if include_evicted), or None
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM uploads WHERE sha256 = ? ORDER BY uploaded_at", (sha256,)
+            ).fetchall()
+        for row in rows:
+            if Path(row["path"]).is_file() or (include_evicted and row["evicted_at"] is not None):
+                return dict(row)
+        return None
+    
+    def sha256_for_path(self, path: str) -> Optional[str]:
+        """
+        Content hash of an indexed file, without reading the file.
+        
+        Args:
+            path: Absolute path of the stored file
+        
+        Returns:
+            Hex digest, or None if the path is not indexed
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM uploads WHERE path = ?", (str(path),)).fetchone()
+        return row["sha256"] if row else None
+    
+    def live_files(self) -> List[Dict[str, Any]]:
+        """Records of uploads whose file is still stored, least recently used first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM uploads WHERE evicted_at IS NULL ORDER BY COALESCE(last_used_at, uploaded_at)"
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def mark_evicted(self, file_id: str) -> None:
+        """Record that an upload's file was deleted while its OCR stays cached."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE uploads SET evicted_at = ? WHERE file_id = ?", (time.time(), file_id))
+    
+    def restore(self, file_id: str) -> None:
+        """Record that an evicted upload's file is stored again."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE uploads SET evicted_at = NULL, last_used_at = ? WHERE file_id = ?", (time.time(), file_id)
+            )
+    
+    def page_count(self, file_id: str) -> Optional[int]:
+        """
+        Page count of an upload, counting and recording it if it is unknown.
+        
+        Args:
+            file_id: Unique file identifier
+        
+        Returns:
+            Number of pages, or None if the upload is unknown or its file
+            cannot be counted (e.g. it was evicted before being counted)
+        """
+        record = self.get(file_id)
+        if not record:
+            return None
+        if record["page_count"] is None and Path(record["path"]).is_file():
+            page_count = count_pages(record["path"])
+            if page_count is not None:
+                self.set_page_count(file_id, page_count)
+            return page_count
+        return record["page_count"]
+    
+    def set_page_count(self, file_id: str, page_count: int) -> None:
+        """Record the page count of an upload once it is known (e.g. after OCR)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE uploads SET page_count = ? WHERE file_id = ?", (page_count, file_id))
+    
+    def remove(self, file_id: str) -> None:
+        """Forget an upload (the file itself is left alone)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+    
+    def resolve(self, file_id: str) -> Optional[Path]:
+        """
+        Find the stored file of an upload.
+        
+        Files uploaded before the index existed are found by their exact
+        "<file_id>_" name prefix and indexed on first use. Every lookup
+        counts as a use for LRU eviction.
+        
+        Args:
+            file_id: Unique file identifier
+        
+        Returns:
+            Path to the file, or None if it does not exist. For an evicted
+            upload the recorded path is returned even though the file is
+            gone: its OCR result is still in the OCR cache.
+        """
+        record = self.get(file_id)
+        if record:
+            path = Path(record["path"])
+            if path.is_file() or record["evicted_at"] is not None:
+                with self._lock, self._conn:
+                    self._conn.execute("UPDATE uploads SET last_used_at = ? WHERE file_id = ?", (time.time(), file_id))
+                return path
+            logger.warning(f"Indexed file for {file_id} is missing: {path}")
+            self.remove(file_id)
+            return None
+        
+        if not UPLOAD_NAME.match(f"{file_id}_x"):
+            return None
+        for match in glob.glob(str(UPLOAD_DIR / f"{glob.escape(file_id)}_*")):
+            path = Path(match)
+            if path.is_file() and path.suffix.lower() in INDEXED_EXTENSIONS:
+                self._index_file(file_id, path)
+                return path
+        return None
+    
+    def _index_file(self, file_id: str, path: Path) -> Dict[str, Any]:
+        """Hash, size and page-count an existing file and record it."""
+        return self.add(
+            file_id,
+            UPLOAD_NAME.match(path.name).group(2),
+            path,
+            sha256_file(str(path)),
+            path.stat().st_size,
+            count_pages(str(path)),
+        )
+    
+    def rebuild(self, directory: Path = UPLOAD_DIR) -> int:
+        """
+        Re-create the index from the files in an upload directory.
+        
+        Records of files that no longer exist are dropped (evicted uploads
+        are kept); every "<file_id>_<name>" file, including those in hash
+        shard subdirectories, is hashed and page-counted again.
+        
+        Args:
+            directory: Upload directory to scan
+        
+        Returns:
+            Number of files indexed
+        """
+        files: List[Path] = [
+            path for path in sorted(Path(directory).rglob("*"))
+            if path.is_file() and path.suffix.lower() in INDEXED_EXTENSIONS and UPLOAD_NAME.match(path.name)
+            and UPLOAD_STAGING_DIR.name not in path.relative_to(directory).parts
+        ]
+        
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM uploads WHERE evicted_at IS NULL")
+        for path in files:
+            self._index_file(UPLOAD_NAME.match(path.name).group(1), path)
+        
+        logger.info(f"Upload index rebuilt from {directory}: {len(files)} file(s)")
+        return len(files)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Number and total size of stored uploads, and number of evicted ones."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploads WHERE evicted_at IS NULL"
+            ).fetchone()
+            evicted = self._conn.execute("SELECT COUNT(*) FROM uploads WHERE evicted_at IS NOT NULL").fetchone()[0]
+        return {"files": count, "bytes": total, "evicted": evicted}
+
+
+# Singleton instance shared by the upload and analysis routes
+upload_index = UploadIndex(UPLOAD_INDEX_PATH)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Import through the package so the index is the one the app uses
+    from core.upload_index import upload_index as index
+    index.rebuild(Path(sys.argv[1]) if len(sys.argv) > 1 else UPLOAD_DIR)
@@ -0,0 +1,317 @@
+"""
+Resumable Upload Sessions
+Chunked uploads that survive dropped connections.
+
+Single-shot uploads are capped at MAX_UPLOAD_MB, and a flaky mobile
+connection restarts a large scanned compilation from zero. A session
+instead receives the file in chunks at explicit offsets, written straight
+into the session's data file:
+    
+    POST   /upload/sessions                    -> session_id
+    PUT    /upload/sessions/{id}?offset=N      (chunk bytes as the body)
+    GET    /upload/sessions/{id}               -> bytes received so far
+    POST   /upload/sessions/{id}/finalize      -> normal file_id
+
+The data file's size is the authoritative offset, so a session can be
+resumed after a server restart. Session metadata sits next to it as JSON.
+Finalising checks the size and the SHA-256 the client declared, then hands
+the file to the normal upload path (dedup, sharding, index).
+"""
+
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
+from pathlib import Path
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from dotenv import load_dotenv
+
+from .ocr_cache import sha256_file
+from .upload_index import UPLOAD_STAGING_DIR
+
+load_dotenv()
+
+logger = logging.getLogger("ExamPulse.UploadSessions")
+
+# Resumable uploads (configurable via .env)
+# UPLOAD_SESSION_MAX_MB: largest file accepted through a session
+# UPLOAD_SESSION_TTL_HOURS: sessions without a chunk for this long are deleted by the storage sweeper
+UPLOAD_SESSION_MAX_BYTES = int(os.getenv("UPLOAD_SESSION_MAX_MB", "1024")) * 1024 * 1024
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600
+
+# Chunk size suggested to clients
+UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024
+
+SESSION_ID = re.compile(r'^[0-9a-f]{32}$')
+SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadSessionError(ValueError):
+    """Raised for a bad session request; status_code is the HTTP status to answer with."""
+    
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadSessionStore:
+    """
+    Upload sessions kept as <session_id>.json + <session_id>.data files.
+    
+    Only one chunk per session is written at a time; a second concurrent
+    PUT is refused rather than interleaved. A session is claimed under a
+    lock while a chunk is written, while it is finalized and while it is
+    expired, so none of these can overlap.
+    """
+    
+    def __init__(self, directory: Path = UPLOAD_STAGING_DIR):
+        """
+        Initialize store.
+        
+        Args:
+            directory: Directory for session metadata and data files
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._writing: set = set()
+        self._lock = threading.Lock()
+    
+    def _meta_path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.json"
+    
+    def _data_path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.data"
+    
+    def _claim(self, session_id: str, detail: str) -> None:
+        """Mark a session busy, or raise 409 with detail if it already is."""
+        with self._lock:
+            if session_id in self._writing:
+                raise UploadSessionError(409, detail)
+            self._writing.add(session_id)
+    
+    def _release(self, session_id: str) -> None:
+        with self._lock:
+            self._writing.discard(session_id)
+    
+    def create(self, filename: str, size: int, sha256: str, content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start a resumable upload.
+        
+        Args:
+            filename: Original filename (directory parts are dropped)
+            size: Total size of the file in bytes
+            sha256: Hex digest of the whole file, verified on finalize
+            content_type: MIME type given by the client
+        
+        Returns:
+            Session dict (see get())
+        
+        Raises:
+            UploadSessionError: If size or hash are invalid
+        """
+        sha256 = sha256.lower()
+        if size <= 0:
+            raise UploadSessionError(400, "File is empty")
+        if size > UPLOAD_SESSION_MAX_BYTES:
+            raise UploadSessionError(400, f"File too large. Maximum size: {UPLOAD_SESSION_MAX_BYTES / (1024*1024):.0f}MB")
+        if not SHA256_HEX.match(sha256):
+            raise UploadSessionError(400, "sha256 must be a 64-character hex digest")
+        
+        session_id = uuid.uuid4().hex
+        meta = {
+            "session_id": session_id,
+            "file_id": str(uuid.uuid4()),
+            "filename": Path(filename).name or "uploaded_file",
+            "size": size,
+            "sha256": sha256,
+            "content_type": content_type,
+            "created_at": time.time(),
+        }
+        self._data_path(session_id).touch()
+        with open(self._meta_path(session_id), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        
+        logger.info(f"Upload session {session_id} started for {meta['filename']} ({size:,} bytes)")
+        return self.get(session_id)
+    
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """
+        Look up a session.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Session dict with 'session_id', 'file_id', 'filename', 'size',
+            'sha256', 'content_type', 'created_at', 'offset' (bytes received)
+            and 'chunk_size'
+        
+        Raises:
+            UploadSessionError: 404 if the session does not exist
+        """
+        if not SESSION_ID.match(session_id):
+            raise UploadSessionError(404, f"Upload session {session_id} not found")
+        try:
+            with open(self._meta_path(session_id), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            offset = self._data_path(session_id).stat().st_size
+        except (OSError, ValueError):
+            raise UploadSessionError(404, f"Upload session {session_id} not found")
+        return {**meta, "offset": offset, "chunk_size": UPLOAD_SESSION_CHUNK_SIZE}
+    
+    async def append(self, session_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Write one chunk at the end of the data received so far.
+        
+        Args:
+            session_id: Session identifier
+            offset: Where the chunk starts; must equal the bytes received so far
+            chunks: Body of the chunk, as it arrives
+        
+        Returns:
+            Updated session dict
+        
+        Raises:
+            UploadSessionError: 409 on a wrong offset or a concurrent write,
+            400 if the chunk runs past the declared size
+        """
+        session = self.get(session_id)
+        if offset != session["offset"]:
+            raise UploadSessionError(409, f"Expected offset {session['offset']}, got {offset}")
+        self._claim(session_id, "Another chunk is being written to this session")
+        written = 0
+        try:
+            # On a dropped connection the bytes that did arrive are kept;
+            # the client resumes from the offset reported by get()
+            with open(self._data_path(session_id), "ab") as f:
+                try:
+                    async for chunk in chunks:
+                        if offset + written + len(chunk) > session["size"]:
+                            raise UploadSessionError(400, f"Chunk runs past the declared size of {session['size']:,} bytes")
+                        await asyncio.to_thread(f.write, chunk)
+                        written += len(chunk)
+                except UploadSessionError:
+                    # Drop the rejected chunk so the session stays consistent
+                    f.flush()
+                    f.truncate(offset)
+                    raise
+        finally:
+            self._release(session_id)
+        
+        return {**session, "offset": offset + written}
+    
+    def finalize(self, session_id: str) -> Tuple[Dict[str, Any], Path]:
+        """
+        Verify a complete upload and release its data file.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Tuple of (session dict, path of the data file renamed to
+            "<file_id>_<filename>" in the staging directory)
+        
+        Raises:
+            UploadSessionError: 409 if bytes are missing or a chunk is still
+            being written, 400 if the content hash does not match (the
+            session is deleted; start over)
+        """
+        self._claim(session_id, "A chunk is still being written to this session")
+        try:
+            session = self.get(session_id)
+            if session["offset"] < session["size"]:
+                raise UploadSessionError(409, f"Upload incomplete: {session['offset']:,} of {session['size']:,} bytes received")
+            
+            data_path = self._data_path(session_id)
+            if sha256_file(str(data_path)) != session["sha256"]:
+                self.abort(session_id)
+                raise UploadSessionError(400, "Content hash does not match the declared sha256, please upload again")
+            
+            staged_path = self.directory / f"{session['file_id']}_{session['filename']}"
+            os.replace(data_path, staged_path)
+            self._meta_path(session_id).unlink(missing_ok=True)
+        finally:
+            self._release(session_id)
+        logger.info(f"Upload session {session_id} complete ({session['size']:,} bytes)")
+        return session, staged_path
+    
+    def abort(self, session_id: str) -> None:
+        """Delete a session and the data received so far."""
+        if not SESSION_ID.match(session_id):
+            return
+        self._data_path(session_id).unlink(missing_ok=True)
+        self._meta_path(session_id).unlink(missing_ok=True)
+    
+    def expire(self, ttl_seconds: float = UPLOAD_SESSION_TTL_SECONDS) -> int:
+        """
+        Delete sessions that have not received a chunk for ttl_seconds.
+        
+        Args:
+            ttl_seconds: Idle time after which a session is abandoned (0 = never)
+        
+        Returns:
+            Number of sessions deleted
+        """
+        if not ttl_seconds:
+            return 0
+        cutoff = time.time() - ttl_seconds
+        expired = 0
+        for meta_path in self.directory.glob("*.json"):
+            session_id = meta_path.stem
+            try:
+                self._claim(session_id, "")
+            except UploadSessionError:
+                continue
+            try:
+                data_path = self._data_path(session_id)
+                try:
+                    last_write = data_path.stat().st_mtime if data_path.exists() else meta_path.stat().st_mtime
+                except OSError:
+                    continue
+                if last_write < cutoff:
+                    self.abort(session_id)
+                    expired += 1
+            finally:
+                self._release(session_id)
+        if expired:
+            logger.info(f"Expired {expired} abandoned upload session(s)")
+        return expired
+    
+    def reserved_bytes(self, exclude: Optional[str] = None) -> int:
+        """
+        Total declared size of open sessions, received or not.
+        
+        Args:
+            exclude: Session whose own reservation is left out
+        
+        Returns:
+            Bytes the open sessions will occupy once complete
+        """
+        total = 0
+        for meta_path in self.directory.glob("*.json"):
+            if meta_path.stem == exclude:
+                continue
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    total += int(json.load(f)["size"])
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+        return total
+    
+    def stats(self) -> Dict[str, Any]:
+        """Number of open sessions, bytes they hold and bytes they reserve."""
+        data_files = list(self.directory.glob("*.data"))
+        return {
+            "sessions": len(data_files),
+            "bytes": sum(path.stat().st_size for path in data_files if path.exists()),
+            "reserved_bytes": self.reserved_bytes(),
+        }
+
+
+# Singleton instance used by the upload routes
+upload_sessions = UploadSessionStore()
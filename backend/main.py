@@ -14,6 +14,10 @@ load_dotenv()
 # Initialize logging first
 from utils.logger import logger
 
+from core.ocr import ocr_executor
+from core.ocr_prewarm import ocr_prewarmer
+from core.storage import storage_manager
+from core.ocr_providers import tesseract_pool
 from api import upload, analyze, analyze_multi, combine_ocr, expected_paper, study_logs, smart_plan, health, chatbot, dashboard
 
 app = FastAPI(
@@ -63,13 +67,18 @@ async def root():
 
 @app.on_event("startup")
 async def startup_event():
-    """Log server startup"""
+    """Log server startup and start the upload storage sweeper"""
+    storage_manager.start()
     logger.info("ExamPulse API server started successfully")
     logger.info("Available endpoints: /upload, /analyze, /analyze/multi, /expected-paper, /study-logs, /smart-plan, /chatbot, /dashboard")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Log server shutdown"""
+    """Log server shutdown and stop OCR workers"""
     logger.info("ExamPulse API server shutting down")
+    storage_manager.stop()
+    ocr_prewarmer.shutdown()
+    ocr_executor.shutdown()
+    tesseract_pool.shutdown()
 
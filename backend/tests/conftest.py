@@ -0,0 +1,20 @@
+"""
+Shared pytest setup.
+
+Points every on-disk store (uploads, upload index, OCR caches) at a
+throwaway directory before any backend module is imported, and makes the
+backend packages importable when pytest is run from the backend directory.
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_data_dir = tempfile.mkdtemp(prefix="exampulse-tests-")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_data_dir, "uploads"))
+os.environ.setdefault("OCR_CACHE_DIR", os.path.join(_data_dir, "ocr_cache"))
+os.environ.setdefault("OCR_PAGE_CACHE_DIR", os.path.join(_data_dir, "ocr_cache", "pages"))
+os.environ.setdefault("ANALYSIS_CACHE_DIR", os.path.join(_data_dir, "ocr_cache", "analysis"))
@@ -0,0 +1,63 @@
+"""
+Header/footer stripping must remove page furniture without touching questions.
+"""
+
+from core.header_footer import strip_headers_footers
+from core.ocr_providers import OCRPage
+from core.question_extractor import extract_questions
+from core.ocr import PAGE_SEPARATOR
+
+QUESTIONS = [
+    (1, "Define the term specific heat capacity", "and state its SI unit.", 5),
+    (2, "Explain why a metal spoon feels colder", "than a wooden spoon at room temperature.", 10),
+    (3, "Describe an experiment to measure", "the density of an irregular solid.", 5),
+    (4, "Calculate the energy needed to boil", "2 kg of water at 100 degrees.", 10),
+]
+
+
+def _paper():
+    """Four pages, one question each, ending in "(N marks)" just above the footer."""
+    return [
+        OCRPage(
+            index=page_num,
+            text="\n".join([
+                "Federal Board of Intermediate Examinations",
+                "Physics Paper 2 - 2024",
+                f"{number}. {question}",
+                continuation,
+                f"({marks} marks)",
+                f"Page {page_num + 1} of 4",
+            ]),
+        )
+        for page_num, (number, question, continuation, marks) in enumerate(QUESTIONS)
+    ]
+
+
+def test_marks_near_page_bottom_survive():
+    pages, stats = strip_headers_footers(_paper())
+
+    assert stats["applied"]
+    # Board name, paper title and "Page N of 4"; never the marks lines
+    assert stats["patterns"] == 3
+    assert stats["lines"] == 12
+    for page, (_, _, _, marks) in zip(pages, QUESTIONS):
+        assert f"({marks} marks)" in page.text
+        assert "Federal Board" not in page.text
+        assert "Page" not in page.text
+
+    questions = extract_questions(PAGE_SEPARATOR.join(page.text for page in pages), remove_watermarks=False)
+    assert [(q["question_number"], q["marks"]) for q in questions] == [(number, marks) for number, _, _, marks in QUESTIONS]
+
+
+def test_repeated_line_in_page_body_is_kept():
+    pages = _paper()
+    # The board name quoted in the middle of a question is content, not a header
+    pages[1].text = pages[1].text.replace(
+        "(10 marks)",
+        "Federal Board of Intermediate Examinations\nUse the values quoted by the board.\nShow your working.\n(10 marks)",
+    )
+
+    stripped, _ = strip_headers_footers(pages)
+
+    assert stripped[1].text.count("Federal Board of Intermediate Examinations") == 1
+    assert not stripped[1].text.startswith("Federal Board")
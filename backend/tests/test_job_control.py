@@ -0,0 +1,39 @@
+"""
+The document time budget starts when OCR runs and only bounds rasterised OCR.
+"""
+
+import time
+
+import fitz
+
+from core.ocr_providers import OCRJobControl, PyMuPDFOCR
+
+
+def test_clock_starts_when_the_job_starts():
+    control = OCRJobControl(page_timeout=0, document_timeout=0.2)
+    # Queued behind other documents for longer than the whole budget
+    time.sleep(0.3)
+
+    assert not control.should_stop()
+    assert control.page_budget() == 0.2
+
+    control.start()
+    assert 0 < control.remaining() <= 0.2
+
+
+def test_text_layer_pages_are_read_after_the_budget_runs_out(tmp_path):
+    path = tmp_path / "paper.pdf"
+    doc = fitz.open()
+    for number in range(1, 4):
+        doc.new_page().insert_text((72, 72), f"{number}. Explain the water cycle in detail. (4 marks)")
+    doc.save(str(path))
+    doc.close()
+
+    control = OCRJobControl(page_timeout=0, document_timeout=0.05)
+    control.start()
+    time.sleep(0.1)
+
+    pages = list(PyMuPDFOCR().iter_pages(str(path), control=control))
+
+    assert [page.index for page in pages] == [0, 1, 2]
+    assert control.timed_out_pages == []
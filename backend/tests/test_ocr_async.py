@@ -0,0 +1,84 @@
+"""
+/health must keep answering while a large OCR job runs off the event loop.
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from api import health
+from core import ocr
+from core.ocr import run_best_ocr_async
+from core.ocr_providers import BaseOCR, OCRPage, ProviderRegistry
+
+# Longest /health may take while OCR is busy (seconds)
+HEALTH_BOUND = 0.5
+
+
+class SlowOCR(BaseOCR):
+    """Fake provider that blocks its worker thread until released."""
+
+    file_types = ('.pdf',)
+    page_costs = {"ocr": 1.0}
+
+    def __init__(self):
+        super().__init__("SlowOCR")
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def extract_text(self, file_path):
+        return None
+
+    def is_available(self):
+        return True
+
+    def iter_pages(self, file_path, pages=None, capability=None, control=None):
+        self.started.set()
+        # Simulates a long synchronous OCR run (blocking, no awaits)
+        self.release.wait(timeout=10)
+        yield OCRPage(index=0, text="Q1. Define entropy. (5 marks)", provider=self.name)
+
+
+def test_health_responds_while_ocr_runs(monkeypatch, tmp_path):
+    provider = SlowOCR()
+    registry = ProviderRegistry()
+    registry.register(provider)
+    monkeypatch.setattr(ocr, "registry", registry)
+    monkeypatch.setattr(ocr, "OCR_CACHE_ENABLED", False)
+
+    paper = tmp_path / "paper.pdf"
+    paper.write_bytes(b"%PDF-1.4 fake")
+
+    app = FastAPI()
+    app.include_router(health.router, prefix="/health")
+
+    @app.post("/ocr")
+    async def run_ocr_job():
+        return {"text": await run_best_ocr_async(str(paper))}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            job = asyncio.create_task(client.post("/ocr"))
+            assert await asyncio.to_thread(provider.started.wait, 5)
+
+            started = time.perf_counter()
+            response = await client.get("/health/")
+            elapsed = time.perf_counter() - started
+
+            assert response.status_code == 200
+            assert elapsed < HEALTH_BOUND
+            assert not job.done()
+            assert response.json()["ocr_queue"]["pending"] == 1
+
+            provider.release.set()
+            result = await asyncio.wait_for(job, timeout=10)
+            assert result.json()["text"] == "Q1. Define entropy. (5 marks)"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        provider.release.set()
@@ -0,0 +1,92 @@
+"""
+Page filtering must drop non-question pages without losing question parts.
+"""
+
+from core.ocr_providers import OCRPage
+from core.page_classifier import (
+    classify_page, filter_question_pages,
+    PAGE_QUESTIONS, PAGE_FORMULA_SHEET, PAGE_ANSWER_KEY,
+)
+
+QUESTION_PAGE = "\n".join([
+    "3. Solve the following equations, showing your working.",
+    "(a) Solve 3x - 4 = 2x + 7",
+    "x = 11",
+])
+
+# Second page of question 3: only parts and equations, no numbered line
+CONTINUATION_PAGE = "\n".join([
+    "(b) Solve 2x + 5 = 11",
+    "2x = 6",
+    "x = 3",
+    "(c) Solve x^2 - 5x + 6 = 0",
+    "(x - 2)(x - 3) = 0",
+    "x = 2 or x = 3",
+    "(d) Given y = 4x - 1, find x when y = 15 [3]",
+])
+
+FORMULA_SHEET = "\n".join([
+    "Formula Sheet",
+    "Area of a circle = pi r^2",
+    "Volume of a cylinder = pi r^2 h",
+    "Quadratic formula: x = (-b +/- sqrt(b^2 - 4ac)) / 2a",
+])
+
+MARK_SCHEME = "\n".join([
+    "Mark Scheme",
+    "1 (a) x = 11 B1",
+    "(b) x = 3 M1 A1",
+])
+
+# Mark scheme page without a heading: every line ends in annotations
+UNTITLED_MARK_SCHEME = "\n".join([
+    "(a) 3x - 2x = 7 + 4 M1",
+    "x = 11 A1",
+    "(b) 2x = 6 M1",
+    "x = 3 A1",
+    "(c) (x - 2)(x - 3) = 0 M1",
+    "x = 2 or x = 3 A1 A1",
+])
+
+# Cell references look like A1 / B1 annotations
+SPREADSHEET_QUESTION = "\n".join([
+    "6. The spreadsheet shows the monthly sales of a shop.",
+    "Cell A1 holds the month and cell B1 the sales total.",
+    "(a) Write a formula to copy the value in A1 into C1",
+    "(b) Explain why =SUM(B1:B12) is entered in B13 rather than B1",
+])
+
+# Masses named M1 / M2
+MECHANICS_QUESTION = "\n".join([
+    "7. Two particles of masses M1 and M2 are connected by a light string.",
+    "The string passes over a smooth pulley, with M1 hanging freely.",
+    "(a) Find the acceleration of M1 in terms of g.",
+    "(b) Find the tension in the string when M1 = 2 kg and M2 = 3 kg.",
+])
+
+
+def test_equation_continuation_page_is_kept():
+    assert classify_page(CONTINUATION_PAGE) == PAGE_QUESTIONS
+
+    pages = [OCRPage(index=i, text=text) for i, text in enumerate([QUESTION_PAGE, CONTINUATION_PAGE, FORMULA_SHEET, MARK_SCHEME])]
+    kept, stats = filter_question_pages(pages)
+
+    assert [page.index for page in kept] == [0, 1]
+    assert stats["skipped_pages"] == [
+        {"page": 3, "kind": PAGE_FORMULA_SHEET},
+        {"page": 4, "kind": PAGE_ANSWER_KEY},
+    ]
+
+
+def test_formula_sheet_needs_a_heading():
+    assert classify_page(FORMULA_SHEET) == PAGE_FORMULA_SHEET
+    assert classify_page(FORMULA_SHEET.replace("Formula Sheet\n", "")) == PAGE_QUESTIONS
+
+
+def test_untitled_mark_scheme_is_skipped():
+    assert classify_page(UNTITLED_MARK_SCHEME) == PAGE_ANSWER_KEY
+
+
+def test_cell_references_and_masses_are_not_mark_annotations():
+    assert classify_page(SPREADSHEET_QUESTION) == PAGE_QUESTIONS
+    assert classify_page(MECHANICS_QUESTION) == PAGE_QUESTIONS
@@ -0,0 +1,32 @@
+"""
+Preprocessing must shrink oversized phone photos and crop the desk around them.
+"""
+
+import numpy as np
+from PIL import Image
+
+from core.ocr_providers.preprocess import PreprocessConfig, preprocess_image
+
+
+def test_photo_tagged_72_dpi_is_downscaled():
+    photo = Image.new("L", (3000, 4000), 255)
+    photo.info["dpi"] = (72, 72)
+    config = PreprocessConfig(binarize=False, crop_border=False)
+
+    processed, _ = preprocess_image(photo, config=config)
+
+    # 4000 px over an A4 long edge is ~342 DPI, shrunk to 300
+    assert max(processed.size) == round(4000 * 300 / (4000 / 11.69))
+
+
+def test_dark_desk_is_cropped_before_binarising():
+    pixels = np.full((1200, 900), 40, dtype=np.uint8)
+    pixels[150:1050, 120:780] = 235
+    pixels[300:310, 200:700] = 20  # a line of "text"
+    config = PreprocessConfig(downscale=False)
+
+    processed, timings = preprocess_image(Image.fromarray(pixels, mode="L"), config=config)
+
+    assert processed.size == (660, 900)
+    assert set(np.unique(np.asarray(processed))) <= {0, 255}
+    assert "crop_ms" in timings and "binarize_ms" in timings
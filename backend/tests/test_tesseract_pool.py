@@ -0,0 +1,59 @@
+"""
+Exceptions raised in OCR workers must not break or exhaust the pool.
+"""
+
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from core.ocr_providers.tesseract_pool import TesseractPool, pool_task
+
+
+class NotFoundError(Exception):
+    """Like pytesseract's TesseractNotFoundError: cannot be unpickled from its args."""
+
+    def __init__(self, command, detail):
+        super().__init__(f"{command}: {detail}")
+
+
+def _raise_not_found():
+    raise NotFoundError("tesseract", "not installed")
+
+
+@pool_task
+def _task_not_found():
+    _raise_not_found()
+
+
+def _wait_idle(pool: TesseractPool) -> None:
+    deadline = time.monotonic() + 5
+    while pool.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_pool_task_errors_reach_the_caller():
+    pool = TesseractPool(size=1, health_interval=0, max_restarts=0)
+    try:
+        for _ in range(3):
+            error = pool.submit(_task_not_found).exception(timeout=30)
+            assert isinstance(error, RuntimeError)
+            assert "NotFoundError" in str(error)
+        stats = pool.stats()
+        assert stats["restarts"] == 0 and stats["running"]
+    finally:
+        pool.shutdown()
+
+
+def test_unreadable_result_restarts_without_counting_a_crash():
+    pool = TesseractPool(size=1, health_interval=0, max_restarts=0)
+    try:
+        for _ in range(3):
+            future = pool.submit(_raise_not_found)
+            with pytest.raises(BrokenProcessPool):
+                future.result(timeout=30)
+            _wait_idle(pool)
+        assert pool.stats()["recent_restarts"] == 0
+        assert pool.stats()["restarts"] == 2
+    finally:
+        pool.shutdown()
@@ -0,0 +1,55 @@
+"""
+Clean text layers in other languages must not be replaced by worse OCR.
+"""
+
+from concurrent.futures import Future
+
+import fitz
+
+from core.ocr_providers import PyMuPDFOCR, METHOD_TEXT_LAYER
+from core.ocr_providers.text_quality import score_text, is_usable
+
+URDU = "یہ سوال پانی کے چکر کے بارے میں ہے۔ اپنے جواب میں تمام مراحل کی وضاحت کریں اور ہر مرحلے کی ایک مثال دیں۔"
+FRENCH = "1. Expliquez le cycle de l'eau en detaillant chaque etape et donnez un exemple pour chacune. (4 points)"
+FRENCH_OCR = "1. Exp1iquez Ie cyc1e de I'eau en d6taillant chaque 6tape et donnez un ex3mple pour chacune. (4 p0ints)"
+
+
+class FakePool:
+    """Answers every OCR job with the same text."""
+
+    def __init__(self, text):
+        self.text = text
+        self.jobs = 0
+
+    def submit(self, fn, *args):
+        self.jobs += 1
+        future = Future()
+        future.set_result({
+            "text": self.text, "confidence": 80.0, "blank": False, "timed_out": False, "passes": 1,
+            "zoom": 2.0, "ink": 0.1, "render_ms": 0.0, "preprocess_ms": 0.0, "ocr_ms": 0.0,
+        })
+        return future
+
+
+def test_non_latin_text_is_scored_without_the_word_list():
+    quality = score_text(URDU)
+
+    assert not quality["word_signal"]
+    assert is_usable(quality)
+
+
+def test_low_scoring_text_layer_is_kept_when_ocr_reads_no_better(tmp_path):
+    assert not is_usable(score_text(FRENCH))
+
+    path = tmp_path / "examen.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), FRENCH, fontsize=8)
+    doc.save(str(path))
+    doc.close()
+
+    pool = FakePool(FRENCH_OCR)
+    pages = list(PyMuPDFOCR(pool=pool).iter_pages(str(path)))
+
+    assert pool.jobs == 1
+    assert [page.method for page in pages] == [METHOD_TEXT_LAYER]
+    assert pages[0].text.strip() == FRENCH
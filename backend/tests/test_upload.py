@@ -0,0 +1,78 @@
+"""
+Upload routes refuse oversized bodies before reading them.
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from api import upload
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    return app
+
+
+def _post(content: bytes, headers: dict) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/upload/batch", content=content, headers=headers)
+    return asyncio.run(run())
+
+
+def _multipart(*files):
+    request = httpx.Request("POST", "http://test", files=[("files", file) for file in files])
+    return request.read(), dict(request.headers)
+
+
+def test_batch_over_limit_is_refused_up_front(monkeypatch):
+    monkeypatch.setattr(upload, "UPLOAD_BATCH_MAX_BYTES", 100)
+    content, headers = _multipart(("a.png", PNG), ("b.png", PNG))
+
+    response = _post(content, headers)
+
+    assert response.status_code == 413
+
+
+def test_batch_within_limit_is_stored():
+    content, headers = _multipart(("a.png", PNG), ("notes.txt", b"hello"))
+
+    response = _post(content, headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uploaded"] == 1 and body["failed"] == 1
+    assert [result["status"] for result in body["files"]] == ["uploaded", "failed"]
+
+
+def _post_single(content: bytes, headers: dict) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/upload/", content=content, headers=headers)
+    return asyncio.run(run())
+
+
+def test_single_upload_over_limit_is_refused_up_front(monkeypatch):
+    monkeypatch.setattr(upload, "MAX_FILE_SIZE", 10)
+    monkeypatch.setattr(upload, "MULTIPART_OVERHEAD", 10)
+    request = httpx.Request("POST", "http://test", files={"file": ("a.png", PNG)})
+
+    response = _post_single(request.read(), dict(request.headers))
+
+    assert response.status_code == 413
+
+
+def test_single_upload_is_stored():
+    request = httpx.Request("POST", "http://test", files={"file": ("a.png", PNG)})
+
+    response = _post_single(request.read(), dict(request.headers))
+
+    assert response.status_code == 200
+    assert response.json()["file_id"]
@@ -0,0 +1,63 @@
+"""
+Open upload sessions count toward UPLOAD_QUOTA_MB.
+"""
+
+import asyncio
+import hashlib
+
+import httpx
+from fastapi import FastAPI
+
+from api import upload
+from core.storage import storage_manager
+from core.upload_sessions import upload_sessions
+
+DATA = b'%PDF-1.4\n' + b'0' * 791
+
+
+def _session_request(size: int) -> dict:
+    return {"filename": "compilation.pdf", "size": size, "sha256": hashlib.sha256(DATA).hexdigest()}
+
+
+def _run(requests):
+    async def run():
+        app = FastAPI()
+        app.include_router(upload.router, prefix="/upload")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await request(client) for request in requests]
+    return asyncio.run(run())
+
+
+def test_sessions_reserve_quota_and_chunks_recheck_it(monkeypatch):
+    monkeypatch.setattr(storage_manager, "quota_bytes", 1000)
+    session_ids = []
+
+    async def create_first(client):
+        response = await client.post("/upload/sessions", json=_session_request(len(DATA)))
+        session_ids.append(response.json()["session_id"])
+        return response
+
+    async def create_second(client):
+        return await client.post("/upload/sessions", json=_session_request(300))
+
+    async def put_chunk(client):
+        # The quota shrinks below the first session's reservation
+        monkeypatch.setattr(storage_manager, "quota_bytes", 500)
+        return await client.put(f"/upload/sessions/{session_ids[0]}?offset=0", content=DATA)
+
+    async def finalize(client):
+        return await client.post(f"/upload/sessions/{session_ids[0]}/finalize")
+
+    try:
+        first, second, chunk, final = _run([create_first, create_second, put_chunk, finalize])
+        received = upload_sessions.get(session_ids[0])["offset"]
+    finally:
+        for session_id in session_ids:
+            upload_sessions.abort(session_id)
+
+    assert first.status_code == 200
+    assert second.status_code == 507
+    assert chunk.status_code == 507
+    assert final.status_code == 507
+    assert received == 0
@@ -13,6 +13,9 @@ import Navbar from '../components/Navbar'
 import Background from '../components/Background'
 import ShaderBackground from '../components/ShaderBackground'
 
+// Must match MAX_UPLOAD_MB on the backend
+const MAX_UPLOAD_MB = Number(import.meta.env.VITE_MAX_UPLOAD_MB) || 10
+
 function Upload() {
   const [uploading, setUploading] = useState(false)
   const [uploadStatus, setUploadStatus] = useState(null)
@@ -29,14 +32,14 @@ function Upload() {
     setUploading(true)
     setUploadStatus(null)
     
-    const maxSize = 10 * 1024 * 1024 // 10MB
+    const maxSize = MAX_UPLOAD_MB * 1024 * 1024
     const validFiles = []
     const invalidFiles = []
 
     // Validate all files first
     for (const file of files) {
       if (file.size > maxSize) {
-        invalidFiles.push({ name: file.name, error: `File is too large (${(file.size / (1024 * 1024)).toFixed(2)}MB). Maximum is 10MB.` })
+        invalidFiles.push({ name: file.name, error: `File is too large (${(file.size / (1024 * 1024)).toFixed(2)}MB). Maximum is ${MAX_UPLOAD_MB}MB.` })
       } else if (file.size === 0) {
         invalidFiles.push({ name: file.name, error: 'File is empty.' })
       } else {
@@ -425,7 +428,7 @@ function Upload() {
               }`}>
                 <li className="flex items-start gap-2">
                   <span className={`mt-1 ${isDarkMode ? 'text-purple-400' : 'text-blue-600'}`}>•</span>
-                  <span>Supported formats: PDF, PNG, JPG (max 10MB each) - You can select multiple files at once</span>
+                  <span>Supported formats: PDF, PNG, JPG (max {MAX_UPLOAD_MB}MB each) - You can select multiple files at once</span>
                 </li>
                 <li className="flex items-start gap-2">
                   <span className={`mt-1 ${isDarkMode ? 'text-purple-400' : 'text-blue-600'}`}>•</span>